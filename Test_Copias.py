@@ -0,0 +1,38 @@
+# Test_Copias.py
+# Algunos módulos se usan en dos casos y cada caso se ejecuta desde su propia carpeta, así que
+# el archivo está copiado en ambas. Cada copia lo declara en su encabezado con la línea
+#   # Copia compartida: <caso>/<archivo>.py y <caso>/<archivo>.py deben ser iguales
+# y esta prueba falla si alguna de las dos cambió sin la otra.
+#
+#   python -m pytest -q Test_Copias.py
+import glob
+import os
+import re
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+DECLARACION = re.compile(r"^# Copia compartida: (\S+) y (\S+) deben ser iguales", re.MULTILINE)
+
+
+def copias_declaradas():
+    parejas = set()
+    for ruta in glob.glob(os.path.join(RAIZ, "*", "*.py")):
+        with open(ruta, encoding="utf-8") as archivo:
+            for coincidencia in DECLARACION.finditer(archivo.read()):
+                parejas.add(coincidencia.groups())
+    return sorted(parejas)
+
+
+def test_hay_copias_declaradas():
+    assert copias_declaradas()
+
+
+@pytest.mark.parametrize("original,copia", copias_declaradas())
+def test_copias_iguales(original, copia):
+    contenidos = []
+    for ruta in (original, copia):
+        with open(os.path.join(RAIZ, ruta), "rb") as archivo:
+            contenidos.append(archivo.read())
+    assert contenidos[0] == contenidos[1], \
+        "{} y {} ya no son iguales; aplique el cambio en ambas copias".format(original, copia)
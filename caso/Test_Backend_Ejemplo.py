@@ -0,0 +1,234 @@
+import os
+import json
+import time
+import threading
+import pytest
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import event
+
+# Las pruebas usan SQLite en memoria en lugar de MySQL
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+
+import Backend_Flask_Ejemplo
+from Backend_Flask_Ejemplo import app, db, User, Product, Order, cache_productos
+from riesgo_ordenes import EvaluadorRiesgo
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    cache_productos.invalidar()  # Cada prueba empieza con una base vacía
+
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+        yield client
+        with app.app_context():
+            db.drop_all()
+
+@contextmanager
+def assert_num_consultas(esperadas):
+    """Falla si el bloque ejecuta un número de consultas SQL distinto al esperado (detecta N+1)."""
+    consultas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        consultas.append(statement)
+
+    with app.app_context():
+        motor = db.engine
+    event.listen(motor, 'before_cursor_execute', registrar)
+    try:
+        yield consultas
+    finally:
+        event.remove(motor, 'before_cursor_execute', registrar)
+    assert len(consultas) == esperadas, 'Se esperaban {} consultas y hubo {}:\n{}'.format(
+        esperadas, len(consultas), '\n'.join(consultas))
+
+def crear_usuarios(cantidad):
+    with app.app_context():
+        for i in range(1, cantidad + 1):
+            db.session.add(User(UserID=i, username=f'user{i}', email=f'user{i}@example.com', password='pass'))
+        db.session.commit()
+
+def test_get_users_paginado(client):
+    crear_usuarios(5)
+
+    response = client.get('/users?limit=2')
+    assert response.status_code == 200
+    assert [u['UserID'] for u in response.json] == [1, 2]
+    assert response.headers['X-Next-After'] == '2'
+
+    response = client.get('/users?limit=2&after=4')
+    assert [u['UserID'] for u in response.json] == [5]
+    assert 'X-Next-After' not in response.headers
+
+def test_get_users_limit_invalido(client):
+    response = client.get('/users?limit=0')
+    assert response.status_code == 400
+
+def test_get_users_ndjson(client):
+    crear_usuarios(5)
+
+    response = client.get('/users?format=ndjson&after=1')
+    assert response.mimetype == 'application/x-ndjson'
+    lineas = response.get_data(as_text=True).splitlines()
+    assert len(lineas) == 4
+    assert json.loads(lineas[0])['UserID'] == 2
+
+def test_orders_bulk_reporta_filas_fallidas(client):
+    crear_usuarios(1)
+    client.post('/products/bulk', json=[{'ProductID': 1, 'SellerID': 1, 'ProductName': 'Libro', 'Description': 'Usado', 'Price': '10.50'}])
+
+    cuerpo = '\n'.join([
+        json.dumps({'OrderID': 1, 'BuyerID': 1, 'ProductID': 1, 'Quantity': 2, 'OrderDate': '2024-01-01T10:00:00'}),
+        json.dumps({'OrderID': 1, 'BuyerID': 1, 'ProductID': 1, 'Quantity': 1, 'OrderDate': '2024-01-02T10:00:00'}),
+        json.dumps({'OrderID': 3, 'BuyerID': 1, 'ProductID': 1, 'Quantity': 0, 'OrderDate': '2024-01-03T10:00:00'}),
+        json.dumps({'OrderID': 4, 'BuyerID': 1, 'ProductID': 1, 'Quantity': 5, 'OrderDate': '2024-01-04T10:00:00'}),
+    ])
+    response = client.post('/orders/bulk?chunk_size=2', data=cuerpo, content_type='application/x-ndjson')
+    assert response.status_code == 207
+    assert response.json['inserted'] == 2
+    assert [error['index'] for error in response.json['failed']] == [1, 2]
+    assert [o['OrderID'] for o in client.get('/orders').json] == [1, 4]
+
+def crear_catalogo(vendedores, productos_por_vendedor):
+    crear_usuarios(vendedores)
+    with app.app_context():
+        for vendedor in range(1, vendedores + 1):
+            for i in range(productos_por_vendedor):
+                producto = Product(SellerID=vendedor, ProductName=f'Producto {i}', Description='Demo', Price=10)
+                db.session.add(producto)
+                db.session.flush()
+                db.session.add(Order(BuyerID=1, ProductID=producto.ProductID, Quantity=1, OrderDate=datetime(2024, 1, 1)))
+        db.session.commit()
+
+@pytest.mark.parametrize('vendedores', [2, 6])
+def test_products_expand_seller_sin_n_mas_1(client, vendedores):
+    crear_catalogo(vendedores, 3)
+
+    with assert_num_consultas(1):
+        response = client.get('/products?expand=seller')
+    assert len(response.json) == vendedores * 3
+    assert response.json[0]['Seller']['username'] == 'user1'
+
+@pytest.mark.parametrize('vendedores', [2, 6])
+def test_user_orders_expand_product_sin_n_mas_1(client, vendedores):
+    crear_catalogo(vendedores, 3)
+
+    # Una consulta para verificar el usuario y otra para las órdenes con su producto
+    with assert_num_consultas(2):
+        response = client.get('/users/1/orders?expand=product')
+    assert len(response.json) == vendedores * 3
+    assert response.json[0]['Product']['ProductName'] == 'Producto 0'
+
+def test_user_products_expand_orders_sin_n_mas_1(client):
+    crear_catalogo(2, 4)
+
+    # Usuario + productos + una sola consulta IN (...) para todas las órdenes
+    with assert_num_consultas(3):
+        response = client.get('/users/2/products?expand=orders')
+    assert len(response.json) == 4
+    assert all(len(producto['Orders']) == 1 for producto in response.json)
+
+def test_expand_desconocido(client):
+    assert client.get('/products?expand=password').status_code == 400
+
+def test_products_cache_etag_e_invalidacion(client):
+    crear_catalogo(1, 2)
+
+    primera = client.get('/products')
+    etag = primera.headers['ETag']
+
+    # La segunda lectura sale del cache sin tocar la base de datos
+    with assert_num_consultas(0):
+        segunda = client.get('/products')
+    assert segunda.get_data() == primera.get_data()
+
+    with assert_num_consultas(0):
+        no_modificado = client.get('/products', headers={'If-None-Match': etag})
+    assert no_modificado.status_code == 304
+    assert no_modificado.get_data() == b''
+
+    client.put('/products/1', json={'SellerID': 1, 'ProductName': 'Nuevo', 'Description': 'Demo', 'Price': 12})
+    actualizado = client.get('/products', headers={'If-None-Match': etag})
+    assert actualizado.status_code == 200
+    assert actualizado.json[0]['ProductName'] == 'Nuevo'
+    assert actualizado.headers['ETag'] != etag
+
+def test_metrics_del_pool(client):
+    client.get('/users')
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    engine = response.json['engines'][0]
+    assert engine['engine'] == 'default'
+    assert engine['checkouts'] >= 1
+
+    response = client.get('/metrics?format=prometheus')
+    assert 'sqlalchemy_pool_checkouts{engine="default"}' in response.get_data(as_text=True)
+
+ORDEN = {'OrderID': 1, 'BuyerID': 1, 'ProductID': 1, 'Quantity': 1, 'OrderDate': '2024-01-01T10:00:00',
+         'Location': 'CDMX', 'PaymentMethod': 'Tarjeta', 'Device': 'PC'}
+
+def test_orden_con_riesgo_en_linea(client, monkeypatch):
+    crear_catalogo(1, 1)
+    recibidas = []
+
+    def puntuar(caracteristicas):
+        recibidas.append(caracteristicas)
+        return 'Bajo'
+
+    monkeypatch.setattr(Backend_Flask_Ejemplo, 'evaluador_riesgo', EvaluadorRiesgo(puntuar, limite=1.0))
+    response = client.post('/orders', json=dict(ORDEN, OrderID=100))
+    assert response.status_code == 201
+    assert response.json['RiskLabel'] == 'Bajo'
+    # Sin Category el modelo no recibe la categoría del producto (el nombre va solo como contexto)
+    assert recibidas[0]['producto'] == '' and recibidas[0]['ProductName'] == 'Producto 0'
+    assert recibidas[0]['ubicación'] == 'CDMX'
+    with app.app_context():
+        assert db.session.get(Order, 100).RiskLabel == 'Bajo'
+
+def test_orden_con_categoria_de_producto(client, monkeypatch):
+    crear_catalogo(1, 1)
+    recibidas = []
+    monkeypatch.setattr(Backend_Flask_Ejemplo, 'evaluador_riesgo',
+                        EvaluadorRiesgo(lambda c: recibidas.append(c) or 'Bajo', limite=1.0))
+    client.post('/orders', json=dict(ORDEN, OrderID=100, Category='Electrónica'))
+    assert recibidas[0]['producto'] == 'Electrónica'
+
+def test_actualizar_orden_convierte_la_fecha(client):
+    crear_catalogo(1, 1)
+    client.post('/orders', json=dict(ORDEN, OrderID=100))
+    response = client.put('/orders/100', json=dict(ORDEN, Quantity=3, OrderDate='2024-02-01T08:30:00'))
+    assert response.status_code == 200
+    with app.app_context():
+        orden = db.session.get(Order, 100)
+        assert orden.Quantity == 3 and orden.OrderDate == datetime(2024, 2, 1, 8, 30)
+
+def test_orden_con_modelo_lento_se_evalua_despues(client, monkeypatch):
+    crear_catalogo(1, 1)
+    liberar = threading.Event()
+
+    def puntuar(caracteristicas):
+        liberar.wait(5)
+        return 'Muy alto'
+
+    evaluador = EvaluadorRiesgo(puntuar, limite=0.01)
+    monkeypatch.setattr(Backend_Flask_Ejemplo, 'evaluador_riesgo', evaluador)
+    response = client.post('/orders', json=dict(ORDEN, OrderID=100))
+    # La orden se confirma sin esperar al modelo
+    assert response.status_code == 201
+    assert response.json['RiskLabel'] is None and response.json['RiskPending'] is True
+
+    liberar.set()
+    for _ in range(100):
+        with app.app_context():
+            if db.session.get(Order, 100).RiskLabel is not None:
+                break
+        time.sleep(0.01)
+    with app.app_context():
+        assert db.session.get(Order, 100).RiskLabel == 'Muy alto'
+    assert evaluador.snapshot()['diferidas'] == 1
+
+    response = client.get('/metrics?format=prometheus')
+    assert 'fraud_scoring_diferidas 1' in response.get_data(as_text=True)
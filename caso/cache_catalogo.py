@@ -0,0 +1,140 @@
+# cache_catalogo.py
+# Cache de lectura (read-through) para el catálogo de productos del marketplace.
+#
+# Hay dos niveles:
+#   1. CacheLRU: en memoria del proceso, con capacidad máxima y tiempo de vida (TTL).
+#   2. Un cache compartido opcional entre procesos (Redis, memcached...). Para desarrollo
+#      y pruebas se incluye CacheCompartidoLocal, que imita esa interfaz dentro del proceso.
+#
+# La invalidación no borra llave por llave: cada llave lleva el número de "generación"
+# del catálogo y una escritura solo incrementa ese número, así todas las páginas viejas
+# dejan de ser alcanzables al mismo tiempo en todos los procesos.
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheLRU:
+    """Cache en memoria con política LRU (se descarta lo menos usado) y TTL por entrada."""
+
+    def __init__(self, capacidad=256, ttl=30.0, reloj=time.monotonic):
+        self.capacidad = capacidad
+        self.ttl = ttl
+        self.reloj = reloj
+        self._entradas = OrderedDict()  # clave -> (expira_en, valor)
+        self._candado = threading.Lock()
+
+    def get(self, clave):
+        with self._candado:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return None
+            expira_en, valor = entrada
+            if expira_en <= self.reloj():
+                del self._entradas[clave]
+                return None
+            self._entradas.move_to_end(clave)  # Marca la entrada como usada recientemente
+            return valor
+
+    def set(self, clave, valor, ttl=None):
+        with self._candado:
+            self._entradas[clave] = (self.reloj() + (self.ttl if ttl is None else ttl), valor)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+
+    def clear(self):
+        with self._candado:
+            self._entradas.clear()
+
+    def __len__(self):
+        return len(self._entradas)
+
+
+class CacheCompartidoLocal:
+    """Sustituto local de un cache compartido: misma interfaz get/set/incr que usaría un cliente Redis."""
+
+    def __init__(self, reloj=time.monotonic):
+        self.reloj = reloj
+        self._datos = {}  # clave -> (expira_en o None, valor)
+        self._candado = threading.Lock()
+
+    def get(self, clave):
+        with self._candado:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return None
+            expira_en, valor = entrada
+            if expira_en is not None and expira_en <= self.reloj():
+                del self._datos[clave]
+                return None
+            return valor
+
+    def set(self, clave, valor, ttl=None):
+        with self._candado:
+            self._datos[clave] = (None if ttl is None else self.reloj() + ttl, valor)
+
+    def incr(self, clave):
+        with self._candado:
+            _, valor = self._datos.get(clave, (None, 0))
+            self._datos[clave] = (None, valor + 1)
+            return valor + 1
+
+
+class CacheCatalogo:
+    """Combina el LRU local con el cache compartido opcional y maneja la generación del catálogo.
+
+    Uso:
+        clave = cache.clave('/products?limit=100')  # fija la generación vigente
+        valor = cache.obtener(clave)
+        if valor is None:
+            valor = ...consultar la base de datos...
+            cache.guardar(clave, valor)
+
+    La generación se lee antes de consultar la base de datos; si una escritura ocurre en
+    medio, el valor se guarda bajo la generación anterior y nadie lo vuelve a leer.
+    """
+
+    LLAVE_GENERACION = 'catalogo:generacion'
+
+    def __init__(self, local, compartido=None, ttl=None):
+        self.local = local
+        self.compartido = compartido
+        self.ttl = local.ttl if ttl is None else ttl
+        self._generacion_local = 0
+        self.aciertos = 0
+        self.fallos = 0
+
+    def generacion(self):
+        if self.compartido is not None:
+            return self.compartido.get(self.LLAVE_GENERACION) or 0
+        return self._generacion_local
+
+    def clave(self, clave_base):
+        return 'catalogo:{}:{}'.format(self.generacion(), clave_base)
+
+    def obtener(self, clave):
+        """Busca primero en memoria y después en el cache compartido (rellenando el local)."""
+        valor = self.local.get(clave)
+        if valor is None and self.compartido is not None:
+            valor = self.compartido.get(clave)
+            if valor is not None:
+                self.local.set(clave, valor)
+        if valor is None:
+            self.fallos += 1
+        else:
+            self.aciertos += 1
+        return valor
+
+    def guardar(self, clave, valor):
+        self.local.set(clave, valor)
+        if self.compartido is not None:
+            self.compartido.set(clave, valor, ttl=self.ttl)
+
+    def invalidar(self):
+        """Se llama después de cada escritura confirmada (commit) que modifica el catálogo."""
+        if self.compartido is not None:
+            self.compartido.incr(self.LLAVE_GENERACION)
+        else:
+            self._generacion_local += 1
+        self.local.clear()
@@ -0,0 +1,181 @@
+# metricas_pool.py
+# Configuración del pool de conexiones de SQLAlchemy y métricas para diagnosticarlo.
+#
+# opciones_pool() arma las opciones de create_engine (tamaño, desborde, pre-ping, reciclado)
+# a partir de variables de entorno, y MetricasPool cuenta lo que pasa en el pool:
+# checkouts, tiempo de espera por una conexión, conexiones nuevas, desborde e invalidaciones.
+#
+# Copia compartida: caso/metricas_pool.py y caso7/metricas_pool.py deben ser iguales
+# (lo comprueba Test_Copias.py en la raíz del repositorio).
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+
+class QueuePoolMedido(QueuePool):
+    """QueuePool que mide cuánto espera cada checkout hasta obtener una conexión.
+
+    SQLAlchemy no tiene un evento "antes del checkout", por eso se mide alrededor de _do_get,
+    que es donde el pool se bloquea cuando todas las conexiones están ocupadas.
+    """
+
+    metricas = None
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.metricas is not None:
+                self.metricas.registrar_espera(time.perf_counter() - inicio)
+
+    def recreate(self):
+        # engine.dispose() crea un pool nuevo; las métricas continúan en el nuevo pool
+        nuevo = super().recreate()
+        nuevo.metricas = self.metricas
+        return nuevo
+
+
+def opciones_pool(uri, entorno=None):
+    """Regresa las opciones del pool para create_engine (SQLALCHEMY_ENGINE_OPTIONS).
+
+    Variables de entorno:
+        DB_POOL_SIZE      conexiones que se mantienen abiertas (5)
+        DB_MAX_OVERFLOW   conexiones extra permitidas en picos de carga (10)
+        DB_POOL_TIMEOUT   segundos máximos esperando una conexión libre (30)
+        DB_POOL_RECYCLE   segundos antes de reciclar una conexión; debe ser menor que el
+                          wait_timeout de MySQL para no usar conexiones cerradas (1800)
+        DB_POOL_PRE_PING  1/0, verifica la conexión antes de entregarla (1)
+
+    Para SQLite en memoria regresa {}: Flask-SQLAlchemy ya usa un StaticPool de una sola conexión.
+    """
+    entorno = os.environ if entorno is None else entorno
+    if uri.startswith('sqlite') and (uri in ('sqlite://', 'sqlite:///') or ':memory:' in uri):
+        return {}
+    return {
+        'poolclass': QueuePoolMedido,
+        'pool_size': int(entorno.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(entorno.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': float(entorno.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(entorno.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': entorno.get('DB_POOL_PRE_PING', '1') not in ('0', 'false', 'False'),
+    }
+
+
+class MetricasPool:
+    """Contadores de un pool de conexiones, alimentados por los eventos del pool."""
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.engine = None
+        self.checkouts = 0
+        self.checkins = 0
+        self.conexiones_nuevas = 0
+        self.invalidaciones = 0
+        self.invalidaciones_suaves = 0
+        self.esperas = 0
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+        self.desborde_maximo = 0
+        self._candado = threading.Lock()
+
+    def instrumentar(self, engine):
+        """Registra los eventos en el pool del engine y regresa self."""
+        self.engine = engine
+        if isinstance(engine.pool, QueuePoolMedido):
+            engine.pool.metricas = self
+        event.listen(engine.pool, 'checkout', self._al_checkout)
+        event.listen(engine.pool, 'checkin', self._al_checkin)
+        event.listen(engine.pool, 'connect', self._al_conectar)
+        event.listen(engine.pool, 'invalidate', self._al_invalidar)
+        event.listen(engine.pool, 'soft_invalidate', self._al_invalidar_suave)
+        return self
+
+    @property
+    def pool(self):
+        # Se consulta en cada uso porque engine.dispose() reemplaza el pool
+        return self.engine.pool
+
+    def _al_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._candado:
+            self.checkouts += 1
+            if isinstance(self.pool, QueuePool):
+                self.desborde_maximo = max(self.desborde_maximo, self.pool.overflow())
+
+    def _al_checkin(self, dbapi_connection, connection_record):
+        with self._candado:
+            self.checkins += 1
+
+    def _al_conectar(self, dbapi_connection, connection_record):
+        with self._candado:
+            self.conexiones_nuevas += 1
+
+    def _al_invalidar(self, dbapi_connection, connection_record, exception):
+        with self._candado:
+            self.invalidaciones += 1
+
+    def _al_invalidar_suave(self, dbapi_connection, connection_record, exception):
+        with self._candado:
+            self.invalidaciones_suaves += 1
+
+    def registrar_espera(self, segundos):
+        with self._candado:
+            self.esperas += 1
+            self.espera_total += segundos
+            self.espera_maxima = max(self.espera_maxima, segundos)
+
+    def snapshot(self):
+        """Regresa un diccionario con los contadores y el estado actual del pool."""
+        with self._candado:
+            datos = {
+                'engine': self.nombre,
+                'pool': type(self.pool).__name__,
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'connections_created': self.conexiones_nuevas,
+                'invalidations': self.invalidaciones,
+                'soft_invalidations': self.invalidaciones_suaves,
+                'checkout_wait_count': self.esperas,
+                'checkout_wait_seconds_total': round(self.espera_total, 6),
+                'checkout_wait_seconds_max': round(self.espera_maxima, 6),
+            }
+        if isinstance(self.pool, QueuePool):
+            datos.update({
+                'size': self.pool.size(),
+                'checked_out': self.pool.checkedout(),
+                'checked_in': self.pool.checkedin(),
+                'overflow': self.pool.overflow(),
+                'overflow_max': self.desborde_maximo,
+            })
+        return datos
+
+
+def formato_prometheus(snapshots):
+    """Convierte una lista de snapshot() al formato de texto de Prometheus."""
+    lineas = []
+    campos = [
+        ('checkouts', 'counter', 'Conexiones entregadas por el pool'),
+        ('connections_created', 'counter', 'Conexiones nuevas abiertas contra la base de datos'),
+        ('invalidations', 'counter', 'Conexiones invalidadas (errores de desconexión)'),
+        ('soft_invalidations', 'counter', 'Conexiones marcadas para reciclarse'),
+        ('checkout_wait_seconds_total', 'counter', 'Tiempo total esperando una conexión libre'),
+        ('checkout_wait_count', 'counter', 'Número de esperas medidas'),
+        ('checkout_wait_seconds_max', 'gauge', 'Mayor espera observada por una conexión'),
+        ('size', 'gauge', 'Tamaño configurado del pool'),
+        ('checked_out', 'gauge', 'Conexiones en uso'),
+        ('overflow', 'gauge', 'Conexiones abiertas por encima de pool_size'),
+        ('overflow_max', 'gauge', 'Mayor desborde observado'),
+    ]
+    for campo, tipo, ayuda in campos:
+        nombre = 'sqlalchemy_pool_' + campo
+        valores = [(s['engine'], s[campo]) for s in snapshots if campo in s]
+        if not valores:
+            continue
+        lineas.append('# HELP {} {}'.format(nombre, ayuda))
+        lineas.append('# TYPE {} {}'.format(nombre, tipo))
+        for engine, valor in valores:
+            lineas.append('{}{{engine="{}"}} {}'.format(nombre, engine, valor))
+    return '\n'.join(lineas) + '\n'
@@ -0,0 +1,150 @@
+# riesgo_ordenes.py
+# Evaluación del riesgo de fraude de una orden antes de guardarla.
+#
+# El modelo vive en el servicio de caso9/servicio_fraude.py (POST /score), que lo mantiene
+# cargado en memoria. La orden espera la respuesta a lo más `limite` segundos: si el servicio
+# contesta a tiempo la etiqueta se guarda junto con la orden; si no, la orden se guarda sin
+# etiqueta (RiskLabel NULL) y la evaluación sigue en segundo plano y actualiza la orden cuando
+# termina. Así un modelo lento o caído no se suma a la latencia del checkout.
+import json
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturoAgotado
+
+
+def puntuar_http(url, timeout=2.0):
+    """
+    Regresa una función que evalúa una compra con el servicio de fraude.
+
+    timeout es el tiempo máximo de la llamada HTTP en segundo plano; el tiempo que espera la
+    orden lo controla EvaluadorRiesgo.limite.
+    """
+    def puntuar(caracteristicas):
+        cuerpo = json.dumps(caracteristicas).encode('utf-8')
+        solicitud = urllib.request.Request(url, data=cuerpo, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(solicitud, timeout=timeout) as respuesta:
+            return json.load(respuesta)['riesgo']
+    return puntuar
+
+
+def caracteristicas_orden(data, producto, comprador):
+    """
+    Arma la compra que recibe el modelo a partir de la orden, el comprador y el producto.
+
+    El modelo de fraude usa ubicación, producto, método de pago y dispositivo; los datos del
+    checkout (Location, PaymentMethod, Device) vienen en el JSON de la orden. Los demás campos
+    se envían como contexto y el servicio los ignora si el modelo no los usa.
+
+    `producto` es la categoría con la que se entrenó el modelo (Electrónica, Ropa, ...), no el
+    nombre del producto, y la tabla products no la tiene: se toma de Category en el JSON de la
+    orden. Sin ella se envía vacía y el esquema del modelo la trata como categoría desconocida
+    (todas sus columnas en 0), es decir, el riesgo se calcula sin esa variable. El nombre se
+    envía aparte como contexto (ProductName).
+    """
+    return {
+        'ubicación': data.get('Location', ''),
+        'producto': data.get('Category', ''),
+        'método_pago': data.get('PaymentMethod', ''),
+        'dispositivo': data.get('Device', ''),
+        'BuyerID': comprador.UserID if comprador is not None else data.get('BuyerID'),
+        'ProductID': data.get('ProductID'),
+        'ProductName': producto.ProductName if producto is not None else None,
+        'Quantity': data.get('Quantity'),
+        'Price': float(producto.Price) if producto is not None else None,
+    }
+
+
+class EvaluadorRiesgo:
+    """
+    Evalúa órdenes en un pool de hilos con un tiempo máximo de espera.
+
+    Args:
+        puntuar (callable): Función f(caracteristicas) -> etiqueta de riesgo.
+        limite (float): Segundos que la orden espera la etiqueta.
+        trabajadores (int): Evaluaciones simultáneas.
+        max_pendientes (int): Evaluaciones en curso como máximo; si se llena, las órdenes nuevas
+            se guardan sin evaluar en lugar de acumular trabajo atrasado.
+    """
+
+    def __init__(self, puntuar, limite=0.05, trabajadores=4, max_pendientes=1000):
+        self.puntuar = puntuar
+        self.limite = limite
+        self.max_pendientes = max_pendientes
+        self._pool = ThreadPoolExecutor(trabajadores, thread_name_prefix='riesgo')
+        self._candado = threading.Lock()
+        self.pendientes = 0
+        self.en_linea = 0
+        self.diferidas = 0
+        self.descartadas = 0
+        self.errores = 0
+
+    def evaluar(self, caracteristicas):
+        """
+        Regresa (etiqueta, pendiente). Si la evaluación termina dentro del límite, etiqueta es el
+        riesgo y pendiente es None; si no, etiqueta es None y pendiente es el Future que sigue en
+        curso (se le asigna el guardado con diferir() después de confirmar la orden).
+        """
+        with self._candado:
+            if self.pendientes >= self.max_pendientes:
+                self.descartadas += 1
+                return None, None
+            self.pendientes += 1
+        futuro = self._pool.submit(self.puntuar, caracteristicas)
+        futuro.add_done_callback(self._terminada)
+        try:
+            etiqueta = futuro.result(timeout=self.limite)
+        except FuturoAgotado:
+            with self._candado:
+                self.diferidas += 1
+            return None, futuro
+        except Exception:
+            with self._candado:
+                self.errores += 1
+            return None, None
+        with self._candado:
+            self.en_linea += 1
+        return etiqueta, None
+
+    def diferir(self, pendiente, guardar):
+        """Llama guardar(etiqueta) cuando termine una evaluación que excedió el límite."""
+        def al_terminar(futuro):
+            try:
+                guardar(futuro.result())
+            except Exception:
+                with self._candado:
+                    self.errores += 1
+        pendiente.add_done_callback(al_terminar)
+
+    def _terminada(self, futuro):
+        with self._candado:
+            self.pendientes -= 1
+
+    def snapshot(self):
+        with self._candado:
+            return {
+                'limite_segundos': self.limite,
+                'pendientes': self.pendientes,
+                'en_linea': self.en_linea,
+                'diferidas': self.diferidas,
+                'descartadas': self.descartadas,
+                'errores': self.errores,
+            }
+
+    def formato_prometheus(self):
+        """Convierte snapshot() al formato de texto de Prometheus (se agrega al de metricas_pool)."""
+        datos = self.snapshot()
+        lineas = []
+        campos = [
+            ('en_linea', 'counter', 'Órdenes evaluadas dentro del límite'),
+            ('diferidas', 'counter', 'Órdenes guardadas sin etiqueta que se evalúan en segundo plano'),
+            ('descartadas', 'counter', 'Órdenes guardadas sin evaluar porque había demasiadas pendientes'),
+            ('errores', 'counter', 'Evaluaciones o guardados diferidos que fallaron'),
+            ('pendientes', 'gauge', 'Evaluaciones en curso'),
+            ('limite_segundos', 'gauge', 'Segundos que una orden espera su etiqueta'),
+        ]
+        for campo, tipo, ayuda in campos:
+            nombre = 'fraud_scoring_' + campo
+            lineas.append('# HELP {} {}'.format(nombre, ayuda))
+            lineas.append('# TYPE {} {}'.format(nombre, tipo))
+            lineas.append('{} {}'.format(nombre, datos[campo]))
+        return '\n'.join(lineas) + '\n'
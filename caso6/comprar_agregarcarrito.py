@@ -2,49 +2,48 @@ from kivy.app import App
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.button import Button
 from kivy.uix.label import Label
-from kivy.uix.gridlayout import GridLayout
 from kivy.uix.textinput import TextInput
-import sqlite3
-from kivy.uix.scrollview import ScrollView
+from kivy.uix.spinner import Spinner
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.properties import StringProperty
+from kivy.logger import Logger
 from tabulate import tabulate
 from kivy.graphics import Color, Rectangle
 
+from base_datos import obtener_base
+from esquema_productos import ORDENES, SQL_POR_ID, a_centavos, buscar_productos, formato_precio, migrar
+from trabajo_fondo import EjecutorFondo
+
 # --------------------------- BASE DE DATOS -----------------------------------
+# Una conexión compartida por hilo (WAL y sentencias preparadas): ver base_datos.py
+bd = obtener_base('productos.db')
+# Las consultas corren en este hilo y no en el de la interfaz: ver trabajo_fondo.py
+fondo = EjecutorFondo(nombre='carrito-db')
 
 def conectar_db():
-    """Crea la base de datos y la tabla si no existen"""
-    conn = sqlite3.connect('productos.db')  # Conecta a la base de datos SQLite
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS productos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nombre TEXT,
-            precio REAL
-        )
-    ''')  # Crea la tabla productos si no existe
-    conn.commit()
-    conn.close()  # Cierra la conexión con la base de datos
+    """Crea la base de datos o la actualiza al esquema más reciente (ver esquema_productos.py)"""
+    migrar(bd)  # Precio en centavos enteros, descripcion e índices en nombre y precio
+
+
+PAGINA = 200  # Productos que se leen de SQLite por consulta
+ALTO_FILA = 40  # Alto en pixeles de cada fila de la lista
 
+def obtener_productos(nombre=None, precio_max=None, orden='id', despues_de=None, limite=PAGINA):
+    """Consulta una página de productos; el filtro, el orden y la paginación los resuelve SQLite con sus índices"""
+    return buscar_productos(bd, nombre=nombre, precio_max=precio_max, orden=orden,
+                            despues_de=despues_de, limite=limite)  # (id, nombre, descripcion, centavos)
 
-def obtener_productos():
-    """Consulta todos los productos de la base de datos"""
-    conn = sqlite3.connect('productos.db')
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, nombre, precio FROM productos")  # Obtiene todos los productos
-    productos = cursor.fetchall()
-    conn.close()
-    return productos
 
+def obtener_producto(id_producto):
+    """Consulta un producto por su ID (None si no existe)"""
+    return bd.consultar_uno(SQL_POR_ID, (id_producto,))  # (id, nombre, descripcion, centavos)
 
-def agregar_producto(id_producto):
-    """Agrega un producto al carrito basado en su ID"""
-    conn = sqlite3.connect('productos.db')
-    cursor = conn.cursor()
-    cursor.execute("SELECT nombre, precio FROM productos WHERE id=?", (id_producto,))  # Obtiene el producto por ID
-    producto = cursor.fetchone()
-    if producto:
-        carrito.append((id_producto, producto[0], producto[1]))  # Agrega (ID, nombre, precio) al carrito
-    conn.close()
+
+def agregar_producto(producto):
+    """Agrega al carrito un producto consultado con obtener_producto"""
+    carrito.append((producto[0], producto[1], producto[3]))  # Agrega (ID, nombre, precio en centavos) al carrito
 
 
 def eliminar_producto(id_producto):
@@ -56,11 +55,105 @@ def eliminar_producto(id_producto):
 def calcular_totales():
     """Calcula el total de productos y el pago total"""
     total_productos = len(carrito)
-    total_pago = sum(float(producto[2]) for producto in carrito)  # Convierte el precio a float antes de sumarlo
+    total_pago = sum(producto[2] for producto in carrito)  # Suma exacta en centavos enteros
     return total_productos, total_pago
 
 
 # --------------------------- INTERFAZ GRÁFICA -----------------------------------
+class FilaProducto(RecycleDataViewBehavior, BoxLayout):
+    """Fila de la lista: RecycleView solo crea las filas visibles y les cambia los datos al desplazarse"""
+    id_texto = StringProperty('')
+    nombre = StringProperty('')
+    precio = StringProperty('')
+
+    def __init__(self, **kwargs):
+        super().__init__(orientation='horizontal', **kwargs)
+        for propiedad in ('id_texto', 'nombre', 'precio'):
+            etiqueta = Label()
+            self.bind(**{propiedad: etiqueta.setter('text')})  # Al reutilizar la fila se actualiza el texto
+            self.add_widget(etiqueta)
+
+
+class ListaProductos(RecycleView):
+    """Lista virtualizada: los productos se leen de SQLite por páginas conforme el usuario se desplaza"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        layout = RecycleBoxLayout(orientation='vertical', size_hint_y=None,
+                                  default_size=(None, ALTO_FILA), default_size_hint=(1, None))
+        layout.bind(minimum_height=layout.setter('height'))
+        self.add_widget(layout)
+        self.viewclass = FilaProducto  # Se asigna al layout, así que va después de agregarlo
+        self.filtros = None  # None: se muestran filas fijas (el carrito) y no se pagina
+        self._ultima = None  # Última fila leída: la siguiente página empieza después de ella
+        self._agotada = True
+        self._cargando = False  # Hay una página en camino: no se pide otra al seguir desplazando
+        self.bind(scroll_y=self._al_desplazar)
+
+    def cargar(self, **filtros):
+        """Reinicia la lista con los productos que cumplen los filtros (solo se lee la primera página)"""
+        self._agotada = True  # Mientras se reinicia, volver arriba no debe leer otra página
+        self.data = []
+        self.scroll_y = 1
+        self.filtros = filtros
+        self._ultima = None
+        self._agotada = False
+        self._cargando = False  # La página que venía en camino es de otros filtros y se descarta
+        self.siguiente_pagina()
+
+    def mostrar_filas(self, filas):
+        """Muestra filas (ID, nombre, precio en centavos) que ya están en memoria, como el carrito"""
+        fondo.cancelar('lista')  # Una página de productos en camino ya no se debe mostrar
+        self.filtros = None
+        self._agotada = True
+        self._cargando = False
+        self.data = [self._datos_fila(*fila) for fila in filas]
+        self.scroll_y = 1
+
+    def siguiente_pagina(self):
+        if self._agotada or self._cargando:
+            return
+        self._cargando = True
+        # Canal 'lista': una consulta nueva (otros filtros) reemplaza a la que siga pendiente
+        fondo.enviar(obtener_productos, despues_de=self._ultima, **self.filtros,
+                     al_terminar=self.agregar_pagina, al_fallar=self._fallo_pagina, canal='lista')
+
+    def _fallo_pagina(self, error):
+        self._cargando = False
+        self._agotada = True  # Se deja de pedir páginas; "Filtrar" vuelve a intentar
+        Logger.error('Carrito: no se pudieron leer los productos: %s', error)
+
+    def agregar_pagina(self, filas):
+        """Agrega una página de productos al final sin mover lo que el usuario está viendo"""
+        self._cargando = False
+        if len(filas) < PAGINA:
+            self._agotada = True
+        if not filas:
+            return
+        self._ultima = filas[-1]
+        # scroll_y es relativo al alto total: al crecer la lista se recalcula para conservar la posición
+        desde_arriba = (1 - self.scroll_y) * max(self._sobrante(len(self.data)), 0)
+        self.data.extend([self._datos_fila(fila[0], fila[1], fila[3]) for fila in filas])
+        sobrante = self._sobrante(len(self.data))
+        if sobrante > 0:
+            self.scroll_y = 1 - desde_arriba / sobrante
+        # Si la página no alcanzó a llenar la vista (o el usuario siguió bajando) se pide otra
+        self._al_desplazar(self, self.scroll_y)
+
+    def _sobrante(self, numero_filas):
+        # Alto de la lista que no cabe en la vista
+        return numero_filas * ALTO_FILA - self.height
+
+    def _al_desplazar(self, instance, scroll_y):
+        # scroll_y va de 1 (arriba) a 0 (abajo): se lee otra página cuando falta menos de una vista
+        if not self._agotada and scroll_y * max(self._sobrante(len(self.data)), 0) < self.height:
+            self.siguiente_pagina()
+
+    @staticmethod
+    def _datos_fila(id_producto, nombre, centavos):
+        return {'id_texto': str(id_producto), 'nombre': nombre, 'precio': formato_precio(centavos)}
+
+
 class MainScreen(BoxLayout):
     def __init__(self, **kwargs):
         super().__init__(orientation='vertical', **kwargs)
@@ -72,7 +165,9 @@ class MainScreen(BoxLayout):
             self.rect = Rectangle(size=self.size, pos=self.pos)
         self.bind(size=self.update_rect, pos=self.update_rect)
 
-        conectar_db()  # Asegura que la base de datos esté creada al iniciar la aplicación
+        # Asegura que la base de datos esté creada (y migrada) sin bloquear la ventana al iniciar;
+        # como el pool tiene un solo hilo, la primera página se lee después de la migración
+        fondo.enviar(conectar_db)
         
 
  # ---------------- BOTÓN DEL CHATBOT ----------------
@@ -89,20 +184,28 @@ class MainScreen(BoxLayout):
 
 
         # ---------------- SECCIÓN DE PRODUCTOS DISPONIBLES ----------------
-        self.add_widget(Label(text="PRODUCTOS DISPONIBLES", font_size=24, size_hint_y=0.1, bold=True))  # Título
-        
-        self.product_list = ScrollView()  # Contenedor con desplazamiento para la lista de productos
-        self.grid_layout = GridLayout(cols=3, spacing=5, padding=5, size_hint_y=None)
-        self.grid_layout.bind(minimum_height=self.grid_layout.setter('height'))
-
-        # Agregar encabezado de la tabla
-        self.grid_layout.add_widget(Label(text="ID", size_hint_y=None, height=40, bold=True))  # Encabezado para ID
-        self.grid_layout.add_widget(Label(text="Nombre", size_hint_y=None, height=40, bold=True))  # Encabezado para Nombre
-        self.grid_layout.add_widget(Label(text="Precio", size_hint_y=None, height=40, bold=True))  # Encabezado para Precio
-        
-        self.actualizar_lista_productos()  # Cargar productos al iniciar la aplicación
-        self.product_list.add_widget(self.grid_layout)  # Agregar los productos al contenedor de desplazamiento
+        self.titulo_lista = Label(text="PRODUCTOS DISPONIBLES", font_size=24, size_hint_y=0.1, bold=True)  # Título
+        self.add_widget(self.titulo_lista)
+
+        # Filtros: se aplican en la consulta SQL, no recorriendo la lista en Python
+        filtros_layout = BoxLayout(orientation='horizontal', size_hint_y=None, height=40)
+        self.input_buscar = TextInput(hint_text="Nombre empieza con", multiline=False)
+        self.input_precio_max = TextInput(hint_text="Precio máximo", multiline=False)
+        self.spinner_orden = Spinner(text='id', values=tuple(ORDENES), size_hint_x=0.6)
+        self.btn_filtrar = Button(text="Filtrar", size_hint_x=0.6, on_press=self.filtrar_productos)
+        for widget in (self.input_buscar, self.input_precio_max, self.spinner_orden, self.btn_filtrar):
+            filtros_layout.add_widget(widget)
+        self.add_widget(filtros_layout)
+
+        # Encabezado de la tabla (fijo, fuera de la lista que se desplaza)
+        encabezado = BoxLayout(orientation='horizontal', size_hint_y=None, height=ALTO_FILA)
+        for texto in ("ID", "Nombre", "Precio"):
+            encabezado.add_widget(Label(text=texto, bold=True))
+        self.add_widget(encabezado)
+
+        self.product_list = ListaProductos()  # Lista virtualizada: solo existen los widgets de las filas visibles
         self.add_widget(self.product_list)  # Agregar el contenedor de productos a la interfaz
+        self.actualizar_lista_productos()  # Cargar productos al iniciar la aplicación
 
         # ---------------- SECCIÓN DE ACCIONES ----------------
         self.input_id = TextInput(hint_text="ID del Producto", size_hint_y=None, height=40)  # Campo de texto para capturar ID del producto
@@ -131,28 +234,34 @@ class MainScreen(BoxLayout):
 
     def actualizar_lista_productos(self):
         """Refresca la lista de productos en pantalla"""
-        self.grid_layout.clear_widgets()  # Borra los productos actuales de la vista
-        
-        # Agregar encabezado de la tabla nuevamente
-        self.grid_layout.add_widget(Label(text="ID", size_hint_y=None, height=40, bold=True))  # Encabezado para ID
-        self.grid_layout.add_widget(Label(text="Nombre", size_hint_y=None, height=40, bold=True))  # Encabezado para Nombre
-        self.grid_layout.add_widget(Label(text="Precio", size_hint_y=None, height=40, bold=True))  # Encabezado para Precio
-        
-        productos = obtener_productos()  # Obtiene la lista actualizada de productos
+        self.product_list.cargar(**self.filtros())  # Lee la primera página; las demás se leen al desplazarse
+
+    def filtros(self):
+        """Lee los filtros de la interfaz; un precio máximo inválido se ignora"""
+        try:
+            precio_max = a_centavos(self.input_precio_max.text) if self.input_precio_max.text.strip() else None
+        except ValueError:
+            precio_max = None
+        return {'nombre': self.input_buscar.text.strip() or None, 'precio_max': precio_max,
+                'orden': self.spinner_orden.text}
 
-        for producto in productos:
-            # Agregar un nuevo producto al listado
-            self.grid_layout.add_widget(Label(text=str(producto[0]), size_hint_y=None, height=40))  # ID del producto
-            self.grid_layout.add_widget(Label(text=producto[1], size_hint_y=None, height=40))  # Nombre del producto
-            self.grid_layout.add_widget(Label(text=f"${float(producto[2]):.2f}", size_hint_y=None, height=40))  # Precio formateado a 2 decimales
+    def filtrar_productos(self, instance):
+        """Vuelve a consultar los productos con los filtros actuales"""
+        self.actualizar_lista_productos()
 
     def agregar_producto(self, instance):
         """Lógica para agregar productos desde la interfaz"""
         id_producto = self.input_id.text.strip()
         
         if id_producto.isdigit():
-            agregar_producto(int(id_producto))  # Agrega el producto al carrito
+            # La consulta corre en segundo plano; el carrito se modifica al recibir el producto
+            fondo.enviar(obtener_producto, int(id_producto), al_terminar=self.producto_obtenido)
             self.input_id.text = ""  # Limpia el campo de entrada
+
+    def producto_obtenido(self, producto):
+        """Recibe en el hilo de la interfaz el producto consultado para darlo de alta"""
+        if producto:
+            agregar_producto(producto)  # Agrega el producto al carrito
             self.actualizar_totales()
 
     def eliminar_producto(self, instance):
@@ -167,33 +276,17 @@ class MainScreen(BoxLayout):
     def actualizar_totales(self):
         """Actualiza los totales en la interfaz"""
         total_productos, total_pago = calcular_totales()
-        self.total_label.text = f"Total productos: {total_productos} | Total pago: ${total_pago:.2f}"
+        self.total_label.text = f"Total productos: {total_productos} | Total pago: {formato_precio(total_pago)}"
 
     def consultar_carrito(self, instance):
-        """Limpia los productos disponibles y muestra los productos agregados al carrito"""
-        self.grid_layout.clear_widgets()  # Limpiar la vista de productos disponibles
-        
-        # Mostrar título para productos en carrito
-        self.add_widget(Label(text="PRODUCTOS AGREGADOS AL CARRITO DE COMPRA", font_size=24, size_hint_y=None, height=40, bold=True))
-        
-        # Agregar encabezados para la tabla
-        self.grid_layout.add_widget(Label(text="ID", size_hint_y=None, height=40, bold=True))  # Encabezado para ID
-        self.grid_layout.add_widget(Label(text="Nombre", size_hint_y=None, height=40, bold=True))  # Encabezado para Nombre
-        self.grid_layout.add_widget(Label(text="Precio", size_hint_y=None, height=40, bold=True))  # Encabezado para Precio
-
-        # Mostrar productos del carrito con formato bonito
-        for producto in carrito:
-            self.grid_layout.add_widget(Label(text=str(producto[0]), size_hint_y=None, height=40))  # ID del producto
-            self.grid_layout.add_widget(Label(text=producto[1], size_hint_y=None, height=40))  # Nombre del producto
-            self.grid_layout.add_widget(Label(text=f"${float(producto[2]):.2f}", size_hint_y=None, height=40))  # Precio del producto
-        
+        """Muestra los productos agregados al carrito en lugar de los productos disponibles"""
+        self.titulo_lista.text = "PRODUCTOS AGREGADOS AL CARRITO DE COMPRA"  # Título para productos en carrito
+        self.product_list.mostrar_filas(carrito)  # (ID, nombre, precio en centavos)
         self.actualizar_totales()
 
     def mostrar_productos_disponibles(self, instance):
         """Muestra la lista de productos disponibles nuevamente"""
-        self.grid_layout.clear_widgets()  # Limpiar vista actual
-        
-        self.add_widget(Label(text="PRODUCTOS DISPONIBLES", font_size=24, size_hint_y=0.1, bold=True))  # Título
+        self.titulo_lista.text = "PRODUCTOS DISPONIBLES"  # Título
         self.actualizar_lista_productos()  # Mostrar productos disponibles nuevamente
 
     def open_chatbot(self, instance):
@@ -207,6 +300,10 @@ class MyApp(App):
         self.title = "CARRITO DE COMPRAS EN LINEA"  # Cambiar el título de la ventana
         return MainScreen()  # Devuelve la pantalla principal
 
+    def on_stop(self):
+        fondo.cerrar()  # Espera a la consulta en curso antes de cerrar las conexiones
+        bd.cerrar()  # Al cerrar la última conexión SQLite vacía el WAL en productos.db
+
 if __name__ == '__main__':
     carrito = []  # Lista para almacenar los productos agregados
     MyApp().run()  # Ejecuta la aplicación
\ No newline at end of file
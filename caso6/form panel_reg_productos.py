@@ -3,22 +3,14 @@ from kivy.uix.boxlayout import BoxLayout  # Importa el diseño de caja para orga
 from kivy.uix.button import Button  # Importa la clase Button para agregar botones
 from kivy.uix.label import Label  # Importa la clase Label para mostrar texto
 from kivy.uix.textinput import TextInput  # Importa la clase TextInput para ingresar texto
-import sqlite3  # Importa la librería SQLite para gestionar la base de datos
+from base_datos import obtener_base  # Conexión SQLite compartida (WAL y sentencias preparadas)
+from esquema_productos import SQL_INSERTAR, a_centavos, buscar_productos, formato_precio, migrar  # Esquema de productos
 
-# Conectar a la base de datos SQLite y crear la tabla si no existe
+bd = obtener_base('productos.db')
+
+# Crear la tabla si no existe o actualizarla al esquema más reciente (ver esquema_productos.py)
 def init_db():
-    conn = sqlite3.connect('productos.db')  # Crea o abre la base de datos llamada 'productos.db'
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS productos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,  
-            nombre TEXT,  
-            descripcion TEXT,  
-            precio TEXT 
-        )
-    ''')
-    conn.commit()  # Guarda los cambios
-    conn.close()  # Cierra la conexión con la base de datos
+    migrar(bd)  # Precio en centavos enteros, descripcion e índices en nombre y precio
 
 class ProductPanel(BoxLayout):
     def __init__(self, **kwargs):
@@ -60,11 +52,12 @@ class ProductPanel(BoxLayout):
         price = self.product_price.text  # Obtiene el precio del producto
         
         if name and description and price:  # Verifica que todos los campos estén completos
-            conn = sqlite3.connect('productos.db')  # Conecta a la base de datos
-            cursor = conn.cursor()
-            cursor.execute("INSERT INTO productos (nombre, descripcion, precio) VALUES (?, ?, ?)", (name, description, price))
-            conn.commit()  # Guarda los cambios
-            conn.close()  # Cierra la conexión
+            try:
+                centavos = a_centavos(price)  # El precio se guarda como entero en centavos
+            except ValueError:
+                self.product_list_label.text = 'El precio debe ser numérico.'
+                return
+            bd.ejecutar(SQL_INSERTAR, (name, description, centavos))  # Se confirma al ejecutarse
             
             # Limpia los campos de entrada
             self.product_name.text = ''
@@ -77,14 +70,10 @@ class ProductPanel(BoxLayout):
     
     def show_products(self, instance):
         """Muestra la lista de productos guardados en la base de datos."""
-        conn = sqlite3.connect('productos.db')  # Conecta a la base de datos
-        cursor = conn.cursor()
-        cursor.execute("SELECT nombre, descripcion, precio FROM productos")  # Obtiene todos los productos
-        productos = cursor.fetchall()  # Recupera los datos
-        conn.close()  # Cierra la conexión
+        productos = buscar_productos(bd)  # Obtiene todos los productos (id, nombre, descripcion, centavos)
         
         if productos:  # Si hay productos guardados, los muestra
-            productos_texto = '\n'.join([f"{p[0]} - {p[1]} - ${p[2]}" for p in productos])  # Formatea la lista de productos
+            productos_texto = '\n'.join([f"{p[1]} - {p[2]} - {formato_precio(p[3])}" for p in productos])  # Formatea la lista de productos
             self.product_list_label.text = productos_texto  # Muestra los productos en la etiqueta
         else:
             self.product_list_label.text = 'No hay productos guardados aún.'  # Mensaje si no hay productos
@@ -94,6 +83,9 @@ class ProductApp(App):
         """Construye la aplicación con el panel de productos."""
         return ProductPanel()
 
+    def on_stop(self):
+        bd.cerrar()  # Al cerrar la última conexión SQLite vacía el WAL en productos.db
+
 if __name__ == '__main__':
     init_db()  # Inicializa la base de datos
     ProductApp().run()  # Inicia la aplicación Kivy
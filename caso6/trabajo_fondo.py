@@ -0,0 +1,99 @@
+# trabajo_fondo.py
+# Ejecuta en un hilo aparte el trabajo lento de las pantallas Kivy (consultas a SQLite, guardado,
+# predicciones del modelo) y entrega el resultado de vuelta en el hilo principal.
+#
+# Kivy dibuja y atiende los eventos en un solo hilo: si un botón espera al disco o al modelo, la
+# ventana se congela hasta que termina. Con EjecutorFondo el botón solo encola el trabajo; cuando
+# termina, Clock.schedule_once llama al_terminar(resultado) en el hilo principal, que es el único
+# que puede modificar widgets.
+#
+# Las solicitudes de un mismo `canal` se reemplazan: si el usuario vuelve a filtrar antes de que
+# termine la consulta anterior, esa consulta se cancela (si aún no empezaba) o su resultado se
+# descarta, así la pantalla nunca muestra datos de una solicitud vieja. Las solicitudes sin canal
+# (los guardados) nunca se descartan: al cerrar la aplicación se espera a que terminen todas.
+#
+# Copia compartida: caso6/trabajo_fondo.py y caso9/trabajo_fondo.py deben ser iguales
+# (lo comprueba Test_Copias.py en la raíz del repositorio).
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from kivy.clock import Clock
+from kivy.logger import Logger
+
+
+def _registrar_error(error):
+    Logger.error('TrabajoFondo: %s: %s', type(error).__name__, error)
+
+
+class EjecutorFondo:
+    """
+    Cola de trabajo en segundo plano con entrega de resultados en el hilo de Kivy.
+
+    Args:
+        trabajadores (int): Hilos del pool. Con 1 las solicitudes se ejecutan en el orden en que
+            se enviaron (un guardado siempre termina antes de la consulta que lo sigue).
+        nombre (str): Prefijo del nombre de los hilos.
+    """
+
+    def __init__(self, trabajadores=1, nombre='fondo'):
+        self._pool = ThreadPoolExecutor(trabajadores, thread_name_prefix=nombre)
+        self._candado = threading.Lock()
+        self._vigentes = {}  # canal -> Future de la solicitud más reciente
+
+    def enviar(self, funcion, *args, al_terminar=None, al_fallar=_registrar_error, canal=None, **kwargs):
+        """
+        Ejecuta funcion(*args, **kwargs) en segundo plano.
+
+        Args:
+            funcion (callable): Trabajo a ejecutar; no debe tocar widgets.
+            al_terminar (callable): Se llama con el resultado en el hilo principal.
+            al_fallar (callable): Se llama con la excepción en el hilo principal.
+            canal (str): Si se indica, esta solicitud reemplaza a la anterior del mismo canal.
+
+        Returns:
+            Future: La solicitud en curso.
+        """
+        futuro = self._pool.submit(funcion, *args, **kwargs)
+        if canal is not None:
+            with self._candado:
+                anterior = self._vigentes.get(canal)
+                self._vigentes[canal] = futuro
+            if anterior is not None:
+                anterior.cancel()  # Solo tiene efecto si todavía no empezaba
+        # El callback corre en el hilo del pool: únicamente agenda la entrega para el siguiente cuadro
+        futuro.add_done_callback(
+            lambda f: Clock.schedule_once(lambda dt: self._entregar(f, canal, al_terminar, al_fallar)))
+        return futuro
+
+    def cancelar(self, canal):
+        """Cancela la solicitud pendiente de un canal; si ya está corriendo, su resultado se descarta."""
+        with self._candado:
+            futuro = self._vigentes.pop(canal, None)
+        if futuro is not None:
+            futuro.cancel()
+
+    def _entregar(self, futuro, canal, al_terminar, al_fallar):
+        if futuro.cancelled():
+            return
+        if canal is not None:
+            with self._candado:
+                if self._vigentes.get(canal) is not futuro:
+                    return  # Otra solicitud del mismo canal la reemplazó
+                del self._vigentes[canal]
+        error = futuro.exception()
+        if error is not None:
+            if al_fallar is not None:
+                al_fallar(error)
+        elif al_terminar is not None:
+            al_terminar(futuro.result())
+
+    def cerrar(self):
+        """
+        Cancela las consultas pendientes de los canales y espera a que terminen los guardados
+        encolados y lo que ya está corriendo.
+        """
+        with self._candado:
+            pendientes, self._vigentes = list(self._vigentes.values()), {}
+        for futuro in pendientes:
+            futuro.cancel()
+        self._pool.shutdown(wait=True)
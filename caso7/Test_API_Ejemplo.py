@@ -1,11 +1,16 @@
+import os
 import pytest
+
+# El engine se crea al importar app.py: la base de pruebas se indica antes, así las pruebas no
+# escriben en instance/site.db
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+
 from app import app, db
 from models import User
 
 @pytest.fixture
 def client():
     app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
     app.config['WTF_CSRF_ENABLED'] = False  # Deshabilitar CSRF para testing
 
     with app.test_client() as client:
@@ -22,4 +27,10 @@ def test_create_user(client):
         'password': 'testpass'
     })
     assert response.status_code == 201
-    assert response.json['message'] == 'Usuario creado con éxito'
\ No newline at end of file
+    assert response.json['message'] == 'Usuario creado con éxito'
+
+def test_metrics(client):
+    client.get('/users')
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.json['engines'][0]['checkouts'] >= 1
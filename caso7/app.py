@@ -1,16 +1,28 @@
 # app.py
+import os
+
 from flask import Flask
 from flask import jsonify
+from flask import request, Response
 from models import db  # Ahora importamos db desde models
 from models import User  # Esta importación ahora es segura
+from metricas_pool import MetricasPool, opciones_pool, formato_prometheus
 
 app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///site.db'
+# La variable de entorno DATABASE_URL permite apuntar a otra base (por ejemplo en las pruebas)
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///site.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Configuración del pool de conexiones (variables DB_POOL_* en metricas_pool.py)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = opciones_pool(app.config['SQLALCHEMY_DATABASE_URI'])
 
 # Inicializamos db con la aplicación
 db.init_app(app)
 
+# Métricas del pool de cada engine, expuestas en /metrics
+with app.app_context():
+    metricas_pool = {nombre or 'default': MetricasPool(nombre or 'default').instrumentar(engine)
+                     for nombre, engine in db.engines.items()}
+
 # Importar los modelos al final para evitar circular imports
 from models import User
 
@@ -49,5 +61,13 @@ def get_users():
             
     return jsonify({'users': users_list, 'count': len(users_list)}), 200
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    # JSON por defecto; formato de texto de Prometheus con ?format=prometheus o Accept: text/plain
+    snapshots = [metricas.snapshot() for metricas in metricas_pool.values()]
+    if request.args.get('format') == 'prometheus' or 'text/plain' in request.headers.get('Accept', ''):
+        return Response(formato_prometheus(snapshots), mimetype='text/plain; version=0.0.4')
+    return jsonify({'engines': snapshots}), 200
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,106 @@
+# Test_Almacen_Muestras.py
+#   python -m pytest -q Test_Almacen_Muestras.py
+import pytest
+
+from almacen_muestras import DIA, HORA, MINUTO, AlmacenMuestras
+
+URL = 'http://ejemplo'
+INICIO = 400000 * HORA  # Alineado a la hora
+
+
+@pytest.fixture
+def almacen(tmp_path):
+    almacen = AlmacenMuestras(str(tmp_path / 'monitoreo.db'), tam_lote=10)
+    yield almacen
+    almacen.cerrar()
+
+
+def llenar(almacen, horas=2):
+    """Una muestra cada 10 s; una de cada 30 es un 503 y una de cada 60 no tuvo respuesta."""
+    for i in range(horas * HORA // 10):
+        if i % 60 == 0:
+            almacen.agregar(INICIO + i * 10, URL, None, None)
+        elif i % 30 == 0:
+            almacen.agregar(INICIO + i * 10, URL, 503, 0.5)
+        else:
+            almacen.agregar(INICIO + i * 10, URL, 200, 0.1)
+
+
+def test_agregar_no_escribe_hasta_vaciar(almacen):
+    almacen.agregar(INICIO, URL, 200, 0.1)
+    assert almacen.conn.execute('SELECT COUNT(*) FROM muestras').fetchone()[0] == 0
+    assert almacen.vaciar() == 1
+    assert almacen.vaciar() == 0
+    assert almacen.consultar_muestras(URL, INICIO, INICIO + 1) == [(INICIO, 200, 0.1)]
+
+
+def test_lote_lleno_despierta(almacen):
+    assert not almacen.esperar_lote(0)
+    for i in range(10):
+        almacen.agregar(INICIO + i, URL, 200, 0.1)
+    assert almacen.esperar_lote(0)
+
+
+def test_compactar_por_minuto_y_por_hora(almacen):
+    llenar(almacen)
+    almacen.compactar(ahora=INICIO + 3 * HORA)
+
+    minutos = almacen.consultar_agregados(URL, INICIO, INICIO + 2 * HORA, resolucion=MINUTO)
+    assert len(minutos) == 120
+    assert all(cubeta['solicitudes'] == 6 for cubeta in minutos)
+    # Cada minuto par tiene una muestra sin respuesta y uno de cada dos minutos un 503
+    assert minutos[0]['errores'] == 1 and minutos[0]['promedio'] == pytest.approx(0.1)
+    assert minutos[1]['errores'] == 0
+    assert minutos[5]['errores'] == 1 and minutos[5]['maximo'] == 0.5
+
+    horas = almacen.consultar_agregados(URL, INICIO, INICIO + 2 * HORA, resolucion=HORA)
+    assert [cubeta['inicio'] for cubeta in horas] == [INICIO, INICIO + HORA]
+    assert all(cubeta['solicitudes'] == 360 for cubeta in horas)
+    assert sum(cubeta['errores'] for cubeta in horas) == sum(cubeta['errores'] for cubeta in minutos)
+    assert horas[0]['minimo'] == 0.1 and horas[0]['maximo'] == 0.5
+
+
+def test_compactar_dos_veces_no_duplica(almacen):
+    llenar(almacen, horas=1)
+    almacen.compactar(ahora=INICIO + 30 * MINUTO)
+    almacen.compactar(ahora=INICIO + 30 * MINUTO)
+    almacen.compactar(ahora=INICIO + 2 * HORA)
+    minutos = almacen.consultar_agregados(URL, INICIO, INICIO + HORA, resolucion=MINUTO)
+    assert sum(cubeta['solicitudes'] for cubeta in minutos) == 360
+    horas = almacen.consultar_agregados(URL, INICIO, INICIO + HORA, resolucion=HORA)
+    assert [cubeta['solicitudes'] for cubeta in horas] == [360]
+
+
+def test_consulta_igual_antes_y_despues_de_compactar(almacen):
+    llenar(almacen)
+    antes = almacen.consultar_agregados(URL, INICIO, INICIO + 2 * HORA, resolucion=MINUTO)
+    # Solo la primera hora queda compactada; el resto se calcula al vuelo desde las crudas
+    almacen.compactar(ahora=INICIO + HORA + MINUTO)
+    despues = almacen.consultar_agregados(URL, INICIO, INICIO + 2 * HORA, resolucion=MINUTO)
+    assert despues == antes
+
+
+def test_retencion(tmp_path):
+    almacen = AlmacenMuestras(str(tmp_path / 'monitoreo.db'), retencion={0: HORA, MINUTO: DIA})
+    llenar(almacen)
+    ahora = INICIO + 3 * HORA
+    almacen.compactar(ahora=ahora)
+
+    # Las crudas de más de una hora se borran (ya quedaron agregadas); los agregados se conservan
+    assert almacen.consultar_muestras(URL, INICIO, ahora) == []
+    assert len(almacen.consultar_agregados(URL, INICIO, INICIO + 2 * HORA, resolucion=MINUTO)) == 120
+
+    # Un día después vencen los agregados por minuto, pero no los de hora (365 días)
+    almacen.compactar(ahora=ahora + DIA)
+    assert almacen.consultar_agregados(URL, INICIO, INICIO + 2 * HORA, resolucion=MINUTO) == []
+    assert len(almacen.consultar_agregados(URL, INICIO, INICIO + 2 * HORA, resolucion=HORA)) == 2
+    almacen.cerrar()
+
+
+def test_retencion_no_borra_crudas_sin_agregar(tmp_path):
+    almacen = AlmacenMuestras(str(tmp_path / 'monitoreo.db'), retencion={0: MINUTO})
+    llenar(almacen, horas=1)
+    # El nivel por hora aún no cierra su primera cubeta: las crudas se conservan para agregarlas
+    almacen.compactar(ahora=INICIO + 30 * MINUTO)
+    assert len(almacen.consultar_muestras(URL, INICIO, INICIO + HORA)) == 360
+    almacen.cerrar()
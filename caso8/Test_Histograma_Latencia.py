@@ -0,0 +1,123 @@
+# Test_Histograma_Latencia.py
+#   python -m pytest -q Test_Histograma_Latencia.py
+import math
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from histograma_latencia import HistogramaLatencia, MonitorPercentiles, ReglaAlerta, VentanaDeslizante
+
+
+class RelojFalso:
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def __call__(self):
+        return self.ahora
+
+
+def percentil_exacto(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[max(1, math.ceil(len(ordenados) * p / 100.0)) - 1]
+
+
+@pytest.mark.parametrize("p", [50, 90, 95, 99, 99.9])
+def test_percentiles_con_error_relativo_acotado(p):
+    azar = random.Random(7)
+    valores = [azar.lognormvariate(-3, 1) for _ in range(20000)]
+    histograma = HistogramaLatencia()
+    for valor in valores:
+        histograma.registrar(valor)
+
+    exacto = percentil_exacto(valores, p)
+    assert histograma.percentil(p) == pytest.approx(exacto, rel=0.02)
+    assert histograma.cuenta == len(valores)
+    assert histograma.suma == pytest.approx(sum(valores))
+    assert histograma.maximo == max(valores)
+
+
+def test_percentil_sin_muestras_y_valores_extremos():
+    histograma = HistogramaLatencia()
+    assert histograma.percentil(50) is None
+
+    histograma.registrar(0.0)
+    histograma.registrar(1000.0)
+    # Fuera del rango caen en la primera y la última cubeta; nunca se pasa del máximo observado
+    assert histograma.percentil(50) <= HistogramaLatencia.MINIMO * HistogramaLatencia.FACTOR
+    assert histograma.percentil(100) <= 1000.0
+    assert len(histograma.cubetas) == 2
+
+
+def test_cubetas_acotadas():
+    histograma = HistogramaLatencia()
+    for i in range(100000):
+        histograma.registrar(i / 1000.0)
+    assert len(histograma.cubetas) <= HistogramaLatencia.ULTIMA_CUBETA + 1
+
+
+def test_ventana_descarta_tramos_vencidos():
+    reloj = RelojFalso()
+    ventana = VentanaDeslizante(ancho=60.0, tramos=12, reloj=reloj)
+    for _ in range(10):
+        ventana.registrar(1.0, error=True)
+
+    reloj.ahora += 30
+    for _ in range(5):
+        ventana.registrar(0.01)
+    histograma, total, errores = ventana.resumen()
+    assert (total, errores, histograma.cuenta) == (15, 10, 15)
+
+    # Las primeras muestras salen de la ventana; las de hace 30 s siguen
+    reloj.ahora += 31
+    histograma, total, errores = ventana.resumen()
+    assert (total, errores) == (5, 0)
+    assert histograma.maximo == 0.01
+
+    reloj.ahora += 60
+    histograma, total, errores = ventana.resumen()
+    assert (total, errores) == (0, 0)
+    assert histograma.percentil(99) is None
+
+
+def test_regla_requiere_minimo_de_muestras():
+    with pytest.raises(ValueError):
+        ReglaAlerta('p75', 1.0)
+    regla = ReglaAlerta('error_rate', 0.5, min_muestras=4)
+    assert regla.valor(HistogramaLatencia(), 3, 3) is None
+    assert regla.valor(HistogramaLatencia(), 4, 3) == 0.75
+
+
+def test_alerta_se_dispara_una_vez_y_se_resuelve_al_vencer():
+    reloj = RelojFalso()
+    monitor = MonitorPercentiles(ancho_ventana=60.0, tramos=6, reloj=reloj)
+    objetivo = SimpleNamespace(url='http://ejemplo')
+    monitor.configurar(objetivo.url, [ReglaAlerta('p95', 0.5, min_muestras=5)])
+
+    for _ in range(10):
+        monitor.registrar_muestra(objetivo, 200, 2.0)
+    eventos = monitor.evaluar()
+    assert [(estado, regla.metrica) for estado, _, regla, _ in eventos] == [('ALERTA', 'p95')]
+    assert monitor.evaluar() == []  # Sigue activa: no se repite
+
+    # Las muestras lentas salen de la ventana y llegan rápidas
+    reloj.ahora += 61
+    for _ in range(10):
+        monitor.registrar_muestra(objetivo, 200, 0.05)
+    eventos = monitor.evaluar()
+    assert [estado for estado, _, _, _ in eventos] == ['RESUELTA']
+    assert monitor.snapshot()[objetivo.url]['p95'] == pytest.approx(0.05, rel=0.02)
+
+
+def test_errores_y_exportacion():
+    monitor = MonitorPercentiles(reloj=RelojFalso())
+    objetivo = SimpleNamespace(url='http://ejemplo')
+    monitor.registrar_muestra(objetivo, 200, 0.1)
+    monitor.registrar_muestra(objetivo, 503, 0.2)
+    monitor.registrar_muestra(objetivo, None, None)
+
+    datos = monitor.snapshot()[objetivo.url]
+    assert (datos['solicitudes'], datos['errores']) == (3, 2)
+    texto = monitor.formato_prometheus()
+    assert 'monitor_response_seconds_count{url="http://ejemplo"} 2' in texto
+    assert 'monitor_window_errors{url="http://ejemplo"} 2' in texto
@@ -0,0 +1,122 @@
+# Test_Monitoreo.py
+# Las pruebas levantan un servidor aiohttp local en un puerto libre.
+#   python -m pytest -q Test_Monitoreo.py
+import asyncio
+import socket
+
+import aiohttp
+from aiohttp import web
+
+from almacen_muestras import AlmacenMuestras
+from histograma_latencia import MonitorPercentiles
+from monitoreoapp import Objetivo, monitor_performance, vigilar
+
+
+async def iniciar_servidor():
+    """Servidor con /ok (200) y /falla (500); regresa (runner, url base)."""
+    async def ok(request):
+        return web.Response(text='ok')
+
+    async def falla(request):
+        return web.Response(status=500)
+
+    aplicacion = web.Application()
+    aplicacion.router.add_get('/ok', ok)
+    aplicacion.router.add_get('/falla', falla)
+    runner = web.AppRunner(aplicacion)
+    await runner.setup()
+    sitio = web.TCPSite(runner, '127.0.0.1', 0)
+    await sitio.start()
+    puerto = sitio._server.sockets[0].getsockname()[1]
+    return runner, 'http://127.0.0.1:{}'.format(puerto)
+
+
+def puerto_cerrado():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+async def vigilar_durante(objetivo, observadores, segundos):
+    async with aiohttp.ClientSession() as sesion:
+        try:
+            await asyncio.wait_for(vigilar(sesion, objetivo, observadores), segundos)
+        except asyncio.TimeoutError:
+            pass
+
+
+def test_reglas_por_omision():
+    reglas = Objetivo('http://ejemplo', threshold=1.5).reglas_alerta()
+    assert [(regla.metrica, regla.umbral) for regla in reglas] == [('p95', 1.5), ('error_rate', 0.05)]
+    reglas = Objetivo('http://ejemplo', reglas=[{'metrica': 'p99', 'umbral': 3.0}]).reglas_alerta()
+    assert [(regla.metrica, regla.umbral) for regla in reglas] == [('p99', 3.0)]
+
+
+def test_vigilar_registra_muestras():
+    async def probar():
+        runner, base = await iniciar_servidor()
+        muestras = []
+        try:
+            await vigilar_durante(Objetivo(base + '/ok', intervalo=0.05),
+                                  [lambda objetivo, status, tiempo: muestras.append((status, tiempo))], 0.3)
+            await vigilar_durante(Objetivo(base + '/falla', intervalo=0.05),
+                                  [lambda objetivo, status, tiempo: muestras.append((status, tiempo))], 0.1)
+        finally:
+            await runner.cleanup()
+        return muestras
+
+    muestras = asyncio.run(probar())
+    estados = [status for status, _ in muestras]
+    assert estados.count(200) >= 3 and 500 in estados
+    assert all(tiempo > 0 for _, tiempo in muestras)
+
+
+def test_sin_respuesta_se_registra_como_none():
+    muestras = []
+    objetivo = Objetivo('http://127.0.0.1:{}/'.format(puerto_cerrado()), intervalo=0.05, timeout=1.0)
+    asyncio.run(vigilar_durante(objetivo, [lambda o, status, tiempo: muestras.append((status, tiempo))], 0.2))
+    assert muestras and set(muestras) == {(None, None)}
+
+
+def test_observador_con_errores_no_detiene_a_los_demas(caplog):
+    async def probar():
+        runner, base = await iniciar_servidor()
+        muestras = []
+
+        def roto(objetivo, status, tiempo):
+            raise RuntimeError('observador roto')
+
+        try:
+            await vigilar_durante(Objetivo(base + '/ok', intervalo=0.05),
+                                  [roto, lambda objetivo, status, tiempo: muestras.append(status)], 0.3)
+        finally:
+            await runner.cleanup()
+        return muestras
+
+    muestras = asyncio.run(probar())
+    assert len(muestras) >= 3
+    assert 'observador roto' in caplog.text
+
+
+def test_monitor_alimenta_percentiles_y_almacen(tmp_path):
+    almacen = AlmacenMuestras(str(tmp_path / 'monitoreo.db'))
+    percentiles = MonitorPercentiles()
+
+    async def probar():
+        runner, base = await iniciar_servidor()
+        try:
+            await asyncio.wait_for(
+                monitor_performance([Objetivo(base + '/ok', intervalo=0.05)], percentiles=percentiles,
+                                    cada=0.1, almacen=almacen), 0.5)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            await runner.cleanup()
+        return base + '/ok'
+
+    url = asyncio.run(probar())
+    datos = percentiles.snapshot()[url]
+    assert datos['solicitudes'] >= 3 and datos['errores'] == 0
+    # Las muestras pendientes se escriben al detener el monitor
+    assert almacen.conn.execute('SELECT COUNT(*) FROM muestras').fetchone()[0] == datos['solicitudes']
+    almacen.cerrar()
@@ -0,0 +1,262 @@
+# almacen_muestras.py
+# Almacenamiento local de las muestras del monitor (timestamp, url, status, latencia).
+#
+# - SQLite en modo WAL: las escrituras se agregan al final del log y las consultas no las bloquean.
+# - Escrituras por lotes: las muestras se acumulan en memoria y se insertan juntas en una transacción.
+#   agregar() nunca toca el disco (se llama en el ciclo de eventos del monitor); vaciar() y
+#   compactar() se llaman desde un hilo auxiliar.
+# - Agregados automáticos por minuto y por hora (solicitudes, errores, suma, mínimo y máximo),
+#   con retención configurable para cada nivel, así una gráfica de semanas lee agregados por
+#   hora en lugar de recorrer todas las muestras crudas.
+import sqlite3
+import sys
+import threading
+import time
+
+MINUTO = 60
+HORA = 3600
+DIA = 86400
+
+# Consulta que agrupa muestras crudas en cubetas de `resolucion` segundos
+_AGRUPAR_CRUDAS = '''
+    SELECT url_id, CAST(ts / :res AS INTEGER) * :res AS inicio,
+           COUNT(*), SUM(status IS NULL OR status >= 500), COUNT(latencia),
+           COALESCE(SUM(latencia), 0), MIN(latencia), MAX(latencia)
+    FROM muestras
+    WHERE ts >= :desde AND ts < :hasta {filtro}
+    GROUP BY url_id, inicio
+'''
+
+
+class AlmacenMuestras:
+    """
+    Guarda muestras en un archivo SQLite y mantiene agregados de 1 minuto y 1 hora.
+
+    retencion: segundos que se conserva cada nivel (0 = crudas, 60 = por minuto, 3600 = por hora).
+    """
+
+    RESOLUCIONES = (MINUTO, HORA)
+
+    def __init__(self, ruta='monitoreo.db', tam_lote=500, retencion=None):
+        self.ruta = ruta
+        self.tam_lote = tam_lote
+        self.retencion = {0: 2 * DIA, MINUTO: 30 * DIA, HORA: 365 * DIA}
+        self.retencion.update(retencion or {})
+        self._pendientes = []
+        self._urls = {}
+        # _candado solo protege la lista de pendientes (se toma por microsegundos); _candado_db
+        # serializa el uso de la conexión, que puede tardar lo que tarde el disco
+        self._candado = threading.Lock()
+        self._candado_db = threading.Lock()
+        self._lote_listo = threading.Event()
+        # El monitor escribe desde un hilo auxiliar (asyncio.to_thread)
+        self.conn = sqlite3.connect(ruta, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')  # Suficiente con WAL: no hace fsync en cada commit
+        with self.conn:
+            self.conn.executescript('''
+                CREATE TABLE IF NOT EXISTS urls (
+                    id INTEGER PRIMARY KEY,
+                    url TEXT UNIQUE NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS muestras (
+                    ts REAL NOT NULL,
+                    url_id INTEGER NOT NULL,
+                    status INTEGER,
+                    latencia REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_muestras_ts ON muestras (ts);
+                CREATE INDEX IF NOT EXISTS idx_muestras_url_ts ON muestras (url_id, ts);
+                CREATE TABLE IF NOT EXISTS agregados (
+                    resolucion INTEGER NOT NULL,
+                    url_id INTEGER NOT NULL,
+                    inicio INTEGER NOT NULL,
+                    solicitudes INTEGER NOT NULL,
+                    errores INTEGER NOT NULL,
+                    respuestas INTEGER NOT NULL,
+                    suma REAL NOT NULL,
+                    minimo REAL,
+                    maximo REAL,
+                    PRIMARY KEY (resolucion, url_id, inicio)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS marcas (
+                    resolucion INTEGER PRIMARY KEY,
+                    hasta INTEGER NOT NULL
+                );
+            ''')
+
+    # ----------------------------- escritura -----------------------------
+
+    def _url_id(self, url):
+        if url not in self._urls:
+            self.conn.execute('INSERT OR IGNORE INTO urls (url) VALUES (?)', (url,))
+            self._urls[url] = self.conn.execute('SELECT id FROM urls WHERE url = ?', (url,)).fetchone()[0]
+        return self._urls[url]
+
+    def agregar(self, ts, url, status, latencia):
+        """
+        Acumula una muestra en memoria; se escribe en disco con vaciar(). Nunca espera al disco:
+        si el lote se llena solo avisa a quien esté en esperar_lote().
+        """
+        with self._candado:
+            self._pendientes.append((ts, url, status, latencia))
+            lleno = len(self._pendientes) >= self.tam_lote
+        if lleno:
+            self._lote_listo.set()
+
+    def esperar_lote(self, timeout):
+        """Bloquea hasta que haya un lote completo (o despertar()) o pasen `timeout` segundos."""
+        listo = self._lote_listo.wait(timeout)
+        self._lote_listo.clear()
+        return listo
+
+    def despertar(self):
+        """Libera a quien esté en esperar_lote(), por ejemplo al detener el monitor."""
+        self._lote_listo.set()
+
+    def observador(self, objetivo, status, response_time):
+        """Adaptador para usar el almacén como observador de monitoreoapp.monitor_performance."""
+        self.agregar(time.time(), objetivo.url, status, response_time)
+
+    def vaciar(self):
+        """Escribe todas las muestras pendientes en una sola transacción."""
+        # Se intercambia la lista bajo el candado corto y se escribe fuera de él: agregar() puede
+        # seguir acumulando muestras mientras este lote llega al disco
+        with self._candado:
+            pendientes, self._pendientes = self._pendientes, []
+        if not pendientes:
+            return 0
+        with self._candado_db, self.conn:
+            filas = [(ts, self._url_id(url), status, latencia) for ts, url, status, latencia in pendientes]
+            self.conn.executemany('INSERT INTO muestras (ts, url_id, status, latencia) VALUES (?, ?, ?, ?)', filas)
+        return len(filas)
+
+    # --------------------------- agregados -------------------------------
+
+    def _marca(self, resolucion):
+        fila = self.conn.execute('SELECT hasta FROM marcas WHERE resolucion = ?', (resolucion,)).fetchone()
+        if fila:
+            return fila[0]
+        # Primera vez: se empieza desde la muestra más antigua
+        primera = self.conn.execute('SELECT MIN(ts) FROM muestras').fetchone()[0]
+        return None if primera is None else int(primera // resolucion) * resolucion
+
+    def compactar(self, ahora=None, margen=MINUTO):
+        """
+        Calcula los agregados de las cubetas ya cerradas y aplica la retención.
+
+        Solo se agregan cubetas que terminaron hace más de `margen` segundos, para dar tiempo
+        a que lleguen los lotes pendientes. Cada nivel recuerda hasta dónde agregó (tabla marcas),
+        así ninguna cubeta se cuenta dos veces.
+        """
+        ahora = time.time() if ahora is None else ahora
+        self.vaciar()
+        with self._candado_db, self.conn:
+            for resolucion in self.RESOLUCIONES:
+                desde = self._marca(resolucion)
+                if desde is None:
+                    continue
+                hasta = int((ahora - margen) // resolucion) * resolucion
+                if hasta <= desde:
+                    continue
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO agregados '
+                    '(resolucion, url_id, inicio, solicitudes, errores, respuestas, suma, minimo, maximo) '
+                    'SELECT :res, * FROM (' + _AGRUPAR_CRUDAS.format(filtro='') + ')',
+                    {'res': resolucion, 'desde': desde, 'hasta': hasta}
+                )
+                self.conn.execute('INSERT OR REPLACE INTO marcas (resolucion, hasta) VALUES (?, ?)',
+                                  (resolucion, hasta))
+
+            # Retención: las crudas solo se borran si ya quedaron agregadas en todos los niveles
+            marcas = [self._marca(resolucion) for resolucion in self.RESOLUCIONES]
+            if None not in marcas:
+                self.conn.execute('DELETE FROM muestras WHERE ts < ?', (min([ahora - self.retencion[0]] + marcas),))
+            for resolucion in self.RESOLUCIONES:
+                self.conn.execute('DELETE FROM agregados WHERE resolucion = ? AND inicio < ?',
+                                  (resolucion, ahora - self.retencion[resolucion]))
+
+    # ---------------------------- consultas ------------------------------
+
+    def consultar_muestras(self, url, desde, hasta):
+        """Muestras crudas de una URL entre dos timestamps: lista de (ts, status, latencia)."""
+        self.vaciar()
+        with self._candado_db:
+            return self.conn.execute(
+                'SELECT m.ts, m.status, m.latencia FROM muestras m JOIN urls u ON u.id = m.url_id '
+                'WHERE u.url = ? AND m.ts >= ? AND m.ts < ? ORDER BY m.ts',
+                (url, desde, hasta)
+            ).fetchall()
+
+    def elegir_resolucion(self, desde, hasta, max_puntos=1500):
+        """La resolución más fina que cubre el rango con no más de max_puntos cubetas."""
+        ahora = time.time()
+        for resolucion in self.RESOLUCIONES:
+            if (hasta - desde) / resolucion <= max_puntos and desde >= ahora - self.retencion[resolucion]:
+                return resolucion
+        return self.RESOLUCIONES[-1]
+
+    def consultar_agregados(self, url, desde, hasta, resolucion=None):
+        """
+        Agregados de una URL en cubetas de `resolucion` segundos (60 o 3600; None elige sola).
+
+        Regresa una lista de diccionarios con inicio, solicitudes, errores, promedio, mínimo y
+        máximo. Lo ya compactado se lee de la tabla agregados y el tramo más reciente, que aún
+        no se compacta, se calcula al vuelo desde las muestras crudas.
+        """
+        resolucion = resolucion or self.elegir_resolucion(desde, hasta)
+        if resolucion not in self.RESOLUCIONES:
+            raise ValueError('Resolución no soportada: {}'.format(resolucion))
+        self.vaciar()
+        with self._candado_db:
+            fila = self.conn.execute('SELECT id FROM urls WHERE url = ?', (url,)).fetchone()
+            if fila is None:
+                return []
+            url_id = fila[0]
+            marca = self._marca(resolucion) or desde
+            filas = self.conn.execute(
+                'SELECT url_id, inicio, solicitudes, errores, respuestas, suma, minimo, maximo FROM agregados '
+                'WHERE resolucion = ? AND url_id = ? AND inicio >= ? AND inicio < ? ORDER BY inicio',
+                (resolucion, url_id, int(desde // resolucion) * resolucion, min(hasta, marca))
+            ).fetchall()
+            if hasta > marca:
+                filas += self.conn.execute(
+                    _AGRUPAR_CRUDAS.format(filtro='AND url_id = :url_id') + ' ORDER BY inicio',
+                    {'res': resolucion, 'desde': max(desde, marca), 'hasta': hasta, 'url_id': url_id}
+                ).fetchall()
+        return [
+            {
+                'inicio': inicio,
+                'solicitudes': solicitudes,
+                'errores': errores,
+                'promedio': suma / respuestas if respuestas else None,
+                'minimo': minimo,
+                'maximo': maximo,
+            }
+            for _, inicio, solicitudes, errores, respuestas, suma, minimo, maximo in filas
+        ]
+
+    def urls(self):
+        with self._candado_db:
+            return [fila[0] for fila in self.conn.execute('SELECT url FROM urls ORDER BY url')]
+
+    def cerrar(self):
+        self.vaciar()
+        self.conn.close()
+
+
+if __name__ == '__main__':
+    # Resumen por hora de las últimas N horas: python almacen_muestras.py monitoreo.db [horas]
+    ruta = sys.argv[1] if len(sys.argv) > 1 else 'monitoreo.db'
+    horas = float(sys.argv[2]) if len(sys.argv) > 2 else 24
+    almacen = AlmacenMuestras(ruta)
+    ahora = time.time()
+    for url in almacen.urls():
+        print(url)
+        for cubeta in almacen.consultar_agregados(url, ahora - horas * HORA, ahora):
+            promedio = '-' if cubeta['promedio'] is None else '{:.3f}s'.format(cubeta['promedio'])
+            maximo = '-' if cubeta['maximo'] is None else '{:.3f}s'.format(cubeta['maximo'])
+            print('  {}  solicitudes={}  errores={}  promedio={}  maximo={}'.format(
+                time.strftime('%Y-%m-%d %H:%M', time.localtime(cubeta['inicio'])),
+                cubeta['solicitudes'], cubeta['errores'], promedio, maximo))
+    almacen.cerrar()
@@ -0,0 +1,213 @@
+# histograma_latencia.py
+# Histogramas de latencia con memoria acotada y alertas por percentiles en una ventana deslizante.
+#
+# En lugar de guardar cada muestra, los tiempos se cuentan en cubetas logarítmicas (al estilo
+# de HDR Histogram): cada cubeta es ~2% más ancha que la anterior, así que cualquier percentil
+# se calcula con un error relativo de ~1% y el número de cubetas no depende de cuántas muestras
+# lleguen (como máximo unas 650 entre 0.1 ms y 60 s).
+import json
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+
+
+class HistogramaLatencia:
+    """Cuenta latencias (en segundos) en cubetas logarítmicas."""
+
+    MINIMO = 0.0001   # 0.1 ms; valores menores caen en la primera cubeta
+    MAXIMO = 60.0     # 60 s; valores mayores caen en la última cubeta
+    FACTOR = 1.02     # Crecimiento entre cubetas: ~1% de error relativo en los percentiles
+    _LOG_FACTOR = math.log(FACTOR)
+    ULTIMA_CUBETA = int(math.log(MAXIMO / MINIMO) / _LOG_FACTOR)
+
+    def __init__(self):
+        self.cubetas = {}  # índice de cubeta -> número de muestras
+        self.cuenta = 0
+        self.suma = 0.0
+        self.maximo = 0.0
+
+    def _indice(self, valor):
+        if valor <= self.MINIMO:
+            return 0
+        return min(int(math.log(valor / self.MINIMO) / self._LOG_FACTOR), self.ULTIMA_CUBETA)
+
+    def registrar(self, valor):
+        indice = self._indice(valor)
+        self.cubetas[indice] = self.cubetas.get(indice, 0) + 1
+        self.cuenta += 1
+        self.suma += valor
+        self.maximo = max(self.maximo, valor)
+
+    def combinar(self, otro):
+        """Suma las cuentas de otro histograma a este (para unir los tramos de una ventana)."""
+        for indice, cuenta in otro.cubetas.items():
+            self.cubetas[indice] = self.cubetas.get(indice, 0) + cuenta
+        self.cuenta += otro.cuenta
+        self.suma += otro.suma
+        self.maximo = max(self.maximo, otro.maximo)
+
+    def percentil(self, p):
+        """Regresa el percentil p (0-100) en segundos, o None si no hay muestras."""
+        if self.cuenta == 0:
+            return None
+        objetivo = max(1, math.ceil(self.cuenta * p / 100.0))
+        acumulado = 0
+        for indice in sorted(self.cubetas):
+            acumulado += self.cubetas[indice]
+            if acumulado >= objetivo:
+                # Punto medio (geométrico) de la cubeta, sin pasar del máximo observado
+                return min(self.MINIMO * self.FACTOR ** (indice + 0.5), self.maximo)
+        return self.maximo
+
+
+class VentanaDeslizante:
+    """Histograma de los últimos `ancho` segundos, dividido en tramos que se descartan al envejecer."""
+
+    def __init__(self, ancho=60.0, tramos=12, reloj=time.monotonic):
+        self.ancho_tramo = ancho / tramos
+        self.tramos = tramos
+        self.reloj = reloj
+        self._tramos = deque()  # (id del tramo, histograma, total de solicitudes, errores)
+
+    def _tramo_actual(self):
+        ahora = int(self.reloj() // self.ancho_tramo)
+        while self._tramos and self._tramos[0][0] <= ahora - self.tramos:
+            self._tramos.popleft()
+        if not self._tramos or self._tramos[-1][0] != ahora:
+            self._tramos.append([ahora, HistogramaLatencia(), 0, 0])
+        return self._tramos[-1]
+
+    def registrar(self, latencia, error=False):
+        """Registra una solicitud; latencia es None cuando no hubo respuesta."""
+        tramo = self._tramo_actual()
+        tramo[2] += 1
+        if error:
+            tramo[3] += 1
+        if latencia is not None:
+            tramo[1].registrar(latencia)
+
+    def resumen(self):
+        """Regresa (histograma combinado, total de solicitudes, errores) de la ventana."""
+        self._tramo_actual()  # Descarta los tramos vencidos
+        histograma = HistogramaLatencia()
+        total = errores = 0
+        for _, tramo, solicitudes, fallas in self._tramos:
+            histograma.combinar(tramo)
+            total += solicitudes
+            errores += fallas
+        return histograma, total, errores
+
+
+@dataclass
+class ReglaAlerta:
+    """
+    Regla sobre la ventana: metrica es 'p50', 'p95', 'p99' (segundos) o 'error_rate' (0 a 1).
+    Solo se evalúa cuando la ventana tiene al menos min_muestras solicitudes.
+    """
+    metrica: str
+    umbral: float
+    min_muestras: int = 10
+
+    def __post_init__(self):
+        if self.metrica not in ('p50', 'p95', 'p99', 'error_rate'):
+            raise ValueError("Métrica no soportada: {}".format(self.metrica))
+
+    def valor(self, histograma, total, errores):
+        if total < self.min_muestras:
+            return None
+        if self.metrica == 'error_rate':
+            return errores / total
+        return histograma.percentil(float(self.metrica[1:]))
+
+
+class MonitorPercentiles:
+    """
+    Lleva una ventana deslizante por URL, evalúa las reglas y exporta los percentiles.
+    Se usa como observador del monitor: registrar_muestra(objetivo, status, response_time).
+    """
+
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(self, ancho_ventana=60.0, tramos=12, reloj=time.monotonic):
+        self.ancho_ventana = ancho_ventana
+        self.tramos = tramos
+        self.reloj = reloj
+        self.ventanas = {}
+        self.reglas = {}
+        self.activas = {}  # (url, métrica) -> valor con el que se disparó la alerta
+
+    def configurar(self, url, reglas):
+        self.reglas[url] = list(reglas)
+
+    def _ventana(self, url):
+        if url not in self.ventanas:
+            self.ventanas[url] = VentanaDeslizante(self.ancho_ventana, self.tramos, self.reloj)
+        return self.ventanas[url]
+
+    def registrar_muestra(self, objetivo, status, response_time):
+        # Sin respuesta o con error del servidor (5xx) cuenta como error
+        error = status is None or status >= 500
+        self._ventana(objetivo.url).registrar(response_time, error)
+
+    def evaluar(self):
+        """
+        Evalúa las reglas de cada URL. Regresa una lista de eventos (estado, url, regla, valor)
+        donde estado es 'ALERTA' cuando una regla empieza a violarse y 'RESUELTA' cuando deja de
+        hacerlo; una alerta que sigue activa no se repite.
+        """
+        eventos = []
+        for url, reglas in self.reglas.items():
+            histograma, total, errores = self._ventana(url).resumen()
+            for regla in reglas:
+                valor = regla.valor(histograma, total, errores)
+                clave = (url, regla.metrica)
+                if valor is not None and valor > regla.umbral:
+                    if clave not in self.activas:
+                        eventos.append(('ALERTA', url, regla, valor))
+                    self.activas[clave] = valor
+                elif clave in self.activas and valor is not None:
+                    del self.activas[clave]
+                    eventos.append(('RESUELTA', url, regla, valor))
+        return eventos
+
+    def snapshot(self):
+        """Percentiles actuales por URL como diccionario (listo para json.dumps)."""
+        datos = {}
+        for url, ventana in self.ventanas.items():
+            histograma, total, errores = ventana.resumen()
+            datos[url] = {
+                'ventana_segundos': self.ancho_ventana,
+                'solicitudes': total,
+                'errores': errores,
+                'error_rate': errores / total if total else 0.0,
+                'promedio': histograma.suma / histograma.cuenta if histograma.cuenta else None,
+                'maximo': histograma.maximo if histograma.cuenta else None,
+            }
+            for p in self.PERCENTILES:
+                datos[url]['p{}'.format(p)] = histograma.percentil(p)
+        return datos
+
+    def formato_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def formato_prometheus(self):
+        """Percentiles en el formato de texto de Prometheus (tipo summary)."""
+        lineas = [
+            '# HELP monitor_response_seconds Tiempo de respuesta en la ventana deslizante',
+            '# TYPE monitor_response_seconds summary',
+        ]
+        errores = [
+            '# HELP monitor_window_errors Solicitudes fallidas en la ventana deslizante',
+            '# TYPE monitor_window_errors gauge',
+        ]
+        for url, ventana in self.ventanas.items():
+            histograma, _, fallas = ventana.resumen()
+            for p in self.PERCENTILES:
+                valor = histograma.percentil(p)
+                if valor is not None:
+                    lineas.append('monitor_response_seconds{{url="{}",quantile="{}"}} {:.6f}'.format(url, p / 100, valor))
+            lineas.append('monitor_response_seconds_sum{{url="{}"}} {:.6f}'.format(url, histograma.suma))
+            lineas.append('monitor_response_seconds_count{{url="{}"}} {}'.format(url, histograma.cuenta))
+            errores.append('monitor_window_errors{{url="{}"}} {}'.format(url, fallas))
+        return '\n'.join(lineas + errores) + '\n'
@@ -1,62 +1,204 @@
 # Importamos las librerías necesarias
-import requests  # Para hacer solicitudes HTTP a una URL
+import argparse  # Para leer las opciones desde la línea de comandos
+import asyncio   # Para verificar muchas URLs al mismo tiempo en un solo ciclo de eventos
+import json      # Para leer la lista de URLs a monitorear desde un archivo
+import logging   # Para registrar los errores de los observadores sin detener el monitoreo
 import time      # Para medir el tiempo y pausar el monitoreo
+from dataclasses import dataclass, field
 
-def get_response_time(url):
+import aiohttp   # Cliente HTTP asíncrono: reutiliza conexiones (keep-alive) entre verificaciones
+
+# Percentiles por URL en una ventana deslizante y alertas basadas en ellos
+from histograma_latencia import MonitorPercentiles, ReglaAlerta
+# Historial de muestras en SQLite con agregados por minuto y por hora
+from almacen_muestras import AlmacenMuestras
+
+registro = logging.getLogger(__name__)
+
+@dataclass
+class Objetivo:
     """
-    Realiza una solicitud HTTP GET a la URL proporcionada y calcula
-    cuánto tiempo tardó en obtener la respuesta.
+    Una URL a monitorear con su propio umbral (segundos), intervalo entre
+    verificaciones (segundos) y tiempo máximo de espera por respuesta (segundos).
+
+    reglas es una lista de diccionarios {"metrica": "p99", "umbral": 3.0}; si está vacía
+    se alerta cuando el p95 de la ventana supera threshold o fallan más del 5% de las solicitudes.
     """
-    # requests.get(url) envía una solicitud GET, HTTP GET a la URL
-    response = requests.get(url)
+    url: str
+    threshold: float = 2.0
+    intervalo: float = 1.0
+    timeout: float = 10.0
+    reglas: list = field(default_factory=list)
 
-    # Obtenemos el tiempo de respuesta en segundos desde que se envió hasta que se recibió
-    # .elapsed es un objeto timedelta, y .total_seconds() lo convierte a segundos flotantes
-    response_time = response.elapsed.total_seconds()
+    def reglas_alerta(self):
+        if self.reglas:
+            return [ReglaAlerta(**regla) for regla in self.reglas]
+        return [ReglaAlerta('p95', self.threshold), ReglaAlerta('error_rate', 0.05)]
 
-    # Retornamos el tiempo de respuesta
-    return response_time
+def reportar_eventos(eventos):
+    """
+    Imprime las alertas que se dispararon o resolvieron en la última evaluación.
+    """
+    for estado, url, regla, valor in eventos:
+        if regla.metrica == 'error_rate':
+            detalle = "tasa de errores {:.1%} (umbral {:.1%})".format(valor, regla.umbral)
+        else:
+            detalle = "{} de {:.2f} segundos (umbral {:.2f} segundos)".format(regla.metrica, valor, regla.umbral)
+        print("{}: '{}' {}".format(estado, url, detalle))
 
-def monitor_performance(url, threshold):
+async def medir(sesion, objetivo):
     """
-    Verifica el rendimiento de una URL comparando el tiempo de respuesta
-    con un umbral definido por el usuario.
+    Envía un GET asíncrono y regresa (código de estado, segundos hasta recibir la respuesta).
+    El tiempo se mide hasta recibir los encabezados (igual que .elapsed de requests).
     """
-    # Llama a la función que obtiene el tiempo de respuesta actual
-    response_time = get_response_time(url)
+    inicio = time.perf_counter()
+    async with sesion.get(objetivo.url, timeout=aiohttp.ClientTimeout(total=objetivo.timeout)) as response:
+        response_time = time.perf_counter() - inicio
+        # Se lee el cuerpo para que la conexión regrese al pool y pueda reutilizarse
+        await response.read()
+        return response.status, response_time
 
-    # Compara el tiempo de respuesta con el umbral definido
-    if response_time > threshold:
-        # Si se excede el umbral, se imprime una alerta con la información relevante
-        print(
-            "ALERTA: El tiempo de respuesta de la URL '{}' es de {:.2f} segundos. "
-            "Esto supera el umbral de {:.2f} segundos.".format(url, response_time, threshold)
-        )
-    else:
-        # Si está dentro del rango normal, se muestra un mensaje informativo
-        print(
-            "OK: El tiempo de respuesta de '{}' es {:.2f} segundos, dentro del umbral.".format(url, response_time)
-        )
+async def vigilar(sesion, objetivo, observadores=()):
+    """
+    Ciclo de monitoreo de una sola URL. Cada URL tiene su propia tarea, así que una
+    URL lenta solo retrasa sus propias verificaciones y no las de las demás.
+
+    observadores es una lista de funciones f(objetivo, status, response_time) que reciben
+    cada muestra; status es None cuando la solicitud falló o se agotó el tiempo. Si un
+    observador lanza una excepción se registra y se sigue con los demás: un observador con
+    errores no detiene el monitoreo de la URL.
+    """
+    loop = asyncio.get_running_loop()
+    siguiente = loop.time()
+    while True:
+        try:
+            status, response_time = await medir(sesion, objetivo)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            status, response_time = None, None
+
+        for observador in observadores:
+            try:
+                observador(objetivo, status, response_time)
+            except Exception:
+                registro.exception("El observador %r falló con la muestra de '%s'", observador, objetivo.url)
+
+        # Se programa la siguiente verificación según el intervalo; si la respuesta tardó
+        # más que el intervalo, se verifica de inmediato en lugar de acumular atrasos
+        siguiente += objetivo.intervalo
+        espera = siguiente - loop.time()
+        if espera < 0:
+            siguiente = loop.time()
+            espera = 0
+        await asyncio.sleep(espera)
+
+async def evaluar_alertas(percentiles, cada=5.0, archivo_metricas=None):
+    """
+    Cada `cada` segundos evalúa las reglas sobre la ventana deslizante, imprime las alertas
+    y, si se indicó, exporta los percentiles a archivo_metricas (.prom para el formato de
+    Prometheus; cualquier otra extensión se escribe como JSON). Un error en una evaluación
+    se registra y se reintenta en la siguiente.
+    """
+    while True:
+        await asyncio.sleep(cada)
+        try:
+            reportar_eventos(percentiles.evaluar())
+        except Exception:
+            registro.exception("Falló la evaluación de alertas")
+        if archivo_metricas:
+            try:
+                if archivo_metricas.endswith(".prom"):
+                    contenido = percentiles.formato_prometheus()
+                else:
+                    contenido = percentiles.formato_json()
+                with open(archivo_metricas, "w", encoding="utf-8") as archivo:
+                    archivo.write(contenido)
+            except Exception:
+                registro.exception("No se pudieron exportar las métricas a '%s'", archivo_metricas)
+
+async def persistir_muestras(almacen, cada=5.0, compactar_cada=60.0):
+    """
+    Escribe en disco las muestras acumuladas cada `cada` segundos (o antes, en cuanto se junta
+    un lote completo) y calcula los agregados cada `compactar_cada` segundos. SQLite se usa desde
+    un hilo auxiliar para no detener las verificaciones mientras se escribe.
+    """
+    loop = asyncio.get_running_loop()
+    siguiente_compactacion = loop.time() + compactar_cada
+    try:
+        while True:
+            await asyncio.to_thread(almacen.esperar_lote, cada)
+            await asyncio.to_thread(almacen.vaciar)
+            if loop.time() >= siguiente_compactacion:
+                await asyncio.to_thread(almacen.compactar)
+                siguiente_compactacion = loop.time() + compactar_cada
+    finally:
+        # Al detener el monitor se guardan las muestras que quedaron pendientes
+        almacen.despertar()  # El hilo que esperaba un lote termina sin agotar su timeout
+        almacen.vaciar()
+
+async def monitor_performance(objetivos, max_conexiones=100, observadores=(), percentiles=None,
+                              cada=5.0, archivo_metricas=None, almacen=None):
+    """
+    Monitorea todas las URLs de forma concurrente en un solo ciclo de eventos.
+    Todas las verificaciones comparten una sesión con un pool de hasta
+    max_conexiones conexiones keep-alive.
+
+    Las alertas no se deciden por muestra individual sino por los percentiles y la tasa
+    de errores de la ventana deslizante de cada URL (ver histograma_latencia.py).
+    Si se pasa un AlmacenMuestras, cada muestra también se guarda en su historial.
+    """
+    if percentiles is None:
+        percentiles = MonitorPercentiles()
+    for objetivo in objetivos:
+        percentiles.configurar(objetivo.url, objetivo.reglas_alerta())
+    observadores = [percentiles.registrar_muestra, *observadores]
+    tareas = [evaluar_alertas(percentiles, cada, archivo_metricas)]
+    if almacen is not None:
+        observadores.append(almacen.observador)
+        tareas.append(persistir_muestras(almacen, cada))
+
+    conector = aiohttp.TCPConnector(limit=max_conexiones, ttl_dns_cache=300)
+    async with aiohttp.ClientSession(connector=conector) as sesion:
+        await asyncio.gather(*tareas, *(vigilar(sesion, objetivo, observadores) for objetivo in objetivos))
+
+def cargar_objetivos(nombre_archivo):
+    """
+    Lee una lista de objetivos desde un archivo JSON, por ejemplo:
+    [{"url": "http://127.0.0.1:5000/users", "threshold": 2.0, "intervalo": 1.0}]
+    """
+    with open(nombre_archivo, "r", encoding="utf-8") as archivo:
+        return [Objetivo(**datos) for datos in json.load(archivo)]
 
 if __name__ == "__main__":
     """
-    Bloque principal del programa: define la URL a monitorear y el umbral
+    Bloque principal del programa: define las URLs a monitorear con su umbral
     y ejecuta el monitoreo en un bucle continuo.
     """
-    # Definimos la URL de la aplicación web a monitorear
-    #url = "https://www.google.com"
-    #url = "https://www.example.com"
-    url = "http://127.0.0.1:5000/users"
-    #url = "http://127.0.0.1:5000"
-    #url = "http://localhost/phpmyadmin"
-   
-    # Definimos el umbral de tiempo de respuesta permitido (en segundos)
-    threshold = 2.0
-
-    # Inicia un bucle infinito que monitorea la URL cada segundo
-    while True:
-        # Llama a la función que evalúa el rendimiento
-        monitor_performance(url, threshold)
+    # Ejemplo: python monitoreoapp.py objetivos.json --metricas metricas.prom --almacen monitoreo.db
+    parser = argparse.ArgumentParser(description="Monitor de tiempos de respuesta")
+    parser.add_argument("objetivos", nargs="?", help="archivo JSON con las URLs a monitorear")
+    parser.add_argument("--metricas", help="archivo donde se exportan los percentiles (.json o .prom)")
+    parser.add_argument("--almacen", help="archivo SQLite donde se guarda el historial de muestras")
+    args = parser.parse_args()
+
+    if args.objetivos:
+        objetivos = cargar_objetivos(args.objetivos)
+    else:
+        # Definimos la URL de la aplicación web a monitorear
+        #url = "https://www.google.com"
+        #url = "https://www.example.com"
+        #url = "http://127.0.0.1:5000"
+        #url = "http://localhost/phpmyadmin"
+        # Umbral de tiempo de respuesta permitido (en segundos) y verificación cada segundo
+        objetivos = [Objetivo(url="http://127.0.0.1:5000/users", threshold=2.0, intervalo=1.0)]
+
+    almacen = AlmacenMuestras(args.almacen) if args.almacen else None
+    logging.basicConfig(format="%(asctime)s %(levelname)s %(message)s")
 
-        # Espera 1 segundo antes de volver a comprobar
-        time.sleep(1.0)
\ No newline at end of file
+    # Inicia el monitoreo continuo de todas las URLs
+    try:
+        asyncio.run(monitor_performance(objetivos, archivo_metricas=args.metricas, almacen=almacen))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if almacen is not None:
+            almacen.cerrar()
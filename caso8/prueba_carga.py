@@ -0,0 +1,297 @@
+# prueba_carga.py
+# Generador de carga para las APIs Flask (caso7/app.py y caso/Backend_Flask_Ejemplo.py).
+#
+# Envía una mezcla fija de lecturas y escrituras a /users, /products y /orders con una
+# concurrencia y una tasa (solicitudes por segundo) configurables, y guarda un archivo JSON con
+# throughput, percentiles de latencia y errores. Con --comparar se contrasta contra un resultado
+# anterior y el programa termina con código 1 si hay una regresión (útil en CI), o con código 2
+# si en algún endpoint fallaron la mayoría de las solicitudes (sus números no serían comparables).
+#
+# Ejemplos:
+#   python prueba_carga.py --escenario caso7 --url http://127.0.0.1:5000 --rps 200 --duracion 30
+#   python prueba_carga.py --escenario marketplace --concurrencia 50 --salida actual.json \
+#       --comparar base.json --tolerancia 0.10
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys
+import time
+
+import aiohttp
+
+from histograma_latencia import HistogramaLatencia
+
+PERCENTILES = (50, 90, 95, 99)
+
+# Contadores globales para generar usuarios y órdenes únicos en las escrituras. Las órdenes
+# tienen el suyo: sus IDs no deben salirse del bloque de la corrida
+_secuencia = itertools.count(1)
+_ordenes = itertools.count()
+_prefijo = int(time.time())
+
+# OrderID es INT en MySQL: los IDs generados deben caber en 32 bits con signo
+MAX_ORDER_ID = 2 ** 31 - 1
+ORDENES_POR_CORRIDA = 10000
+
+
+def base_order_id():
+    """
+    Primer OrderID de esta corrida: 1e9 más un bloque de ORDENES_POR_CORRIDA que depende de la
+    hora de inicio, así dos corridas seguidas no chocan y el rango completo cabe en INT.
+    """
+    return 1000000000 + (_prefijo % 100000) * ORDENES_POR_CORRIDA
+
+
+class OrderIDsAgotados(Exception):
+    """Ya se usaron los --ordenes OrderID del bloque de esta corrida."""
+
+
+def nuevo_usuario(args):
+    n = next(_secuencia)
+    return {'username': 'carga{}_{}'.format(_prefijo, n), 'email': 'carga{}_{}@example.com'.format(_prefijo, n),
+            'password': 'carga'}
+
+
+def nueva_orden(args):
+    # El backend del marketplace exige el OrderID en el JSON; se usa un rango alto para no chocar.
+    # Al agotarse el bloque no se envían más órdenes: un ID repetido o del bloque de otra corrida
+    # sería un error del cliente contado como error del servidor
+    n = next(_ordenes)
+    if n >= args.ordenes:
+        raise OrderIDsAgotados()
+    return {'OrderID': args.order_id_base + n, 'BuyerID': args.buyer_id, 'ProductID': args.product_id,
+            'Quantity': 1, 'OrderDate': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+# Escenarios: (peso, nombre, método, ruta, función que arma el cuerpo JSON o None)
+ESCENARIOS = {
+    'caso7': [
+        (8, 'GET /users', 'GET', '/users', None),
+        (2, 'POST /users', 'POST', '/users', nuevo_usuario),
+    ],
+    'marketplace': [
+        (3, 'GET /users', 'GET', '/users?limit=50', None),
+        (4, 'GET /products', 'GET', '/products?limit=50', None),
+        (1, 'GET /products?expand=seller', 'GET', '/products?limit=50&expand=seller', None),
+        (2, 'GET /orders', 'GET', '/orders?limit=50', None),
+        (1, 'POST /orders', 'POST', '/orders', nueva_orden),
+    ],
+}
+
+
+class Resultados:
+    """Acumula latencias y errores globales y por endpoint."""
+
+    def __init__(self):
+        self.global_ = HistogramaLatencia()
+        self.por_endpoint = {}
+        self.errores = {}
+        self.solicitudes = 0
+        self.exitos = 0
+        self.omitidas = {}  # Escrituras que no se enviaron (endpoint -> cantidad)
+
+    def registrar(self, nombre, status, latencia):
+        self.solicitudes += 1
+        if status is not None and status < 400:
+            self.exitos += 1
+        else:
+            clave = str(status) if status is not None else 'sin_respuesta'
+            self.errores[clave] = self.errores.get(clave, 0) + 1
+        endpoint = self.por_endpoint.setdefault(nombre, {'histograma': HistogramaLatencia(), 'solicitudes': 0, 'errores': 0})
+        endpoint['solicitudes'] += 1
+        if status is None or status >= 400:
+            endpoint['errores'] += 1
+        if latencia is not None:
+            self.global_.registrar(latencia)
+            endpoint['histograma'].registrar(latencia)
+
+
+def resumen_latencia(histograma):
+    datos = {'p{}'.format(p): histograma.percentil(p) for p in PERCENTILES}
+    datos['promedio'] = histograma.suma / histograma.cuenta if histograma.cuenta else None
+    datos['maximo'] = histograma.maximo if histograma.cuenta else None
+    return datos
+
+
+async def ejecutar_solicitud(sesion, base_url, paso, args, resultados, inicio_programado):
+    """
+    Envía una solicitud del escenario. La latencia se mide desde el momento en que la solicitud
+    debía salir (inicio_programado), no desde que salió: así, si el servidor se satura y las
+    solicitudes se encolan, esa espera se refleja en los percentiles (coordinated omission).
+    """
+    _, nombre, metodo, ruta, cuerpo = paso
+    try:
+        json_cuerpo = cuerpo(args) if cuerpo else None
+    except OrderIDsAgotados:
+        resultados.omitidas[nombre] = resultados.omitidas.get(nombre, 0) + 1
+        await asyncio.sleep(0)  # Sin solicitud de por medio, se cede el turno a los demás trabajadores
+        return
+    try:
+        async with sesion.request(metodo, base_url + ruta, json=json_cuerpo) as response:
+            await response.read()
+            resultados.registrar(nombre, response.status, time.perf_counter() - inicio_programado)
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        resultados.registrar(nombre, None, None)
+
+
+async def generar_carga(args):
+    pasos = ESCENARIOS[args.escenario]
+    pesos = [paso[0] for paso in pasos]
+    aleatorio = random.Random(args.semilla)  # Misma semilla = misma secuencia de solicitudes
+    resultados = Resultados()
+    limite = asyncio.Semaphore(args.concurrencia)
+
+    conector = aiohttp.TCPConnector(limit=args.concurrencia)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    async with aiohttp.ClientSession(connector=conector, timeout=timeout) as sesion:
+        inicio = time.perf_counter()
+        fin = inicio + args.duracion
+
+        if args.rps > 0:
+            # Lazo abierto: las solicitudes salen a tasa fija sin importar cuánto tarde el servidor
+            # (hasta `concurrencia` en vuelo; las demás esperan y esa espera cuenta como latencia)
+            async def una(programado):
+                async with limite:
+                    await ejecutar_solicitud(sesion, args.url, aleatorio.choices(pasos, pesos)[0], args,
+                                             resultados, programado)
+
+            tareas = []
+            for n in itertools.count():
+                programado = inicio + n / args.rps
+                if programado >= fin:
+                    break
+                espera = programado - time.perf_counter()
+                if espera > 0:
+                    await asyncio.sleep(espera)
+                tareas.append(asyncio.create_task(una(programado)))
+            await asyncio.gather(*tareas)
+        else:
+            # Lazo cerrado: `concurrencia` trabajadores envían solicitudes una tras otra
+            async def trabajador():
+                while time.perf_counter() < fin:
+                    await ejecutar_solicitud(sesion, args.url, aleatorio.choices(pasos, pesos)[0], args,
+                                             resultados, time.perf_counter())
+
+            await asyncio.gather(*(trabajador() for _ in range(args.concurrencia)))
+
+        duracion = time.perf_counter() - inicio
+
+    return {
+        'escenario': args.escenario,
+        'url': args.url,
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'duracion_segundos': round(duracion, 3),
+        'concurrencia': args.concurrencia,
+        'rps_objetivo': args.rps,
+        'solicitudes': resultados.solicitudes,
+        'exitos': resultados.exitos,
+        'errores': resultados.errores,
+        'omitidas': resultados.omitidas,
+        'error_rate': 1 - resultados.exitos / resultados.solicitudes if resultados.solicitudes else 0.0,
+        'throughput_rps': resultados.solicitudes / duracion if duracion else 0.0,
+        'latencia_segundos': resumen_latencia(resultados.global_),
+        'por_endpoint': {
+            nombre: {
+                'solicitudes': datos['solicitudes'],
+                'errores': datos['errores'],
+                'latencia_segundos': resumen_latencia(datos['histograma']),
+            }
+            for nombre, datos in resultados.por_endpoint.items()
+        },
+    }
+
+
+def endpoints_fallidos(resultado, maximo_errores=0.5):
+    """
+    Endpoints en los que fallaron más de `maximo_errores` de las solicitudes (por ejemplo,
+    POST /orders rechazado por la base de datos). Sus latencias miden sobre todo errores, así que
+    el resultado no sirve para comparar.
+    """
+    return sorted(nombre for nombre, datos in resultado['por_endpoint'].items()
+                  if datos['solicitudes'] and datos['errores'] > datos['solicitudes'] * maximo_errores)
+
+
+def comparar(actual, base, tolerancia):
+    """
+    Regresa la lista de regresiones de `actual` contra `base`: p95/p99 más altos, throughput
+    más bajo (ambos más allá de la tolerancia relativa) o una tasa de errores mayor.
+    """
+    regresiones = []
+    for p in ('p95', 'p99'):
+        antes, ahora = base['latencia_segundos'][p], actual['latencia_segundos'][p]
+        if antes and ahora and ahora > antes * (1 + tolerancia):
+            regresiones.append('{} subió de {:.4f}s a {:.4f}s'.format(p, antes, ahora))
+    if actual['throughput_rps'] < base['throughput_rps'] * (1 - tolerancia):
+        regresiones.append('throughput bajó de {:.1f} a {:.1f} solicitudes/s'.format(
+            base['throughput_rps'], actual['throughput_rps']))
+    if actual['error_rate'] > base['error_rate'] + 0.01:
+        regresiones.append('tasa de errores subió de {:.2%} a {:.2%}'.format(base['error_rate'], actual['error_rate']))
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prueba de carga para las APIs Flask')
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='URL base del servidor')
+    parser.add_argument('--escenario', choices=sorted(ESCENARIOS), default='marketplace')
+    parser.add_argument('--concurrencia', type=int, default=10, help='solicitudes en vuelo como máximo')
+    parser.add_argument('--rps', type=float, default=0, help='solicitudes por segundo (0 = lo más rápido posible)')
+    parser.add_argument('--duracion', type=float, default=10, help='segundos de prueba')
+    parser.add_argument('--timeout', type=float, default=10, help='segundos máximos por solicitud')
+    parser.add_argument('--semilla', type=int, default=1234)
+    parser.add_argument('--buyer-id', type=int, default=1, help='BuyerID usado en POST /orders')
+    parser.add_argument('--product-id', type=int, default=1, help='ProductID usado en POST /orders')
+    parser.add_argument('--order-id-base', type=int, default=base_order_id(),
+                        help='primer OrderID de POST /orders (el bloque completo debe caber en INT)')
+    parser.add_argument('--ordenes', type=int, default=ORDENES_POR_CORRIDA,
+                        help='OrderID disponibles desde --order-id-base; al agotarse no se envían más '
+                             'POST /orders (con más de {} indique también --order-id-base para no '
+                             'chocar con la corrida siguiente)'.format(ORDENES_POR_CORRIDA))
+    parser.add_argument('--salida', default='resultado_carga.json', help='archivo JSON con los resultados')
+    parser.add_argument('--comparar', help='resultado anterior contra el que se busca una regresión')
+    parser.add_argument('--tolerancia', type=float, default=0.10, help='variación relativa permitida')
+    parser.add_argument('--max-errores-endpoint', type=float, default=0.5,
+                        help='si un endpoint falla más que esta proporción, el resultado no se compara')
+    args = parser.parse_args()
+    if args.ordenes < 0:
+        parser.error('--ordenes no puede ser negativo')
+    if not 0 <= args.order_id_base <= MAX_ORDER_ID - args.ordenes + 1:
+        parser.error('--order-id-base debe estar entre 0 y {} para que {} órdenes quepan en INT'.format(
+            MAX_ORDER_ID - args.ordenes + 1, args.ordenes))
+
+    resultado = asyncio.run(generar_carga(args))
+    resultado['endpoints_fallidos'] = endpoints_fallidos(resultado, args.max_errores_endpoint)
+    with open(args.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(resultado, archivo, indent=2)
+
+    latencia = resultado['latencia_segundos']
+    print('{} solicitudes en {:.1f}s ({:.1f}/s), errores {:.2%}'.format(
+        resultado['solicitudes'], resultado['duracion_segundos'], resultado['throughput_rps'], resultado['error_rate']))
+    if latencia['p50'] is not None:
+        print('p50 {:.4f}s  p95 {:.4f}s  p99 {:.4f}s'.format(latencia['p50'], latencia['p95'], latencia['p99']))
+
+    for nombre, cantidad in resultado['omitidas'].items():
+        print('AVISO: no se enviaron {} solicitudes a {}: se agotaron los {} OrderID del bloque'.format(
+            cantidad, nombre, args.ordenes))
+    for nombre in resultado['endpoints_fallidos']:
+        datos = resultado['por_endpoint'][nombre]
+        print('ERROR: fallaron {} de {} solicitudes a {}'.format(datos['errores'], datos['solicitudes'], nombre))
+
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as archivo:
+            base = json.load(archivo)
+        # Un escenario que solo produjo errores no se compara: sus números no miden el servidor
+        invalidos = resultado['endpoints_fallidos'] + endpoints_fallidos(base, args.max_errores_endpoint)
+        if invalidos:
+            print('No se compara: hay endpoints que casi solo respondieron errores ({})'.format(', '.join(sorted(set(invalidos)))))
+            sys.exit(2)
+        regresiones = comparar(resultado, base, args.tolerancia)
+        for regresion in regresiones:
+            print('REGRESIÓN: ' + regresion)
+        if regresiones:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+# Test_Cargador_Compras.py
+#   python -m pytest -q Test_Cargador_Compras.py
+import codecs
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cargador_compras import detectar_encoding, iterar_compras, leer_compras, normalizar_fraude
+
+ENCABEZADO = "ubicación,producto,método_pago,dispositivo,fraude\n"
+FILAS = ["CDMX,Electrónica,Tarjeta,Móvil,1\n", "Puebla,Ropa,PayPal,PC,0\n", "Mérida,Jardín,Tarjeta,PC,sí\n"]
+
+
+def escribir(tmp_path, contenido, nombre="compras.csv"):
+    ruta = tmp_path / nombre
+    ruta.write_bytes(contenido)
+    return str(ruta)
+
+
+@pytest.mark.parametrize("contenido,esperado", [
+    (codecs.BOM_UTF8 + "ubicación\n".encode("utf-8"), "utf-8-sig"),
+    ("ubicación\n".encode("utf-8"), "utf-8"),
+    ("ubicación\n".encode("latin1"), "latin1"),
+    (b"solo ascii\n", "utf-8"),
+])
+def test_detectar_encoding(tmp_path, contenido, esperado):
+    assert detectar_encoding(escribir(tmp_path, contenido)) == esperado
+
+
+def test_caracter_cortado_al_final_del_bloque(tmp_path):
+    # "ó" ocupa dos bytes; el bloque termina entre ellos y aún así es UTF-8
+    ruta = escribir(tmp_path, "ubicación".encode("utf-8"))
+    tam_bloque = "ubicación".encode("utf-8").index(b"\xc3") + 1
+    assert detectar_encoding(ruta, tam_bloque) == "utf-8"
+
+
+def test_solo_lee_el_primer_bloque(tmp_path):
+    ruta = escribir(tmp_path, b"a" * 100 + "ón\n".encode("latin1"))
+    assert detectar_encoding(ruta, tam_bloque=100) == "utf-8"
+    assert detectar_encoding(ruta, tam_bloque=200) == "latin1"
+
+
+@pytest.mark.parametrize("encoding,bom", [("utf-8", b""), ("utf-8", codecs.BOM_UTF8), ("latin1", b"")])
+def test_leer_compras_con_cada_encoding(tmp_path, encoding, bom):
+    ruta = escribir(tmp_path, bom + (ENCABEZADO + "".join(FILAS)).encode(encoding))
+    datos = leer_compras(ruta)
+    assert list(datos.columns) == ENCABEZADO.strip().split(",")
+    assert list(datos["ubicación"]) == ["CDMX", "Puebla", "Mérida"]
+    assert list(datos["fraude"]) == [1, 0, 1]
+    assert datos["fraude"].dtype == np.int8
+    assert isinstance(datos["producto"].dtype, pd.CategoricalDtype)
+
+
+def test_archivo_mixto_despues_del_primer_bloque(tmp_path, capsys):
+    # El primer bloque es UTF-8 y una fila posterior viene en latin1
+    relleno = "".join("CDMX,Electrónica,Tarjeta,Móvil,0\n" for _ in range(4000))
+    contenido = (ENCABEZADO + relleno).encode("utf-8") + "Mérida,Jardín,PayPal,PC,1\n".encode("latin1")
+    ruta = escribir(tmp_path, contenido)
+    assert detectar_encoding(ruta) == "utf-8"
+
+    datos = leer_compras(ruta)
+    assert "se leen como latin1" in capsys.readouterr().out
+    assert len(datos) == 4001
+    assert datos["ubicación"].iloc[0] == "CDMX"  # Lo que era UTF-8 no se daña
+    assert list(datos.iloc[-1][["ubicación", "producto"]]) == ["Mérida", "Jardín"]
+
+    partes = list(iterar_compras(ruta, tam_parte=1000))
+    assert sum(len(parte) for parte in partes) == 4001
+    assert partes[-1]["producto"].iloc[-1] == "Jardín"
+
+
+def test_iterar_compras_por_partes(tmp_path):
+    ruta = escribir(tmp_path, (ENCABEZADO + "".join(FILAS) * 5).encode("utf-8"))
+    partes = list(iterar_compras(ruta, tam_parte=4))
+    assert [len(parte) for parte in partes] == [4, 4, 4, 3]
+    assert pd.concat(partes)["fraude"].tolist() == [1, 0, 1] * 5
+
+
+def test_normalizar_fraude():
+    assert normalizar_fraude(pd.Series(["Sí", " no", "si", "1", "quizá"])).tolist() == [1, 0, 1, 1, 0]
+    assert normalizar_fraude(pd.Series([1.0, None, 0.0])).tolist() == [1, 0, 0]
+
+
+def test_cache_pickle(tmp_path):
+    ruta = escribir(tmp_path, (ENCABEZADO + "".join(FILAS)).encode("utf-8"))
+    cache = str(tmp_path / "compras.pkl")
+    original = leer_compras(ruta, cache=cache)
+    assert os.path.exists(cache)
+    os.utime(cache, (os.path.getmtime(ruta) + 10,) * 2)
+    pd.testing.assert_frame_equal(leer_compras(ruta, cache=cache), original)
+
+    # Si el CSV es más reciente que la copia se vuelve a leer
+    escribir(tmp_path, (ENCABEZADO + FILAS[0]).encode("utf-8"))
+    os.utime(ruta, (os.path.getmtime(cache) + 10,) * 2)
+    assert len(leer_compras(ruta, cache=cache)) == 1
@@ -0,0 +1,74 @@
+# Test_Esquema_Fraude.py
+#   python -m pytest -q Test_Esquema_Fraude.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from esquema_fraude import EsquemaCategorico
+
+ENTRENAMIENTO = pd.DataFrame({
+    "ubicación": ["CDMX", "Puebla", "CDMX"],
+    "producto": ["Ropa", "Electrónica", "Ropa"],
+    "método_pago": ["Tarjeta", "PayPal", "PayPal"],
+    "dispositivo": ["PC", "Móvil", "PC"],
+    "fraude": [1, 0, 0],
+})
+
+
+def test_columnas_como_get_dummies():
+    esquema = EsquemaCategorico()
+    matriz = esquema.ajustar_transformar(ENTRENAMIENTO)
+    esperado = pd.get_dummies(ENTRENAMIENTO.drop(columns="fraude")).astype(float)
+    assert set(esquema.nombres_columnas()) == set(esperado.columns)
+    assert np.array_equal(matriz.toarray(), esperado[esquema.nombres_columnas()].to_numpy())
+
+
+def test_salida_dispersa_con_una_columna_por_variable():
+    matriz = EsquemaCategorico().ajustar_transformar(ENTRENAMIENTO)
+    assert matriz.format == "csr"
+    assert matriz.nnz == len(ENTRENAMIENTO) * 4
+    assert list(np.asarray(matriz.sum(axis=1)).ravel()) == [4.0, 4.0, 4.0]
+
+
+def test_categoria_desconocida_queda_en_ceros():
+    esquema = EsquemaCategorico().ajustar(ENTRENAMIENTO)
+    nuevos = pd.DataFrame({
+        "ubicación": ["Tijuana", "CDMX"],
+        "producto": ["Ropa", None],
+        "método_pago": ["Tarjeta", "Cripto"],
+        "dispositivo": ["PC", "Móvil"],
+    })
+    matriz = esquema.transformar(nuevos)
+    # Mismas columnas que al entrenar aunque los datos traigan categorías nuevas o vacías
+    assert matriz.shape == (2, len(esquema.nombres_columnas()))
+    fila = dict(zip(esquema.nombres_columnas(), matriz.toarray()[0]))
+    assert fila["ubicación_CDMX"] == fila["ubicación_Puebla"] == 0
+    assert fila["producto_Ropa"] == fila["método_pago_Tarjeta"] == fila["dispositivo_PC"] == 1
+    fila = dict(zip(esquema.nombres_columnas(), matriz.toarray()[1]))
+    assert fila["producto_Ropa"] == fila["producto_Electrónica"] == 0
+    assert fila["método_pago_Tarjeta"] == fila["método_pago_PayPal"] == 0
+    assert matriz.nnz == 3 + 2
+
+
+def test_no_depende_del_orden_de_las_filas():
+    directo = EsquemaCategorico().ajustar(ENTRENAMIENTO)
+    invertido = EsquemaCategorico().ajustar(ENTRENAMIENTO.iloc[::-1])
+    assert directo.a_dict() == invertido.a_dict()
+
+
+def test_sin_ajustar():
+    esquema = EsquemaCategorico()
+    assert not esquema.ajustado
+    with pytest.raises(ValueError):
+        esquema.transformar(ENTRENAMIENTO)
+
+
+def test_guardar_y_cargar(tmp_path):
+    esquema = EsquemaCategorico().ajustar(ENTRENAMIENTO)
+    ruta = str(tmp_path / "esquema.json")
+    esquema.guardar(ruta)
+    cargado = EsquemaCategorico.cargar(ruta)
+    assert cargado.ajustado
+    assert cargado.nombres_columnas() == esquema.nombres_columnas()
+    assert (cargado.transformar(ENTRENAMIENTO) != esquema.transformar(ENTRENAMIENTO)).nnz == 0
+    assert EsquemaCategorico.desde_dict(esquema.a_dict()).a_dict() == esquema.a_dict()
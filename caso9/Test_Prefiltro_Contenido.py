@@ -0,0 +1,74 @@
+# Test_Prefiltro_Contenido.py
+#   python -m pytest -q Test_Prefiltro_Contenido.py
+import random
+
+from prefiltro_contenido import AhoCorasick, PrefiltroContenido
+
+
+def busqueda_directa(terminos, texto):
+    """Todas las apariciones (posición, término), buscando cada término por separado."""
+    return sorted((i, termino) for termino in terminos
+                  for i in range(len(texto) - len(termino) + 1) if texto.startswith(termino, i))
+
+
+def test_coincidencias_traslapadas():
+    automata = AhoCorasick(["he", "she", "his", "hers"], palabras_completas=False)
+    assert sorted(automata.buscar("ushers")) == [(1, "she"), (2, "he"), (2, "hers")]
+
+
+def test_igual_que_buscar_cada_termino():
+    azar = random.Random(5)
+    terminos = sorted({"".join(azar.choice("abc") for _ in range(azar.randint(1, 4))) for _ in range(15)})
+    automata = AhoCorasick(terminos, palabras_completas=False)
+    for _ in range(200):
+        texto = "".join(azar.choice("abcd") for _ in range(azar.randint(0, 40)))
+        assert sorted(automata.buscar(texto)) == busqueda_directa(terminos, texto)
+
+
+def test_sin_distinguir_mayusculas():
+    automata = AhoCorasick(["SQL Injection"])
+    assert automata.buscar("Possible sql INJECTION here") == [(9, "sql injection")]
+
+
+def test_palabras_completas():
+    automata = AhoCorasick(["hack", "malware"])
+    assert automata.buscar("hackathon") == []
+    assert automata.buscar("antimalware") == []
+    assert automata.buscar("hack") == [(0, "hack")]
+    assert automata.buscar("hack, then malware.") == [(0, "hack"), (11, "malware")]
+    assert automata.buscar("(malware)") == [(1, "malware")]
+    assert AhoCorasick(["hack"], palabras_completas=False).buscar("hackathon") == [(0, "hack")]
+
+
+def test_limite_solo_en_extremos_alfanumericos():
+    # "<script" empieza con un símbolo: puede ir pegado a texto a la izquierda, no a la derecha
+    automata = AhoCorasick(["<script"])
+    assert automata.buscar("x<script>") == [(1, "<script")]
+    assert automata.buscar("<scripts") == []
+
+
+def test_acentos_cuentan_como_letras():
+    automata = AhoCorasick(["intrusión"])
+    assert automata.buscar("Intrusión detectada") == [(0, "intrusión")]
+    assert automata.buscar("intrusiónes") == []
+
+
+def test_prefiltro_decisiones():
+    prefiltro = PrefiltroContenido()
+    assert prefiltro.clasificar("Intrusion attempt from IP 10.0.0.1") == 1
+    # Un término sospechoso gana aunque también haya uno normal
+    assert prefiltro.clasificar("User purchased item; malware found") == 1
+    assert prefiltro.clasificar("User purchased a lamp") == 0
+    assert prefiltro.clasificar("Producto: lámpara de escritorio") is None
+    assert prefiltro.clasificar("Exploits for everyone") is None  # "exploit" no es palabra completa aquí
+
+    datos = prefiltro.snapshot()
+    assert (datos["total"], datos["rechazados"], datos["aceptados"], datos["al_modelo"]) == (5, 2, 1, 2)
+    assert datos["tasa_aciertos"] == 3 / 5
+
+
+def test_prefiltro_con_listas_propias():
+    prefiltro = PrefiltroContenido(sospechosos=["Oferta falsa"], normales=["envío gratis"])
+    assert prefiltro.clasificar("OFERTA FALSA con envío gratis") == 1
+    assert prefiltro.clasificar("Envío gratis") == 0
+    assert PrefiltroContenido().snapshot()["tasa_aciertos"] == 0.0
@@ -0,0 +1,154 @@
+# Test_Puntuar_Lotes.py
+#   python -m pytest -q Test_Puntuar_Lotes.py
+import argparse
+import os
+import random
+
+import pytest
+
+from esquema_fraude import EsquemaCategorico
+from puntuar_lotes import directorio_trabajo, dividir_en_fragmentos, leer_encabezado, puntuar
+from skealearningmodulo9 import load_logs, train_and_save
+from vulnerabilidadpractica9 import cargar_datos, entrenar_modelo, guardar_modelo
+
+LINEAS = ["Intrusion attempt from IP 10.0.{}.{}".format(i % 7, i) if i % 3 == 0 else
+          "User login from IP 192.168.{}.{}".format(i % 5, i) for i in range(3000)]
+
+
+def argumentos(tipo, entrada, salida, modelo, **opciones):
+    valores = dict(tipo=tipo, entrada=entrada, salida=salida, modelo=modelo, procesos=2, fragmentos=None,
+                   encoding="utf-8", trabajo=None, reiniciar=False, conservar=False)
+    valores.update(opciones)
+    return argparse.Namespace(**valores)
+
+
+@pytest.fixture
+def registros(tmp_path):
+    """(archivo de registros, artefacto del modelo de logs) en un directorio temporal."""
+    entrada = tmp_path / "registros.log"
+    entrada.write_text("\n".join(LINEAS) + "\n", encoding="utf-8")
+    modelo = str(tmp_path / "modelo_logs.joblib")
+    train_and_save(load_logs("logs.txt"), modelo, version="prueba")
+    return str(entrada), modelo
+
+
+def leer(ruta):
+    with open(ruta, "rb") as archivo:
+        return archivo.read()
+
+
+@pytest.mark.parametrize("fragmentos", [1, 3, 16, 1000])
+def test_fragmentos_cubren_el_archivo_por_lineas(tmp_path, fragmentos):
+    ruta = tmp_path / "datos.csv"
+    ruta.write_text("a,b\n" + "".join("{},{}\n".format(i, "x" * (i % 13)) for i in range(500)), encoding="utf-8")
+    contenido = leer(str(ruta))
+    encabezado, inicio = leer_encabezado(str(ruta))
+    assert encabezado == b"a,b\n"
+
+    rangos = dividir_en_fragmentos(str(ruta), fragmentos, inicio)
+    assert rangos[0][0] == inicio and rangos[-1][1] == len(contenido)
+    assert all(fin == siguiente for (_, fin), (siguiente, _) in zip(rangos, rangos[1:]))
+    assert all(contenido[fin - 1:fin] == b"\n" for _, fin in rangos)
+    assert len(rangos) <= fragmentos
+
+
+def test_archivo_sin_salto_final(tmp_path):
+    ruta = tmp_path / "datos.log"
+    ruta.write_bytes(b"uno\ndos\ntres")
+    rangos = dividir_en_fragmentos(str(ruta), 2)
+    assert b"".join(leer(str(ruta))[i:f] for i, f in rangos) == b"uno\ndos\ntres"
+
+
+def test_resultado_no_depende_de_procesos_ni_fragmentos(tmp_path, registros):
+    entrada, modelo = registros
+    salidas = []
+    for procesos, fragmentos in ((1, 1), (2, 5), (3, 17)):
+        salida = str(tmp_path / "salida-{}-{}.tsv".format(procesos, fragmentos))
+        filas, _ = puntuar(argumentos("logs", entrada, salida, modelo, procesos=procesos, fragmentos=fragmentos))
+        assert filas == len(LINEAS)
+        assert not os.path.exists(salida + ".partes")
+        salidas.append(leer(salida))
+    assert salidas[0] == salidas[1] == salidas[2]
+    lineas = salidas[0].decode("utf-8").splitlines()
+    assert [linea.split("\t", 1)[1] for linea in lineas] == LINEAS
+    assert lineas[0].startswith("1\t") and lineas[1].startswith("0\t")
+
+
+def test_reanudar_con_otro_numero_de_procesos(tmp_path, registros, capsys):
+    entrada, modelo = registros
+    completa = str(tmp_path / "completa.tsv")
+    puntuar(argumentos("logs", entrada, completa, modelo, procesos=1, fragmentos=1))
+
+    # Simula una ejecución interrumpida: quedan algunas partes y la salida no existe
+    salida = str(tmp_path / "salida.tsv")
+    puntuar(argumentos("logs", entrada, salida, modelo, procesos=4, fragmentos=8, conservar=True))
+    directorio = salida + ".partes"
+    os.remove(salida)
+    for i in (2, 5):
+        os.remove(os.path.join(directorio, "parte-{:05d}".format(i)))
+    conservada = os.stat(os.path.join(directorio, "parte-00000")).st_mtime_ns
+    capsys.readouterr()
+
+    filas, _ = puntuar(argumentos("logs", entrada, salida, modelo, procesos=2, conservar=True))
+    assert "Reanudando: 6 de 8 fragmentos" in capsys.readouterr().out
+    assert filas < len(LINEAS)  # Solo se puntuaron los fragmentos que faltaban
+    assert os.stat(os.path.join(directorio, "parte-00000")).st_mtime_ns == conservada
+    assert leer(salida) == leer(completa)
+
+    # Sin --conservar se borran las partes y el directorio
+    puntuar(argumentos("logs", entrada, salida, modelo, procesos=2))
+    assert leer(salida) == leer(completa)
+    assert not os.path.exists(directorio)
+
+
+def test_otra_entrada_descarta_las_partes(tmp_path, registros, capsys):
+    entrada, modelo = registros
+    salida = str(tmp_path / "salida.tsv")
+    puntuar(argumentos("logs", entrada, salida, modelo, fragmentos=4, conservar=True))
+    with open(entrada, "a", encoding="utf-8") as archivo:
+        archivo.write("Intrusion detected at 04:00AM\n")
+    capsys.readouterr()
+    filas, _ = puntuar(argumentos("logs", entrada, salida, modelo, fragmentos=4))
+    assert "Reanudando" not in capsys.readouterr().out
+    assert filas == len(LINEAS) + 1
+
+
+def test_trabajo_no_borra_archivos_del_usuario(tmp_path, registros):
+    entrada, modelo = registros
+    trabajo = tmp_path / "trabajo"
+    trabajo.mkdir()
+    (trabajo / "parte-importante.txt").write_text("del usuario", encoding="utf-8")
+    (trabajo / "plan.json").write_text("{}", encoding="utf-8")
+
+    args = argumentos("logs", entrada, str(tmp_path / "salida.tsv"), modelo, trabajo=str(trabajo), reiniciar=True)
+    puntuar(args)
+    assert os.path.dirname(directorio_trabajo(args)) == str(trabajo)
+    assert sorted(os.listdir(str(trabajo))) == ["parte-importante.txt", "plan.json"]
+
+
+def test_fraude_con_esquema(tmp_path):
+    azar = random.Random(3)
+    filas = ["ubicación,producto,método_pago,dispositivo,fraude"]
+    for _ in range(400):
+        ubicacion = azar.choice(["CDMX", "Puebla", "Monterrey"])
+        pago = azar.choice(["Tarjeta", "PayPal", "Efectivo"])
+        fraude = int(pago == "Tarjeta" and azar.random() < 0.7)
+        filas.append("{},{},{},{},{}".format(ubicacion, azar.choice(["Ropa", "Electrónica"]), pago,
+                                             azar.choice(["PC", "Móvil"]), fraude))
+    entrada = tmp_path / "compras.csv"
+    entrada.write_text("\n".join(filas) + "\n", encoding="utf-8")
+
+    esquema = EsquemaCategorico()
+    modelo, scaler = entrenar_modelo(cargar_datos(str(entrada), codificar=False), esquema)
+    ruta_modelo = str(tmp_path / "modelo_fraude.joblib")
+    guardar_modelo(modelo, scaler, ruta_modelo, esquema=esquema)
+
+    salidas = []
+    for fragmentos in (1, 6):
+        salida = str(tmp_path / "riesgos-{}.csv".format(fragmentos))
+        puntuar(argumentos("fraude", str(entrada), salida, ruta_modelo, fragmentos=fragmentos))
+        salidas.append(leer(salida))
+    assert salidas[0] == salidas[1]
+    lineas = salidas[0].decode("utf-8").splitlines()
+    assert lineas[0] == filas[0] + ",riesgo"
+    assert len(lineas) == len(filas)
@@ -0,0 +1,128 @@
+# Test_Seguimiento_Logs.py
+#   python -m pytest -q Test_Seguimiento_Logs.py
+import os
+import threading
+import time
+
+from seguimiento_logs import MetricasSeguimiento, SeguidorArchivo, seguir
+from skealearningmodulo9 import fit_features, label_logs, load_logs, train_model
+
+
+def escribir(ruta, texto, modo="a"):
+    with open(ruta, modo, encoding="utf-8") as archivo:
+        archivo.write(texto)
+
+
+def test_empieza_al_final_salvo_desde_inicio(tmp_path):
+    ruta = str(tmp_path / "app.log")
+    escribir(ruta, "vieja 1\nvieja 2\n")
+    assert list(SeguidorArchivo(ruta).leer()) == []
+    assert list(SeguidorArchivo(ruta, desde_inicio=True).leer()) == ["vieja 1", "vieja 2"]
+
+
+def test_linea_incompleta_espera_al_resto(tmp_path):
+    ruta = str(tmp_path / "app.log")
+    escribir(ruta, "")
+    seguidor = SeguidorArchivo(ruta)
+    escribir(ruta, "primera\nsegun")
+    assert list(seguidor.leer()) == ["primera"]
+    escribir(ruta, "da\n\n")
+    assert list(seguidor.leer()) == ["segunda"]
+    assert list(seguidor.leer()) == []
+
+
+def test_bloques_pequenos_dan_las_mismas_lineas(tmp_path):
+    ruta = str(tmp_path / "app.log")
+    lineas = ["Intrusion attempt {}".format(i) for i in range(500)]
+    escribir(ruta, "\n".join(lineas) + "\n")
+    assert list(SeguidorArchivo(ruta, desde_inicio=True, tam_lectura=7).leer()) == lineas
+
+
+def test_archivo_que_aun_no_existe(tmp_path):
+    ruta = str(tmp_path / "app.log")
+    seguidor = SeguidorArchivo(ruta)
+    assert list(seguidor.leer()) == []
+    escribir(ruta, "creado\n")
+    assert list(seguidor.leer()) == ["creado"]
+
+
+def test_rotacion_termina_el_anterior_y_sigue_con_el_nuevo(tmp_path):
+    ruta = str(tmp_path / "app.log")
+    escribir(ruta, "")
+    seguidor = SeguidorArchivo(ruta)
+    escribir(ruta, "antes\nsin salto")
+    os.rename(ruta, ruta + ".1")
+    escribir(ruta, "nueva 1\n")
+    # La línea sin salto del archivo rotado no se pierde ni se mezcla con la del nuevo
+    assert list(seguidor.leer()) == ["antes", "sin salto", "nueva 1"]
+    escribir(ruta + ".1", "tarde\n")
+    escribir(ruta, "nueva 2\n")
+    assert list(seguidor.leer()) == ["nueva 2"]
+
+
+def test_rotacion_sin_archivo_nuevo_todavia(tmp_path):
+    ruta = str(tmp_path / "app.log")
+    escribir(ruta, "")
+    seguidor = SeguidorArchivo(ruta)
+    escribir(ruta, "ultima\n")
+    os.rename(ruta, ruta + ".1")
+    assert list(seguidor.leer()) == ["ultima"]
+    assert list(seguidor.leer()) == []
+    escribir(ruta, "nueva\n")
+    assert list(seguidor.leer()) == ["nueva"]
+
+
+def test_truncado_vuelve_al_inicio(tmp_path):
+    ruta = str(tmp_path / "app.log")
+    escribir(ruta, "")
+    seguidor = SeguidorArchivo(ruta)
+    escribir(ruta, "uno larga\ndos larga\n")
+    assert list(seguidor.leer()) == ["uno larga", "dos larga"]
+    # copytruncate: el mismo inodo queda vacío y se sigue escribiendo desde el principio
+    escribir(ruta, "tres\n", modo="w")
+    assert list(seguidor.leer()) == ["tres"]
+    escribir(ruta, "cuatro\n")
+    assert list(seguidor.leer()) == ["cuatro"]
+
+
+def test_metricas_por_ventana():
+    reloj = [100.0]
+    metricas = MetricasSeguimiento(ventana=10.0, reloj=lambda: reloj[0])
+    metricas.registrar_lote(50, 2, 0.3)
+    reloj[0] += 5
+    metricas.registrar_lote(30, 0, 0.1)
+    assert metricas.lineas_por_segundo() == 8.0
+    reloj[0] += 6
+    assert metricas.lineas_por_segundo() == 3.0
+    datos = metricas.snapshot()
+    assert (datos["lineas"], datos["lotes"], datos["alertas"]) == (80, 2, 2)
+    assert datos["retraso_maximo_segundos"] == 0.3
+
+
+def test_seguir_clasifica_por_micro_lotes(tmp_path):
+    logs = load_logs("logs.txt")
+    vectorizer, features = fit_features(logs)
+    model = train_model(features, label_logs(logs))
+
+    ruta = str(tmp_path / "app.log")
+    escribir(ruta, "")
+    alertas = []
+    metricas = MetricasSeguimiento()
+    detener = threading.Event()
+    hilo = threading.Thread(target=seguir, args=([ruta], model, vectorizer),
+                            kwargs=dict(tam_lote=3, plazo=0.1, intervalo=0.02, metricas=metricas,
+                                        alertar=lambda r, linea: alertas.append(linea), detener=detener))
+    hilo.start()
+    try:
+        time.sleep(0.1)
+        escribir(ruta, "Intrusion attempt from IP 10.0.0.9\nUser login from IP 10.0.0.1\n"
+                       "System reboot\nIntrusion detected at 03:00AM\n")
+        limite = time.monotonic() + 5
+        while metricas.lineas < 4 and time.monotonic() < limite:
+            time.sleep(0.02)
+    finally:
+        detener.set()
+        hilo.join()
+    # Un lote completo de 3 y la línea restante al cumplirse el plazo
+    assert (metricas.lineas, metricas.lotes) == (4, 2)
+    assert alertas == ["Intrusion attempt from IP 10.0.0.9", "Intrusion detected at 03:00AM"]
@@ -0,0 +1,117 @@
+# Test_Servicio_Fraude.py
+#   python -m pytest -q Test_Servicio_Fraude.py
+import os
+import tempfile
+import threading
+import time
+
+import pytest
+
+# El modelo se carga (o se entrena con compras.csv) al importar el servicio: se indica una ruta
+# temporal antes, así las pruebas no escriben modelo_fraude.joblib en el directorio del caso
+_directorio = tempfile.mkdtemp()
+os.environ.setdefault('FRAUD_MODEL', os.path.join(_directorio, 'modelo_fraude.joblib'))
+
+import servicio_fraude
+from servicio_fraude import LoteadorFraude, app
+
+COMPRA = {'ubicación': 'CDMX', 'producto': 'Electrónica', 'método_pago': 'Tarjeta', 'dispositivo': 'Móvil'}
+
+
+class ModeloLento:
+    """Envuelve el modelo real y tarda `segundos` en cada predict_proba."""
+
+    def __init__(self, modelo, segundos):
+        self.modelo = modelo
+        self.segundos = segundos
+
+    def predict_proba(self, datos):
+        time.sleep(self.segundos)
+        return self.modelo.predict_proba(datos)
+
+
+def loteador_con(segundos=0.0, **opciones):
+    base = servicio_fraude.loteador
+    modelo = ModeloLento(base.modelo, segundos) if segundos else base.modelo
+    return LoteadorFraude(modelo, base.scaler, base.esquema, **opciones)
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def test_score_una_compra(client):
+    respuesta = client.post('/score', json=COMPRA)
+    assert respuesta.status_code == 200
+    datos = respuesta.get_json()
+    assert datos['riesgo'] in ('Muy alto', 'Alto', 'Medio', 'Bajo', 'Muy bajo')
+    assert 0.0 <= datos['prob_fraude'] <= 1.0
+
+
+def test_score_varias_compras_y_categoria_nueva(client):
+    compras = [COMPRA, dict(COMPRA, ubicación='Ciudad nueva')]
+    respuesta = client.post('/score', json=compras)
+    assert respuesta.status_code == 200
+    assert len(respuesta.get_json()['resultados']) == 2
+
+
+def test_score_valida_el_cuerpo(client):
+    assert client.post('/score', json={'ubicación': 'CDMX'}).status_code == 400
+    assert client.post('/score', json=[]).status_code == 400
+    assert client.post('/score', json=[COMPRA] * (app.config['FRAUD_MAX_BATCH'] + 1)).status_code == 400
+    assert client.post('/score', data='no es json').status_code == 400
+
+
+def test_503_si_se_excede_el_presupuesto(client, monkeypatch):
+    lento = loteador_con(segundos=0.3)
+    monkeypatch.setattr(servicio_fraude, 'loteador', lento)
+    monkeypatch.setitem(app.config, 'FRAUD_LATENCY_BUDGET_MS', 50)
+
+    respuesta = client.post('/score', json=COMPRA)
+    assert respuesta.status_code == 503
+    assert 'presupuesto' in respuesta.get_json()['error']
+    assert lento.snapshot()['agotadas'] == 1
+
+    # Con presupuesto suficiente la misma solicitud sí se responde
+    monkeypatch.setitem(app.config, 'FRAUD_LATENCY_BUDGET_MS', 2000)
+    assert client.post('/score', json=COMPRA).status_code == 200
+
+
+def test_solicitud_vencida_no_se_evalua():
+    lento = loteador_con(segundos=0.2, espera_maxima=0)
+    primera = lento.enviar([COMPRA])  # Ocupa al trabajador
+    time.sleep(0.05)
+    with pytest.raises(TimeoutError):
+        lento.evaluar([COMPRA], timeout=0.01)
+    primera.result(2)
+    time.sleep(0.3)
+    # La segunda se canceló antes de entrar a un lote: solo hubo una llamada al modelo
+    assert lento.snapshot()['lotes'] == 1
+
+
+def test_solicitudes_concurrentes_comparten_lote():
+    loteador = loteador_con(segundos=0.05, tam_maximo=32, espera_maxima=0.02)
+    resultados = []
+
+    def evaluar():
+        resultados.append(loteador.evaluar([COMPRA], timeout=5))
+
+    hilos = [threading.Thread(target=evaluar) for _ in range(16)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    datos = loteador.snapshot()
+    assert len(resultados) == 16 and datos['filas'] == 16
+    assert datos['lotes'] < 16
+    assert sum(datos['histograma_lote'].values()) == datos['lotes']
+
+
+def test_metrics(client):
+    client.post('/score', json=COMPRA)
+    assert client.get('/metrics').get_json()['solicitudes'] >= 1
+    texto = client.get('/metrics?format=prometheus').get_data(as_text=True)
+    assert 'fraude_lote_filas_bucket{le="+Inf"}' in texto
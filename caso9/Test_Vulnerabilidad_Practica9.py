@@ -0,0 +1,48 @@
+# Test_Vulnerabilidad_Practica9.py
+#   python -m pytest -q Test_Vulnerabilidad_Practica9.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmark_riesgo import asignar_riesgo_lazo
+from vulnerabilidadpractica9 import ETIQUETAS_RIESGO, asignar_riesgo, contar_riesgos, predecir_riesgo
+
+
+def test_igual_que_el_lazo_original():
+    probabilidades = np.random.default_rng(0).random(10000)
+    probabilidades[:6] = (0.0, 0.3, 0.5, 0.7, 0.9, 1.0)
+    assert list(asignar_riesgo(probabilidades)) == asignar_riesgo_lazo(probabilidades)
+
+
+def test_empates_quedan_en_el_intervalo_inferior():
+    riesgos = asignar_riesgo([0.3, 0.30001, 0.9, 0.90001])
+    assert list(riesgos) == ["Muy alto", "Alto", "Bajo", "Muy bajo"]
+    assert list(riesgos.categories) == list(ETIQUETAS_RIESGO)
+
+
+def test_cortes_configurables():
+    riesgos = asignar_riesgo([0.1, 0.6], cortes=(0.5,), etiquetas=("Revisar", "Aprobar"))
+    assert list(riesgos) == ["Revisar", "Aprobar"]
+    with pytest.raises(ValueError):
+        asignar_riesgo([0.1], cortes=(0.5,))
+    with pytest.raises(ValueError):
+        asignar_riesgo([0.1], cortes=(0.7, 0.5), etiquetas=("a", "b", "c"))
+
+
+def test_contar_incluye_niveles_vacios():
+    conteos = contar_riesgos(asignar_riesgo([0.95, 0.99, 0.1]))
+    assert conteos == {"Muy alto": 1, "Alto": 0, "Medio": 0, "Bajo": 0, "Muy bajo": 2}
+
+
+def test_predecir_riesgo_usa_la_clase_sin_fraude():
+    class ModeloFijo:
+        def predict_proba(self, datos):
+            prob = np.asarray(datos)[:, 0]
+            return np.column_stack([prob, 1 - prob])
+
+    class SinEscalar:
+        def transform(self, datos):
+            return datos
+
+    datos = pd.DataFrame({"prob": [0.95, 0.6, 0.2], "fraude": [0, 0, 1]})
+    assert list(predecir_riesgo(ModeloFijo(), SinEscalar(), datos)) == ["Muy bajo", "Medio", "Muy alto"]
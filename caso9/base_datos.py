@@ -0,0 +1,116 @@
+# base_datos.py
+# Acceso compartido a la base SQLite de productos para las aplicaciones Kivy (carrito y paneles).
+#
+# - Una conexión de larga vida por hilo (threading.local): abrir la conexión y leer el esquema
+#   ya no se repite en cada clic, y un importador en segundo plano usa su propia conexión.
+# - WAL con synchronous=NORMAL: las lecturas no bloquean a las escrituras (ni al revés) y un
+#   commit no espera un fsync; solo el checkpoint del WAL lo hace.
+# - Sentencias preparadas: sqlite3 guarda en cada conexión las últimas `cached_statements`
+#   sentencias compiladas por su texto, así que las consultas se escriben como constantes.
+# - Escrituras agrupadas: transaccion() abre una sola transacción para varias operaciones.
+#
+# Copia compartida: caso6/base_datos.py y caso9/base_datos.py deben ser iguales
+# (lo comprueba Test_Copias.py en la raíz del repositorio).
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+RUTA_DB = 'productos.db'
+
+# Se aplican al abrir cada conexión
+PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('cache_size', -8000),     # Negativo = KiB: ~8 MB de páginas en memoria por conexión
+    ('temp_store', 'MEMORY'),
+    ('busy_timeout', 5000),    # Milisegundos que espera si otra conexión está escribiendo
+)
+
+
+class BaseDatos:
+    """
+    Conexiones por hilo a un archivo SQLite.
+
+    Args:
+        ruta (str): Archivo de la base de datos.
+        cached_statements (int): Sentencias preparadas que guarda cada conexión.
+    """
+
+    def __init__(self, ruta=RUTA_DB, cached_statements=256):
+        self.ruta = ruta
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._conexiones = []
+        self._candado = threading.Lock()
+
+    def conexion(self):
+        """Conexión del hilo actual (se abre la primera vez)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # isolation_level=None: cada sentencia suelta es su propia transacción y las
+            # transacciones de varias sentencias se abren explícitamente con transaccion()
+            conn = sqlite3.connect(self.ruta, isolation_level=None, check_same_thread=False,
+                                   cached_statements=self.cached_statements)
+            for nombre, valor in PRAGMAS:
+                conn.execute('PRAGMA {}={}'.format(nombre, valor))
+            self._local.conn = conn
+            with self._candado:
+                self._conexiones.append(conn)
+        return conn
+
+    @contextmanager
+    def transaccion(self):
+        """
+        Agrupa varias escrituras en una transacción: todas se confirman juntas al salir del
+        bloque, o ninguna si ocurre una excepción. Dentro de otra transacción se une a ella.
+        """
+        conn = self.conexion()
+        if conn.in_transaction:
+            yield conn
+            return
+        # IMMEDIATE toma el candado de escritura al inicio: evita que dos hilos lean y luego
+        # choquen al intentar escribir
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def consultar(self, sql, parametros=()):
+        """Ejecuta una consulta y regresa todas las filas."""
+        return self.conexion().execute(sql, parametros).fetchall()
+
+    def consultar_uno(self, sql, parametros=()):
+        """Ejecuta una consulta y regresa la primera fila (o None)."""
+        return self.conexion().execute(sql, parametros).fetchone()
+
+    def ejecutar(self, sql, parametros=()):
+        """Ejecuta una escritura (en su propia transacción si no hay una abierta) y regresa el cursor."""
+        return self.conexion().execute(sql, parametros)
+
+    def ejecutar_varios(self, sql, filas):
+        """Ejecuta la misma escritura para muchas filas en una sola transacción."""
+        with self.transaccion() as conn:
+            return conn.executemany(sql, filas)
+
+    def cerrar(self):
+        """Cierra las conexiones de todos los hilos."""
+        with self._candado:
+            conexiones, self._conexiones = self._conexiones, []
+        for conn in conexiones:
+            conn.close()
+        self._local = threading.local()
+
+
+_bases = {}
+_candado_bases = threading.Lock()
+
+
+def obtener_base(ruta=RUTA_DB):
+    """Regresa la BaseDatos compartida de un archivo (una por ruta en todo el proceso)."""
+    with _candado_bases:
+        if ruta not in _bases:
+            _bases[ruta] = BaseDatos(ruta)
+        return _bases[ruta]
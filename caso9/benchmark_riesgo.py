@@ -0,0 +1,68 @@
+# benchmark_riesgo.py
+# Compara la asignación de riesgo con el lazo if/elif original contra asignar_riesgo
+# (np.searchsorted) sobre probabilidades sintéticas.
+#
+# Ejemplo:
+#   python benchmark_riesgo.py --filas 10000000
+import argparse
+import time
+
+import numpy as np
+
+from vulnerabilidadpractica9 import asignar_riesgo, contar_riesgos
+
+
+def asignar_riesgo_lazo(prob_sin_fraude):
+    """Versión original: recorre cada probabilidad con una cadena de if/elif."""
+    etiquetas_riesgo = []
+    for prob in prob_sin_fraude:
+        if prob > 0.9:
+            riesgo = "Muy bajo"
+        elif prob > 0.7:
+            riesgo = "Bajo"
+        elif prob > 0.5:
+            riesgo = "Medio"
+        elif prob > 0.3:
+            riesgo = "Alto"
+        else:
+            riesgo = "Muy alto"
+        etiquetas_riesgo.append(riesgo)
+    return etiquetas_riesgo
+
+
+def medir(funcion, *args, repeticiones=1):
+    """Regresa (resultado, mejor tiempo en segundos)."""
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion(*args)
+        transcurrido = time.perf_counter() - inicio
+        mejor = transcurrido if mejor is None else min(mejor, transcurrido)
+    return resultado, mejor
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de la asignación de riesgo")
+    parser.add_argument("--filas", type=int, default=10_000_000)
+    parser.add_argument("--repeticiones", type=int, default=3, help="repeticiones de la versión vectorizada")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    probabilidades = np.random.default_rng(args.semilla).random(args.filas)
+    # Incluir los cortes exactos para comprobar que los empates caen en el mismo intervalo
+    probabilidades[:4] = (0.3, 0.5, 0.7, 0.9)
+
+    vectorizado, t_vectorizado = medir(asignar_riesgo, probabilidades, repeticiones=args.repeticiones)
+    lazo, t_lazo = medir(asignar_riesgo_lazo, probabilidades)
+
+    if list(vectorizado) != lazo:
+        raise SystemExit("Error: las dos versiones no asignan las mismas etiquetas")
+
+    print(f"Filas: {args.filas:,}")
+    print(f"Lazo if/elif:         {t_lazo:8.3f} s")
+    print(f"np.searchsorted:      {t_vectorizado:8.3f} s")
+    print(f"Aceleración:          {t_lazo / t_vectorizado:8.1f}x")
+    print(f"Memoria del resultado: lista {len(lazo) * 8 / 1e6:.0f} MB (solo apuntadores) vs "
+          f"categórico {vectorizado.nbytes / 1e6:.0f} MB")
+    for riesgo, cantidad in contar_riesgos(vectorizado).items():
+        print(f"  {riesgo}: {cantidad:,}")
@@ -0,0 +1,178 @@
+# cargador_compras.py
+# Lectura de compras.csv (y archivos con el mismo formato) para el modelo de fraude.
+#
+# - La codificación se detecta una sola vez con el primer bloque del archivo (BOM, UTF-8 o
+#   latin1), en lugar de leer todo el archivo, fallar y volver a leerlo con otra codificación.
+#   Se lee sin reemplazar bytes: si después del primer bloque aparece texto en latin1 (archivos
+#   que mezclan ambas), se relee decodificando como latin1 solo los bytes que no son UTF-8.
+# - Las variables categóricas se leen como dtype category y 'fraude' como int8: cada valor ocupa
+#   1 byte (un código) en lugar de un objeto str de Python.
+# - iterar_compras entrega el archivo por partes para procesar archivos que no caben en memoria.
+# - leer_compras puede guardar una copia en formato columnar (Parquet/Feather, requieren pyarrow;
+#   .pkl no requiere nada extra) y usarla mientras el CSV no cambie.
+import codecs
+import itertools
+import os
+
+import numpy as np
+import pandas as pd
+
+from esquema_fraude import COLUMNAS
+
+TAM_BLOQUE = 64 * 1024
+TIPOS = {columna: "category" for columna in COLUMNAS}
+VALORES_FRAUDE = {"no": 0, "sí": 1, "si": 1, "0": 0, "1": 1}
+ERRORES_MIXTO = "cargador_compras.latin1"
+
+
+def _como_latin1(error):
+    # Los bytes que no son UTF-8 válido se decodifican como latin1 (cualquier byte es válido)
+    return error.object[error.start:error.end].decode("latin1"), error.end
+
+
+codecs.register_error(ERRORES_MIXTO, _como_latin1)
+
+
+def detectar_encoding(ruta, tam_bloque=TAM_BLOQUE):
+    """
+    Detecta la codificación de un archivo leyendo solo su primer bloque.
+
+    Args:
+        ruta (str): Archivo a revisar.
+        tam_bloque (int): Bytes que se leen.
+
+    Returns:
+        str: 'utf-8-sig' si tiene BOM, 'utf-8' si el bloque es UTF-8 válido, si no 'latin1'.
+    """
+    with open(ruta, "rb") as archivo:
+        bloque = archivo.read(tam_bloque)
+    if bloque.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        # final=False: un carácter cortado al final del bloque no cuenta como error
+        codecs.getincrementaldecoder("utf-8")().decode(bloque, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "latin1"
+
+
+def normalizar_fraude(serie):
+    """
+    Convierte la columna 'fraude' a int8 (0/1); acepta números o 'no'/'sí'/'si'.
+    Los valores no reconocidos se toman como 0, igual que en cargar_datos.
+    """
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.fillna(0).astype(np.int8)
+    texto = serie.astype(str).str.strip().str.lower()
+    return texto.map(VALORES_FRAUDE).fillna(0).astype(np.int8)
+
+
+def _leer_csv(ruta, encoding, **opciones):
+    # Errores estrictos: un byte inválido después del primer bloque lanza UnicodeDecodeError
+    # en lugar de convertirse en un carácter de reemplazo
+    return pd.read_csv(ruta, encoding=encoding, dtype=TIPOS, **opciones)
+
+
+def _abrir_mixto(ruta, encoding):
+    # El lector C de pandas decodifica UTF-8 por su cuenta, así que el manejador de errores solo
+    # se aplica a través de un archivo de texto de Python (más lento; solo para estos archivos)
+    print(f"'{ruta}' tiene bytes que no son {encoding}; se leen como latin1.")
+    return open(ruta, encoding=encoding, errors=ERRORES_MIXTO, newline="")
+
+
+def _puede_mezclar(encoding):
+    return encoding.replace("_", "-").lower() in ("utf-8", "utf8", "utf-8-sig")
+
+
+def _preparar(datos):
+    if "fraude" in datos.columns:
+        datos["fraude"] = normalizar_fraude(datos["fraude"])
+    return datos
+
+
+def iterar_compras(ruta, tam_parte=100_000, encoding=None):
+    """
+    Lee un CSV de compras por partes.
+
+    Args:
+        ruta (str): Archivo CSV.
+        tam_parte (int): Filas por parte.
+        encoding (str): Codificación; si es None se detecta con el primer bloque.
+
+    Yields:
+        pd.DataFrame: Parte del archivo con los tipos de TIPOS y 'fraude' como int8. Las
+        categorías de cada parte son solo las que aparecen en ella; para codificar con columnas
+        fijas use un EsquemaCategorico.
+    """
+    encoding = encoding or detectar_encoding(ruta)
+    entregadas = 0
+    try:
+        with _leer_csv(ruta, encoding, chunksize=tam_parte) as partes:
+            for parte in partes:
+                yield _preparar(parte)
+                entregadas += 1
+    except UnicodeDecodeError:
+        if not _puede_mezclar(encoding):
+            raise
+        # Las partes ya entregadas eran UTF-8 válido y se decodifican igual al releer; se
+        # saltan para continuar justo donde apareció el primer byte inválido
+        with _abrir_mixto(ruta, encoding) as archivo, \
+                pd.read_csv(archivo, dtype=TIPOS, chunksize=tam_parte) as partes:
+            for parte in itertools.islice(partes, entregadas, None):
+                yield _preparar(parte)
+
+
+def _leer_cache(ruta_cache):
+    if ruta_cache.endswith(".parquet"):
+        return pd.read_parquet(ruta_cache)
+    if ruta_cache.endswith(".feather"):
+        return pd.read_feather(ruta_cache)
+    return pd.read_pickle(ruta_cache)
+
+
+def _escribir_cache(datos, ruta_cache):
+    temporal = ruta_cache + ".tmp"
+    if ruta_cache.endswith(".parquet"):
+        datos.to_parquet(temporal, index=False)
+    elif ruta_cache.endswith(".feather"):
+        datos.reset_index(drop=True).to_feather(temporal)
+    else:
+        datos.to_pickle(temporal)
+    os.replace(temporal, ruta_cache)
+
+
+def leer_compras(ruta, encoding=None, cache=None):
+    """
+    Lee un CSV de compras completo con tipos compactos.
+
+    Args:
+        ruta (str): Archivo CSV.
+        encoding (str): Codificación; si es None se detecta con el primer bloque.
+        cache (str): Archivo columnar (.parquet, .feather o .pkl). Si existe y es más reciente
+            que el CSV se lee de ahí; si no, se crea después de leer el CSV. Parquet y Feather
+            requieren pyarrow; si no está instalado se lee el CSV sin guardar la copia.
+
+    Returns:
+        pd.DataFrame: Datos con los tipos de TIPOS y 'fraude' como int8.
+    """
+    if cache and os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(ruta):
+        try:
+            return _leer_cache(cache)
+        except ImportError:
+            print(f"No se puede leer la copia '{cache}' (requiere pyarrow); se lee el CSV.")
+
+    encoding = encoding or detectar_encoding(ruta)
+    try:
+        datos = _leer_csv(ruta, encoding)
+    except UnicodeDecodeError:
+        if not _puede_mezclar(encoding):
+            raise
+        with _abrir_mixto(ruta, encoding) as archivo:
+            datos = pd.read_csv(archivo, dtype=TIPOS)
+    datos = _preparar(datos)
+    if cache:
+        try:
+            _escribir_cache(datos, cache)
+        except ImportError:
+            print(f"No se guardó la copia '{cache}' (requiere pyarrow).")
+    return datos
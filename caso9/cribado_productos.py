@@ -0,0 +1,180 @@
+# cribado_productos.py
+# Cribado de productos sin interfaz: valida, revisa el contenido y guarda muchos productos a la vez
+# (por ejemplo al importar un catálogo completo). El panel de Kivy usa las mismas funciones para
+# un solo producto.
+#
+# En lugar de clasificar producto por producto:
+# - los textos que el prefiltro no decide se vectorizan juntos en una sola matriz dispersa y se
+#   clasifican con una sola llamada al modelo;
+# - los productos aceptados se insertan con executemany en una sola transacción.
+#
+# Ejemplo:
+#   python cribado_productos.py catalogo.csv --reporte reporte.csv
+#   (el CSV lleva las columnas nombre, descripcion, precio)
+import argparse
+import csv
+import re
+import time
+
+from base_datos import obtener_base
+from esquema_productos import SQL_INSERTAR, a_centavos, migrar
+from modelo_artefacto import ModeloPerezoso
+from prefiltro_contenido import PrefiltroContenido
+
+RUTA_DB = 'productos.db'
+
+# Patrón del nombre compilado una sola vez al importar, no en cada validación
+PATRON_NOMBRE = re.compile(r'^[\w\s.,;:!?()-]+$')
+
+MOTIVO_SOSPECHOSO = 'Contenido sospechoso detectado.'
+
+# ===== MODELO DE MACHINE LEARNING PARA DETECCIÓN DE CONTENIDO SOSPECHOSO =====
+# El modelo se entrena una sola vez y se guarda en modelo_contenido.joblib; después solo se carga,
+# sin importar scikit-learn ni entrenar de nuevo.
+
+# Datos de entrenamiento para el modelo (simulados para este ejercicio)
+ejemplos_logs = [
+    "Intrusion from unknown IP",
+    "Product added to cart",
+    "System alert Intrusion",
+    "New user registration",
+    "Intrusion detected",
+    "User purchased item"
+]
+etiquetas = [1, 0, 1, 0, 1, 0]  # 1: sospechoso, 0: normal
+
+def entrenar_modelo_contenido():
+    """Entrena el modelo; solo se llama cuando todavía no existe el artefacto guardado."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+
+    # Creamos un vectorizador que convierte texto en vectores numéricos usando TF-IDF
+    vectorizer = TfidfVectorizer()
+
+    # Transformamos los ejemplos de logs en vectores numéricos
+    X = vectorizer.fit_transform(ejemplos_logs)
+
+    # Creamos el modelo de regresión logística para clasificación binaria
+    modelo_ml = LogisticRegression()
+
+    # Entrenamos el modelo con los datos de entrada (X) y las etiquetas (etiquetas)
+    modelo_ml.fit(X, etiquetas)
+
+    return vectorizer, modelo_ml, ejemplos_logs, etiquetas
+
+# Se carga la primera vez que se usa (o con precargar_en_segundo_plano)
+modelo_contenido = ModeloPerezoso('modelo_contenido.joblib', entrenar=entrenar_modelo_contenido)
+# Reglas por términos conocidos: deciden los casos obvios sin pasar por el modelo
+prefiltro = PrefiltroContenido()
+
+# ===== BASE DE DATOS =====
+def init_db(ruta_db=RUTA_DB):
+    """Crea la tabla si no existe o la actualiza al esquema más reciente (ver esquema_productos.py)."""
+    migrar(obtener_base(ruta_db))
+
+# ===== CRIBADO =====
+def validar_producto(nombre, descripcion, precio):
+    """
+    Valida los campos de un producto.
+
+    Args:
+        nombre (str): Nombre del producto.
+        descripcion (str): Descripción.
+        precio (str): Precio como texto.
+
+    Returns:
+        str: Motivo del rechazo, o None si el producto es válido.
+    """
+    if not nombre or not PATRON_NOMBRE.match(nombre):
+        return 'Nombre inválido: vacío o contiene caracteres no permitidos.'
+    try:
+        if a_centavos(precio) <= 0:
+            raise ValueError
+    except ValueError:
+        return 'Precio inválido: debe ser numérico y mayor que 0.'
+    if not descripcion:
+        return 'La descripción no puede estar vacía.'
+    return None
+
+def cribar_productos(productos, ruta_db=RUTA_DB, guardar=True):
+    """
+    Valida, revisa el contenido y guarda un lote de productos.
+
+    Args:
+        productos (iterable[tuple]): Filas (nombre, descripcion, precio).
+        ruta_db (str): Base de datos SQLite.
+        guardar (bool): Si es False solo genera el reporte (simulación).
+
+    Returns:
+        dict: 'resultados' (una entrada por fila con índice, nombre, aceptado y motivo),
+        'aceptados', 'rechazados', 'al_modelo' (filas que necesitaron el modelo), 'segundos'
+        y 'filas_por_segundo'.
+    """
+    inicio = time.perf_counter()
+    resultados = []
+    ambiguos = []  # Índices de las filas que decide el modelo
+    for indice, (nombre, descripcion, precio) in enumerate(productos):
+        nombre, descripcion, precio = (str(valor or '').strip() for valor in (nombre, descripcion, precio))
+        motivo = validar_producto(nombre, descripcion, precio)
+        resultado = {'indice': indice, 'nombre': nombre, 'descripcion': descripcion, 'precio': precio,
+                     'aceptado': motivo is None, 'motivo': motivo}
+        resultados.append(resultado)
+        if motivo is None:
+            decision = prefiltro.clasificar(nombre + " " + descripcion)
+            if decision is None:
+                ambiguos.append(indice)
+            elif decision == 1:
+                resultado['aceptado'], resultado['motivo'] = False, MOTIVO_SOSPECHOSO
+
+    if ambiguos:
+        # Una sola matriz dispersa y una sola predicción para todos los textos ambiguos
+        textos = [resultados[i]['nombre'] + " " + resultados[i]['descripcion'] for i in ambiguos]
+        for indice, prediccion in zip(ambiguos, modelo_contenido.predecir(textos)):
+            if prediccion == 1:
+                resultados[indice]['aceptado'], resultados[indice]['motivo'] = False, MOTIVO_SOSPECHOSO
+
+    # El precio ya pasó validar_producto; se guarda como entero en centavos
+    aceptados = [(r['nombre'], r['descripcion'], a_centavos(r['precio'])) for r in resultados if r['aceptado']]
+    if guardar and aceptados:
+        # Una sola transacción: se guardan todos o ninguno
+        obtener_base(ruta_db).ejecutar_varios(SQL_INSERTAR, aceptados)
+
+    segundos = time.perf_counter() - inicio
+    return {
+        'resultados': resultados,
+        'aceptados': len(aceptados),
+        'rechazados': len(resultados) - len(aceptados),
+        'al_modelo': len(ambiguos),
+        'segundos': segundos,
+        'filas_por_segundo': len(resultados) / segundos if segundos else 0.0,
+    }
+
+def leer_catalogo(ruta):
+    """Lee un CSV con columnas nombre, descripcion, precio y regresa la lista de filas."""
+    with open(ruta, newline='', encoding='utf-8-sig') as archivo:
+        return [(fila.get('nombre'), fila.get('descripcion'), fila.get('precio')) for fila in csv.DictReader(archivo)]
+
+def escribir_reporte(ruta, reporte):
+    with open(ruta, 'w', newline='', encoding='utf-8') as archivo:
+        escritor = csv.writer(archivo)
+        escritor.writerow(['fila', 'nombre', 'aceptado', 'motivo'])
+        for r in reporte['resultados']:
+            escritor.writerow([r['indice'] + 1, r['nombre'], 'sí' if r['aceptado'] else 'no', r['motivo'] or ''])
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Cribado e importación de productos por lotes')
+    parser.add_argument('catalogo', help='CSV con columnas nombre, descripcion, precio')
+    parser.add_argument('--db', default=RUTA_DB, help='base de datos SQLite')
+    parser.add_argument('--reporte', help='CSV con el resultado de cada fila')
+    parser.add_argument('--simular', action='store_true', help='no guarda nada, solo genera el reporte')
+    args = parser.parse_args()
+
+    init_db(args.db)
+    reporte = cribar_productos(leer_catalogo(args.catalogo), args.db, guardar=not args.simular)
+    if args.reporte:
+        escribir_reporte(args.reporte, reporte)
+    print(f"{reporte['aceptados']} aceptados, {reporte['rechazados']} rechazados "
+          f"({reporte['al_modelo']} revisados por el modelo) en {reporte['segundos']:.3f}s "
+          f"({reporte['filas_por_segundo']:.0f} filas/s)")
+    estadisticas = prefiltro.snapshot()
+    print(f"Prefiltro: {estadisticas['tasa_aciertos']:.0%} resueltos sin el modelo")
@@ -0,0 +1,101 @@
+# esquema_fraude.py
+# Codificación one-hot estable para el modelo de fraude (vulnerabilidadpractica9).
+#
+# pd.get_dummies crea una columna por cada categoría que aparece en los datos que recibe, así que
+# dos archivos distintos pueden producir columnas distintas. EsquemaCategorico guarda las
+# categorías vistas al entrenar y siempre produce las mismas columnas en el mismo orden:
+# - una categoría que no se vio al entrenar se codifica como todo ceros en su variable;
+# - la salida es una matriz dispersa (CSR): una compra activa una sola columna por variable;
+# - el esquema se guarda en JSON, así cualquier lote (o parte de un lote) se codifica por separado
+#   sin tener que alinear columnas después.
+import json
+
+import numpy as np
+import pandas as pd
+
+COLUMNAS = ("ubicación", "producto", "método_pago", "dispositivo")
+
+
+class EsquemaCategorico:
+    """
+    Categorías de cada variable y su posición en la matriz codificada.
+
+    Args:
+        columnas (tuple): Variables categóricas que se codifican.
+        categorias (dict): Columna -> lista de categorías (por ejemplo de un esquema guardado).
+    """
+
+    def __init__(self, columnas=COLUMNAS, categorias=None):
+        self.columnas = tuple(columnas)
+        self.categorias = {columna: list(valores) for columna, valores in (categorias or {}).items()}
+
+    @property
+    def ajustado(self):
+        return all(columna in self.categorias for columna in self.columnas)
+
+    def ajustar(self, datos):
+        """
+        Registra las categorías de cada variable (ordenadas, para que el esquema no dependa del
+        orden de las filas).
+
+        Args:
+            datos (pd.DataFrame): Datos crudos con las columnas del esquema.
+
+        Returns:
+            EsquemaCategorico: El mismo esquema, ya ajustado.
+        """
+        for columna in self.columnas:
+            self.categorias[columna] = sorted(datos[columna].dropna().astype(str).unique())
+        return self
+
+    def nombres_columnas(self):
+        """Nombres de las columnas codificadas, con el formato de pd.get_dummies (variable_categoría)."""
+        return ["{}_{}".format(columna, valor) for columna in self.columnas for valor in self.categorias[columna]]
+
+    def transformar(self, datos):
+        """
+        Codifica los datos con las categorías del esquema. Las columnas que no son del esquema
+        (por ejemplo 'fraude') se ignoran.
+
+        Args:
+            datos (pd.DataFrame): Datos crudos.
+
+        Returns:
+            scipy.sparse.csr_matrix: Matriz de n_filas x len(nombres_columnas()) con valores 0/1.
+        """
+        from scipy import sparse
+
+        if not self.ajustado:
+            raise ValueError("El esquema no está ajustado; llame a ajustar() o cargue uno guardado.")
+        n = len(datos)
+        filas, columnas = [], []
+        desplazamiento = 0
+        for columna in self.columnas:
+            valores = datos[columna].astype(str).where(datos[columna].notna())
+            codigos = pd.Index(self.categorias[columna]).get_indexer(valores)
+            conocidas = codigos >= 0  # -1: categoría nueva o vacía, queda en ceros
+            filas.append(np.flatnonzero(conocidas))
+            columnas.append(codigos[conocidas].astype(np.int32) + desplazamiento)
+            desplazamiento += len(self.categorias[columna])
+        filas = np.concatenate(filas)
+        unos = np.ones(len(filas), dtype=np.float64)
+        return sparse.csr_matrix((unos, (filas, np.concatenate(columnas))), shape=(n, desplazamiento))
+
+    def ajustar_transformar(self, datos):
+        return self.ajustar(datos).transformar(datos)
+
+    def a_dict(self):
+        return {"columnas": list(self.columnas), "categorias": self.categorias}
+
+    @classmethod
+    def desde_dict(cls, datos):
+        return cls(datos["columnas"], datos["categorias"])
+
+    def guardar(self, ruta):
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            json.dump(self.a_dict(), archivo, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def cargar(cls, ruta):
+        with open(ruta, "r", encoding="utf-8") as archivo:
+            return cls.desde_dict(json.load(archivo))
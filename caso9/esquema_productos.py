@@ -0,0 +1,231 @@
+# esquema_productos.py
+# Esquema versionado de la tabla productos y las consultas que la usan.
+#
+# La tabla se creaba de dos formas (precio REAL en el carrito, precio TEXT en los paneles) y cada
+# pantalla convertía el precio con float() en Python en cada refresco. Las migraciones la llevan a
+# un solo esquema: el precio se guarda como entero en centavos (precio_centavos: sin errores de
+# redondeo al sumar), siempre hay descripcion y hay índices para buscar por nombre y ordenar o
+# filtrar por precio dentro de SQLite.
+#
+# La versión aplicada se guarda en PRAGMA user_version del propio archivo. Cada migración corre en
+# una transacción junto con el cambio de versión: si falla, la base queda como estaba.
+#
+# Ejemplo:
+#   python esquema_productos.py productos.db            (aplica las migraciones pendientes)
+#   python esquema_productos.py productos.db --estado   (solo muestra la versión)
+#
+# Copia compartida: caso6/esquema_productos.py y caso9/esquema_productos.py deben ser iguales
+# (lo comprueba Test_Copias.py en la raíz del repositorio).
+import argparse
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from base_datos import obtener_base
+
+# Columnas de una fila de producto en las consultas de este módulo
+SQL_COLUMNAS = "id, nombre, descripcion, precio_centavos"
+
+SQL_INSERTAR = "INSERT INTO productos (nombre, descripcion, precio_centavos) VALUES (?, ?, ?)"
+SQL_POR_ID = "SELECT " + SQL_COLUMNAS + " FROM productos WHERE id=?"
+
+# Ordenamientos permitidos -> ORDER BY (el id desempata para que el orden sea estable)
+ORDENES = {
+    'id': 'id',
+    'nombre': 'nombre COLLATE NOCASE, id',
+    'precio': 'precio_centavos, id',
+    'precio_desc': 'precio_centavos DESC, id DESC',
+}
+# Llave de cada orden para paginar por keyset: (expresión, posición en la fila, comparación); el
+# id siempre desempata. La página siguiente empieza después de la llave de la última fila, así que
+# SQLite salta directo a ese punto del índice en lugar de recorrer y descartar filas como con OFFSET.
+LLAVES_ORDEN = {
+    'id': (None, None, '>'),
+    'nombre': ('nombre COLLATE NOCASE', 1, '>'),
+    'precio': ('precio_centavos', 3, '>'),
+    'precio_desc': ('precio_centavos', 3, '<'),
+}
+
+
+# ===== PRECIOS =====
+def a_centavos(precio):
+    """
+    Convierte un precio (texto o número, en pesos) a centavos enteros.
+
+    Args:
+        precio (str | int | float): Precio como lo captura el usuario, por ejemplo '15.5'.
+
+    Returns:
+        int: Precio en centavos (redondeado a 2 decimales).
+
+    Raises:
+        ValueError: Si el precio no es un número.
+    """
+    try:
+        # Decimal a partir del texto: 0.1 + 0.2 no acumula errores de punto flotante
+        pesos = Decimal(str(precio).strip().replace(',', ''))
+    except InvalidOperation:
+        raise ValueError('Precio no numérico: {!r}'.format(precio)) from None
+    if not pesos.is_finite():
+        raise ValueError('Precio no numérico: {!r}'.format(precio))
+    return int((pesos * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def formato_precio(centavos):
+    """Precio en centavos como texto para mostrar, por ejemplo 1550 -> '$15.50'."""
+    return '${:.2f}'.format(centavos / 100)
+
+
+# ===== MIGRACIONES =====
+def _columnas(conn, tabla):
+    return {fila[1]: fila[2].upper() for fila in conn.execute('PRAGMA table_info({})'.format(tabla))}
+
+
+def _migracion_precio_centavos(conn):
+    columnas = _columnas(conn, 'productos')
+    conn.execute('''
+        CREATE TABLE productos_v1 (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            descripcion TEXT NOT NULL DEFAULT '',
+            precio_centavos INTEGER NOT NULL
+        )
+    ''')
+    if columnas:
+        # SQLite no cambia el tipo de una columna: se copia a una tabla nueva y se reemplaza.
+        # La conversión se hace con Decimal en Python para que '0.1' sea exactamente 10 centavos.
+        descripcion = 'descripcion' if 'descripcion' in columnas else "''"
+        filas, invalidas = [], []
+        for id_producto, nombre, desc, precio in conn.execute(
+                'SELECT id, nombre, {}, precio FROM productos'.format(descripcion)):
+            try:
+                filas.append((id_producto, nombre or '', desc or '', a_centavos(precio)))
+            except ValueError:
+                invalidas.append(id_producto)
+        if invalidas:
+            raise ValueError('Productos con precio no numérico (id): {}'.format(invalidas))
+        conn.executemany('INSERT INTO productos_v1 (id, nombre, descripcion, precio_centavos) '
+                         'VALUES (?, ?, ?, ?)', filas)
+        # AUTOINCREMENT no reutiliza ids de productos borrados: se conserva el contador anterior
+        conn.execute("UPDATE sqlite_sequence SET seq = max(seq, (SELECT seq FROM sqlite_sequence "
+                     "WHERE name = 'productos')) WHERE name = 'productos_v1'")
+        conn.execute('DROP TABLE productos')
+    conn.execute('ALTER TABLE productos_v1 RENAME TO productos')
+
+
+def _migracion_indices(conn):
+    # NOCASE: LIKE no distingue mayúsculas, así que 'lap%' solo usa el índice con esta collation
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_productos_nombre ON productos (nombre COLLATE NOCASE)')
+    # Cada entrada del índice incluye el rowid (id), así que también sirve para ORDER BY precio, id
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_productos_precio ON productos (precio_centavos)')
+
+
+# (versión, descripción, función): la lista solo crece; una migración publicada no se modifica
+MIGRACIONES = (
+    (1, 'precio como entero en centavos y columna descripcion', _migracion_precio_centavos),
+    (2, 'índices en nombre y precio', _migracion_indices),
+)
+VERSION_ESQUEMA = MIGRACIONES[-1][0]
+
+
+def version_actual(bd):
+    """Versión del esquema aplicada en la base de datos (0 si nunca se migró)."""
+    return bd.consultar_uno('PRAGMA user_version')[0]
+
+
+def migrar(bd, hasta=VERSION_ESQUEMA):
+    """
+    Aplica en orden las migraciones pendientes.
+
+    Args:
+        bd (BaseDatos): Base de datos a migrar.
+        hasta (int): Última versión a aplicar.
+
+    Returns:
+        list[tuple]: (versión, descripción) de cada migración aplicada.
+
+    Raises:
+        RuntimeError: Si la base tiene una versión más nueva que este código.
+    """
+    aplicadas = []
+    with bd.transaccion() as conn:  # BEGIN IMMEDIATE: dos procesos no migran a la vez
+        version = version_actual(bd)
+        if version > VERSION_ESQUEMA:
+            raise RuntimeError('La base de datos tiene la versión {} del esquema y este código solo conoce '
+                               'hasta la {}'.format(version, VERSION_ESQUEMA))
+        for numero, descripcion, migracion in MIGRACIONES:
+            if version < numero <= hasta:
+                migracion(conn)
+                conn.execute('PRAGMA user_version = {}'.format(numero))
+                aplicadas.append((numero, descripcion))
+    return aplicadas
+
+
+# ===== CONSULTAS =====
+def buscar_productos(bd, nombre=None, precio_min=None, precio_max=None, orden='id', limite=None,
+                     despues_de=None):
+    """
+    Busca productos filtrando y ordenando dentro de SQLite (con los índices de la versión 2).
+
+    Args:
+        bd (BaseDatos): Base de datos.
+        nombre (str): Prefijo del nombre, sin distinguir mayúsculas.
+        precio_min, precio_max (int): Rango de precio en centavos (inclusivo).
+        orden (str): Una de las llaves de ORDENES.
+        limite (int): Número máximo de filas.
+        despues_de (tuple): Última fila de la página anterior; se regresan las que le siguen en
+            el mismo orden (paginación por keyset).
+
+    Returns:
+        list[tuple]: Filas (id, nombre, descripcion, precio_centavos).
+    """
+    condiciones, parametros = [], []
+    if nombre:
+        # Se escapan los comodines para que el texto se busque tal cual
+        prefijo = nombre.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        condiciones.append("nombre LIKE ? ESCAPE '\\'")
+        parametros.append(prefijo + '%')
+    if precio_min is not None:
+        condiciones.append('precio_centavos >= ?')
+        parametros.append(precio_min)
+    if precio_max is not None:
+        condiciones.append('precio_centavos <= ?')
+        parametros.append(precio_max)
+    if despues_de is not None:
+        expresion, posicion, comparacion = LLAVES_ORDEN[orden]
+        if expresion is None:
+            condiciones.append('id {} ?'.format(comparacion))
+            parametros.append(despues_de[0])
+        else:
+            # Equivale a (expresion, id) > (llave, id) pero escrito para que el índice pueda
+            # buscar por el primer término (con COLLATE la comparación por filas no lo usa)
+            condiciones.append('{0} {1}= ? AND ({0} {1} ? OR id {1} ?)'.format(expresion, comparacion))
+            parametros.extend((despues_de[posicion], despues_de[posicion], despues_de[0]))
+    sql = 'SELECT ' + SQL_COLUMNAS + ' FROM productos'
+    if condiciones:
+        sql += ' WHERE ' + ' AND '.join(condiciones)
+    sql += ' ORDER BY ' + ORDENES[orden]
+    if limite is not None:
+        sql += ' LIMIT ?'
+        parametros.append(limite)
+    # Hay pocas combinaciones de filtros, así que el texto se repite y la sentencia se reutiliza
+    return bd.consultar(sql, parametros)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Migraciones del esquema de productos')
+    parser.add_argument('db', nargs='?', default='productos.db', help='base de datos SQLite')
+    parser.add_argument('--hasta', type=int, default=VERSION_ESQUEMA, help='última versión a aplicar')
+    parser.add_argument('--estado', action='store_true', help='solo muestra la versión actual')
+    args = parser.parse_args()
+
+    bd = obtener_base(args.db)
+    if args.estado:
+        print(f"Versión del esquema: {version_actual(bd)} (la más reciente es {VERSION_ESQUEMA})")
+    else:
+        try:
+            aplicadas = migrar(bd, args.hasta)
+        except (ValueError, RuntimeError) as e:
+            raise SystemExit(f"Error: {e}")
+        for numero, descripcion in aplicadas:
+            print(f"Aplicada {numero}: {descripcion}")
+        print(f"Versión del esquema: {version_actual(bd)}")
+    bd.cerrar()
@@ -3,65 +3,36 @@ from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.button import Button
 from kivy.uix.label import Label
 from kivy.uix.textinput import TextInput
-import sqlite3
-import pandas as pd  # Para tabular la salida en consola
-import re  # Para validación de caracteres
 
-# ===== IMPORTS DE MACHINE LEARNING PARA DETECCIÓN DE CONTENIDO SOSPECHOSO =====
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
+# ===== MODELO DE MACHINE LEARNING PARA DETECCIÓN DE CONTENIDO SOSPECHOSO =====
+# La validación, el prefiltro por reglas, el modelo (que se entrena una sola vez y se guarda en
+# modelo_contenido.joblib) y el guardado viven en cribado_productos.py, que también importa
+# catálogos completos sin interfaz. El panel lo usa para un producto a la vez.
+from cribado_productos import (MOTIVO_SOSPECHOSO, RUTA_DB, cribar_productos, init_db, modelo_contenido,
+                               prefiltro)
+from base_datos import obtener_base
+from esquema_productos import buscar_productos, formato_precio
+from trabajo_fondo import EjecutorFondo
 
-# Datos de entrenamiento para el modelo (simulados para este ejercicio)
-ejemplos_logs = [
-    "Intrusion from unknown IP",
-    "Product added to cart",
-    "System alert Intrusion",
-    "New user registration",
-    "Intrusion detected",
-    "User purchased item"
-]
-etiquetas = [1, 0, 1, 0, 1, 0]  # 1: sospechoso, 0: normal
-
-# ===== INICIO: MODELO DE MACHINE LEARNING =====
-
-# Creamos un vectorizador que convierte texto en vectores numéricos usando TF-IDF
-vectorizer = TfidfVectorizer()
-
-# Transformamos los ejemplos de logs en vectores numéricos
-X = vectorizer.fit_transform(ejemplos_logs)
-
-# Creamos el modelo de regresión logística para clasificación binaria
-modelo_ml = LogisticRegression()
-
-# Entrenamos el modelo con los datos de entrada (X) y las etiquetas (etiquetas)
-modelo_ml.fit(X, etiquetas)
-
-# ===== FIN: MODELO DE MACHINE LEARNING =====
+# El cribado (modelo incluido), el guardado y las consultas corren en este hilo y no en el de la
+# interfaz; los resultados regresan a la ventana con Clock (ver trabajo_fondo.py)
+fondo = EjecutorFondo(nombre='panel-db')
 
 # ===== FUNCIONES DE BASE DE DATOS =====
-def init_db():
-    """Inicializa la base de datos y crea la tabla si no existe."""
-    conn = sqlite3.connect('productos.db')
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS productos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nombre TEXT,
-            descripcion TEXT,
-            precio TEXT
-        )
-    ''')
-    conn.commit()
-    conn.close()
-
 def obtener_productos():
-    """Recupera los productos desde la base de datos y los devuelve como lista."""
-    conn = sqlite3.connect('productos.db')
-    cursor = conn.cursor()
-    cursor.execute("SELECT nombre, descripcion, precio FROM productos")
-    productos = cursor.fetchall()
-    conn.close()
-    return productos
+    """Recupera los productos (nombre, descripción, precio en centavos) y los devuelve como lista."""
+    # Misma conexión por hilo que usa cribado_productos al guardar
+    return [fila[1:] for fila in buscar_productos(obtener_base(RUTA_DB))]
+
+def tabla_productos():
+    """Consulta los productos y arma la tabla de texto para la consola (None si no hay productos)."""
+    productos = obtener_productos()
+    if not productos:
+        return None
+    import pandas as pd  # Para tabular la salida en consola (solo se importa al usarse)
+    df = pd.DataFrame(productos, columns=["Nombre", "Descripción", "Precio"])
+    df["Precio"] = df["Precio"].map(formato_precio)
+    return df.to_string(index=False), len(df)
 
 # ===== INTERFAZ GRÁFICA KIVY =====
 class ProductPanel(BoxLayout):
@@ -97,53 +68,48 @@ class ProductPanel(BoxLayout):
         description = self.product_description.text.strip()
         price = self.product_price.text.strip()
 
-        # ===== VALIDACIONES =====
-        if not name or not re.match(r'^[\w\s.,;:!?()-]+$', name):
-            self.product_list_label.text = '❌ Nombre inválido: vacío o contiene caracteres no permitidos.'
+        # ===== Validación, análisis de contenido y guardado (ver cribado_productos.py) =====
+        # Corre en segundo plano; el botón se desactiva para no guardar dos veces el mismo producto
+        self.add_product_button.disabled = True
+        self.product_list_label.text = '⏳ Revisando el producto...'
+        fondo.enviar(cribar_productos, [(name, description, price)],
+                     al_terminar=self.producto_cribado, al_fallar=self.error_al_guardar)
+
+    def producto_cribado(self, reporte):
+        """Recibe en el hilo de la interfaz el resultado del cribado y guardado."""
+        self.add_product_button.disabled = False
+        resultado = reporte['resultados'][0]
+        if not resultado['aceptado']:
+            if resultado['motivo'] == MOTIVO_SOSPECHOSO:
+                self.product_list_label.text = '⚠️ Contenido sospechoso detectado. No se guardó.'
+            else:
+                self.product_list_label.text = '❌ ' + resultado['motivo']
             return
 
-        try:
-            precio_num = float(price)
-            if precio_num <= 0:
-                raise ValueError
-        except ValueError:
-            self.product_list_label.text = '❌ Precio inválido: debe ser numérico y mayor que 0.'
-            return
-
-        if not description:
-            self.product_list_label.text = '❌ La descripción no puede estar vacía.'
-            return
-
-        # ===== Análisis de contenido con modelo ML =====
-        texto_a_analizar = [name + " " + description]
-        vector = vectorizer.transform(texto_a_analizar)
-        prediccion = modelo_ml.predict(vector)[0]
-
-        if prediccion == 1:
-            self.product_list_label.text = '⚠️ Contenido sospechoso detectado. No se guardó.'
-            return
-
-        # ===== Guardar en la base de datos =====
-        conn = sqlite3.connect('productos.db')
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO productos (nombre, descripcion, precio) VALUES (?, ?, ?)",
-                       (name, description, price))
-        conn.commit()
-        conn.close()
-
         self.product_name.text = ''
         self.product_description.text = ''
         self.product_price.text = ''
         self.product_list_label.text = '✅ Producto guardado correctamente.'
 
+    def error_al_guardar(self, error):
+        self.add_product_button.disabled = False
+        self.product_list_label.text = f'❌ No se pudo guardar el producto: {error}'
+
     def show_products(self, instance):
         """Muestra los productos guardados en consola usando pandas."""
-        productos = obtener_productos()
-        if productos:
-            df = pd.DataFrame(productos, columns=["Nombre", "Descripción", "Precio"])
+        # Canal 'listar': si se vuelve a pedir antes de terminar, solo se muestra la consulta más reciente
+        fondo.enviar(tabla_productos, al_terminar=self.mostrar_tabla, canal='listar')
+
+    def mostrar_tabla(self, tabla):
+        if tabla:
+            texto, total = tabla
             print("\n📦 Productos registrados:\n")
-            print(df.to_string(index=False))
-            self.product_list_label.text = f'Se mostraron {len(df)} productos en la consola.'
+            print(texto)
+            self.product_list_label.text = f'Se mostraron {total} productos en la consola.'
+            estadisticas = prefiltro.snapshot()
+            print(f"\n🔎 Prefiltro: {estadisticas['total']} textos revisados, "
+                  f"{estadisticas['tasa_aciertos']:.0%} resueltos sin el modelo "
+                  f"({estadisticas['rechazados']} rechazados, {estadisticas['aceptados']} aceptados)")
         else:
             self.product_list_label.text = 'No hay productos guardados aún.'
 
@@ -151,6 +117,14 @@ class ProductApp(App):
     def build(self):
         return ProductPanel()
 
+    def on_start(self):
+        # La ventana aparece de inmediato; el modelo se carga mientras el usuario captura datos
+        modelo_contenido.precargar_en_segundo_plano()
+
+    def on_stop(self):
+        fondo.cerrar()  # Espera al guardado o consulta en curso antes de cerrar las conexiones
+        obtener_base(RUTA_DB).cerrar()  # Al cerrar la última conexión SQLite vacía el WAL
+
 if __name__ == '__main__':
     init_db()
     ProductApp().run()
\ No newline at end of file
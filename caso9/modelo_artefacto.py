@@ -0,0 +1,391 @@
+# modelo_artefacto.py
+# Artefactos de modelo: el vectorizador y el modelo se entrenan una vez, se guardan juntos en un
+# archivo .joblib y se cargan después sin volver a entrenar.
+#
+# El primer objeto del artefacto es el `preprocesador`: lo que convierte las entradas en la matriz
+# que recibe el modelo. Para los registros y el contenido es un vectorizador de texto; para el
+# modelo de fraude (vulnerabilidadpractica9) es el StandardScaler.
+#
+# El contenido se guarda en un archivo con el hash en el nombre (modelo-<sha256>.joblib para la
+# ruta modelo.joblib), que nunca se modifica después de escrito. El archivo modelo.joblib.json
+# es el apuntador: tiene el nombre de ese archivo, la versión, el tamaño y el hash SHA-256 (para
+# detectar archivos corruptos) y el hash de los datos de entrenamiento. Guardar una versión nueva
+# reemplaza el .json de forma atómica, así un lector abre exactamente el archivo que nombran los
+# metadatos que leyó, sin importar si otro proceso está guardando al mismo tiempo.
+#
+# Al cargar siempre se compara el tamaño; el SHA-256 lee el archivo completo, así que solo se
+# calcula cuando se pide (verificar=True), por ejemplo al activar una versión del registro.
+#
+# joblib y scikit-learn se importan dentro de las funciones: un programa que solo usa el modelo
+# no paga el costo de importarlos hasta la primera predicción.
+import hashlib
+import json
+import os
+import threading
+import time
+
+# 2: el contenido va en el archivo que indica "archivo"; en la 1 estaba en la ruta misma.
+# 3: la llave "vectorizer" (del contenido y de los metadatos) se llama "preprocesador".
+FORMATO = 3
+
+
+def hash_archivo(ruta, tam_bloque=1024 * 1024):
+    """
+    Calcula el SHA-256 de un archivo leyéndolo por bloques.
+
+    Args:
+        ruta (str): Ruta del archivo.
+        tam_bloque (int): Bytes leídos por iteración.
+
+    Returns:
+        str: Hash en hexadecimal.
+    """
+    sha = hashlib.sha256()
+    with open(ruta, "rb") as archivo:
+        for bloque in iter(lambda: archivo.read(tam_bloque), b""):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+def hash_datos(textos, etiquetas):
+    """
+    Huella de los datos de entrenamiento, para saber con qué datos se entrenó un artefacto.
+
+    Args:
+        textos (list[str]): Textos de entrenamiento.
+        etiquetas (list[int]): Etiquetas correspondientes.
+
+    Returns:
+        str: Hash SHA-256 en hexadecimal.
+    """
+    sha = hashlib.sha256()
+    for texto, etiqueta in zip(textos, etiquetas):
+        sha.update("{}\t{}\n".format(etiqueta, texto).encode("utf-8"))
+    return sha.hexdigest()
+
+
+def ruta_metadatos(ruta):
+    return ruta + ".json"
+
+
+def ruta_contenido(ruta, metadatos):
+    """Archivo con el contenido del artefacto que indican los metadatos."""
+    return os.path.join(os.path.dirname(ruta), metadatos.get("archivo", os.path.basename(ruta)))
+
+
+def existe_artefacto(ruta):
+    """True si hay un artefacto guardado en la ruta (se busca su apuntador .json)."""
+    return os.path.exists(ruta_metadatos(ruta))
+
+
+def borrar_artefacto(ruta):
+    """Borra los metadatos de un artefacto y los archivos de contenido que conserva."""
+    metadatos = _leer_metadatos(ruta)
+    os.remove(ruta_metadatos(ruta))
+    for nombre in {metadatos.get("archivo"), metadatos.get("archivo_anterior")} - {None}:
+        try:
+            os.remove(os.path.join(os.path.dirname(ruta), nombre))
+        except FileNotFoundError:
+            pass
+
+
+def guardar_artefacto(ruta, preprocesador, modelo, version=None, datos=None, extra=None):
+    """
+    Guarda el preprocesador y el modelo en un solo archivo y escribe sus metadatos.
+
+    Args:
+        ruta (str): Archivo .joblib de destino.
+        preprocesador: Vectorizador o scaler ya ajustado.
+        modelo: Modelo ya entrenado.
+        version (str): Versión del artefacto; por defecto la fecha y hora actuales.
+        datos (tuple): (textos, etiquetas) usados al entrenar, para registrar su hash.
+        extra (dict): Metadatos adicionales.
+
+    Returns:
+        dict: Metadatos escritos.
+    """
+    import joblib
+
+    # El contenido se escribe a un temporal y se renombra con su hash: un lector nunca ve un
+    # archivo a medias y un nombre siempre corresponde al mismo contenido
+    temporal = ruta + ".tmp"
+    joblib.dump({"preprocesador": preprocesador, "modelo": modelo}, temporal)
+    sha256 = hash_archivo(temporal)
+    base, extension = os.path.splitext(os.path.basename(ruta))
+    nombre = "{}-{}{}".format(base, sha256[:16], extension)
+    os.replace(temporal, os.path.join(os.path.dirname(ruta), nombre))
+
+    try:
+        anterior = _leer_metadatos(ruta)
+    except FileNotFoundError:
+        anterior = None
+    metadatos = {
+        "formato": FORMATO,
+        "version": version or time.strftime("%Y%m%d%H%M%S"),
+        "archivo": nombre,
+        "sha256": sha256,
+        "bytes": os.path.getsize(os.path.join(os.path.dirname(ruta), nombre)),
+        "creado": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "creado_ns": time.time_ns(),  # Ordena versiones creadas en el mismo segundo
+        "preprocesador": type(preprocesador).__name__,
+        "modelo": type(modelo).__name__,
+    }
+    if datos is not None:
+        metadatos["hash_datos"] = hash_datos(*datos)
+        metadatos["muestras"] = len(datos[0])
+    metadatos.update(extra or {})
+    # Se conserva el contenido anterior: un lector que acaba de leer los metadatos viejos todavía
+    # puede abrirlo. El de dos versiones atrás ya no lo nombra ningún apuntador y se borra.
+    viejo = None
+    if anterior is not None:
+        metadatos["archivo_anterior"] = anterior.get("archivo", os.path.basename(ruta))
+        viejo = anterior.get("archivo_anterior")
+
+    temporal_metadatos = ruta_metadatos(ruta) + ".tmp"
+    with open(temporal_metadatos, "w", encoding="utf-8") as archivo:
+        json.dump(metadatos, archivo, indent=2)
+    os.replace(temporal_metadatos, ruta_metadatos(ruta))  # Cambio atómico a la versión nueva
+
+    if viejo and viejo not in (nombre, metadatos["archivo_anterior"]):
+        try:
+            os.remove(os.path.join(os.path.dirname(ruta), viejo))
+        except FileNotFoundError:
+            pass
+    return metadatos
+
+
+def _leer_metadatos(ruta):
+    with open(ruta_metadatos(ruta), "r", encoding="utf-8") as archivo:
+        return json.load(archivo)
+
+
+def _coincide(ruta, metadatos, verificar):
+    contenido = ruta_contenido(ruta, metadatos)
+    # Los artefactos guardados antes de registrar el tamaño no tienen "bytes"
+    if "bytes" in metadatos and os.path.getsize(contenido) != metadatos["bytes"]:
+        return False
+    return not verificar or hash_archivo(contenido) == metadatos["sha256"]
+
+
+def cargar_artefacto(ruta, verificar=False, mmap=True):
+    """
+    Carga un artefacto guardado con guardar_artefacto.
+
+    Los arreglos de numpy grandes (por ejemplo los coeficientes) se abren con mmap_mode="r":
+    se leen del disco bajo demanda y varios procesos comparten las mismas páginas en memoria.
+
+    Args:
+        ruta (str): Ruta del artefacto (la misma que se pasó a guardar_artefacto).
+        verificar (bool): Si es True también compara el SHA-256 con el de los metadatos (lee el
+            archivo completo); si es False solo se compara el tamaño.
+        mmap (bool): Si es False carga los arreglos completos en memoria; necesario cuando el
+            modelo se va a seguir entrenando (partial_fit escribe en sus coeficientes).
+
+    Returns:
+        tuple: (preprocesador, modelo, metadatos).
+
+    Raises:
+        FileNotFoundError: Si no existe el artefacto o sus metadatos.
+        ValueError: Si el tamaño o el hash no coinciden.
+    """
+    import joblib
+
+    metadatos = _leer_metadatos(ruta)
+    while True:
+        try:
+            if not _coincide(ruta, metadatos, verificar):
+                raise ValueError("El artefacto '{}' no coincide con su hash; vuelva a entrenarlo.".format(ruta))
+            contenido = joblib.load(ruta_contenido(ruta, metadatos), mmap_mode="r" if mmap else None)
+            # Los artefactos de formato anterior a 3 usan la llave "vectorizer"
+            preprocesador = contenido["preprocesador"] if "preprocesador" in contenido else contenido["vectorizer"]
+            return preprocesador, contenido["modelo"], metadatos
+        except FileNotFoundError:
+            # El contenido solo se borra cuando ya hay dos versiones más nuevas: si los metadatos
+            # cambiaron se carga la versión que nombran ahora; si no, el archivo realmente falta
+            actuales = _leer_metadatos(ruta)
+            if actuales.get("archivo") == metadatos.get("archivo"):
+                raise
+            metadatos = actuales
+
+
+class RegistroModelos:
+    """
+    Directorio con versiones de un modelo y un apuntador a la versión activa.
+
+    Cada versión es un artefacto con ruta <version>.joblib (apuntador <version>.joblib.json y
+    contenido <version>-<hash>.joblib); el archivo ACTUAL guarda
+    el nombre de la versión activa. Guardar una versión nueva no borra las anteriores (hasta
+    `conservar`), así se puede volver a una de ellas con revertir().
+
+    Args:
+        directorio (str): Carpeta del registro (se crea si no existe).
+        conservar (int): Versiones que se conservan en disco; las más antiguas se borran.
+    """
+
+    APUNTADOR = "ACTUAL"
+
+    def __init__(self, directorio, conservar=10):
+        self.directorio = directorio
+        self.conservar = conservar
+        os.makedirs(directorio, exist_ok=True)
+
+    def ruta(self, version):
+        return os.path.join(self.directorio, version + ".joblib")
+
+    def versiones(self):
+        """
+        Versiones guardadas, de la más antigua a la más reciente. Se ordenan por el momento en
+        que se guardaron y no por nombre: con versiones como v2 y v10 (o los sufijos -2 y -10)
+        el orden alfabético elegiría otra.
+        """
+        versiones = []
+        for nombre in os.listdir(self.directorio):
+            if nombre.endswith(".joblib.json"):
+                version = nombre[:-len(".joblib.json")]
+                versiones.append((self._creado(version), version))
+        return [version for _, version in sorted(versiones)]
+
+    def _creado(self, version):
+        # Los metadatos anteriores a "creado_ns" usan la fecha de modificación de su .json, que
+        # no cambia después de guardar la versión
+        try:
+            return _leer_metadatos(self.ruta(version))["creado_ns"]
+        except KeyError:
+            return os.stat(ruta_metadatos(self.ruta(version))).st_mtime_ns
+
+    def actual(self):
+        """Nombre de la versión activa, o None si el registro está vacío."""
+        try:
+            with open(os.path.join(self.directorio, self.APUNTADOR), "r", encoding="utf-8") as archivo:
+                return archivo.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def activar(self, version):
+        """
+        Cambia la versión activa (el apuntador se reemplaza de forma atómica). Antes verifica el
+        SHA-256 completo de la versión; al cargarla después solo se compara el tamaño.
+        """
+        if version not in self.versiones():
+            raise ValueError("La versión '{}' no existe en {}".format(version, self.directorio))
+        if not _coincide(self.ruta(version), _leer_metadatos(self.ruta(version)), verificar=True):
+            raise ValueError("La versión '{}' no coincide con su hash; no se activa.".format(version))
+        temporal = os.path.join(self.directorio, self.APUNTADOR + ".tmp")
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            archivo.write(version)
+        os.replace(temporal, os.path.join(self.directorio, self.APUNTADOR))
+
+    def guardar(self, preprocesador, modelo, version=None, datos=None, extra=None):
+        """
+        Guarda una versión nueva y la deja activa.
+
+        Returns:
+            dict: Metadatos de la versión guardada.
+        """
+        version = version or time.strftime("%Y%m%d%H%M%S")
+        # Dos versiones en el mismo segundo: se agrega un sufijo para no sobrescribir
+        base, n = version, 1
+        while existe_artefacto(self.ruta(version)):
+            version = "{}-{}".format(base, n)
+            n += 1
+        extra = dict(extra or {}, anterior=self.actual())
+        metadatos = guardar_artefacto(self.ruta(version), preprocesador, modelo, version=version, datos=datos, extra=extra)
+        self.activar(version)
+        self._limpiar()
+        return metadatos
+
+    def cargar(self, version=None, mmap=True, verificar=False):
+        """
+        Carga una versión (por defecto la activa).
+
+        Returns:
+            tuple: (preprocesador, modelo, metadatos).
+
+        Raises:
+            FileNotFoundError: Si el registro está vacío.
+        """
+        version = version or self.actual()
+        if version is None:
+            raise FileNotFoundError("No hay versiones en {}".format(self.directorio))
+        return cargar_artefacto(self.ruta(version), verificar=verificar, mmap=mmap)
+
+    def revertir(self, version=None):
+        """
+        Vuelve a la versión indicada o, si no se indica, a la anterior de la activa.
+
+        Returns:
+            str: Versión que quedó activa.
+
+        Raises:
+            FileNotFoundError: Si no se indica la versión y el registro está vacío.
+            ValueError: Si la versión no existe o la activa no tiene una anterior.
+        """
+        if version is None:
+            activa = self.actual()
+            if activa is None:
+                raise FileNotFoundError("No hay versiones en {}".format(self.directorio))
+            version = _leer_metadatos(self.ruta(activa)).get("anterior")
+            if version is None:
+                raise ValueError("La versión activa no tiene una versión anterior")
+        self.activar(version)
+        return version
+
+    def _limpiar(self):
+        activa = self.actual()
+        versiones = self.versiones()
+        for version in versiones[:max(0, len(versiones) - self.conservar)]:
+            if version != activa:
+                borrar_artefacto(self.ruta(version))
+
+
+class ModeloPerezoso:
+    """
+    Modelo que se carga la primera vez que se usa.
+
+    Si el artefacto no existe y se indicó una función `entrenar`, se entrena una sola vez y
+    se guarda; las siguientes ejecuciones solo lo cargan.
+
+    Args:
+        ruta (str): Archivo .joblib del artefacto.
+        entrenar (callable): Función sin argumentos que regresa (vectorizer, modelo, textos, etiquetas).
+    """
+
+    def __init__(self, ruta, entrenar=None):
+        self.ruta = ruta
+        self.entrenar = entrenar
+        self.vectorizer = None
+        self.modelo = None
+        self.metadatos = None
+        self._candado = threading.Lock()
+
+    def cargar(self):
+        """Carga (o entrena y guarda) el artefacto si aún no está en memoria."""
+        if self.modelo is not None:
+            return self
+        with self._candado:
+            if self.modelo is None:
+                if not existe_artefacto(self.ruta) and self.entrenar is not None:
+                    vectorizer, modelo, textos, etiquetas = self.entrenar()
+                    guardar_artefacto(self.ruta, vectorizer, modelo, datos=(textos, etiquetas))
+                self.vectorizer, modelo, self.metadatos = cargar_artefacto(self.ruta)
+                self.modelo = modelo
+        return self
+
+    def precargar_en_segundo_plano(self):
+        """Inicia la carga en un hilo para que la primera predicción no tenga que esperarla."""
+        hilo = threading.Thread(target=self.cargar, daemon=True)
+        hilo.start()
+        return hilo
+
+    def predecir(self, textos):
+        """
+        Clasifica una lista de textos.
+
+        Args:
+            textos (list[str]): Textos a clasificar.
+
+        Returns:
+            list[int]: Predicciones (1 o 0).
+        """
+        self.cargar()
+        return self.modelo.predict(self.vectorizer.transform(textos))
@@ -0,0 +1,137 @@
+# prefiltro_contenido.py
+# Filtro por reglas que se aplica antes del modelo de contenido del panel de productos.
+#
+# Las listas de términos conocidos (sospechosos y normales) se compilan una sola vez en un
+# autómata de Aho-Corasick: el texto se recorre una vez, carácter por carácter, y se encuentran
+# todos los términos a la vez sin importar cuántos haya. Si el texto contiene un término
+# sospechoso se rechaza; si solo contiene términos normales se acepta; únicamente el texto sin
+# coincidencias (ambiguo) llega al modelo.
+import threading
+from collections import deque
+
+# Términos en minúsculas; se buscan como palabras completas sin distinguir mayúsculas
+TERMINOS_SOSPECHOSOS = (
+    "intrusion", "intrusión", "system alert", "unknown ip", "malware", "exploit", "phishing",
+    "ransomware", "keylogger", "sql injection", "drop table", "<script",
+)
+TERMINOS_NORMALES = (
+    "added to cart", "user purchased", "new user registration",
+)
+
+
+class AhoCorasick:
+    """
+    Autómata que encuentra todas las apariciones de un conjunto de términos en una sola pasada.
+
+    Args:
+        terminos (iterable[str]): Términos a buscar (se comparan en minúsculas).
+        palabras_completas (bool): Si es True solo cuenta coincidencias que no están pegadas a
+            otra letra o número (por ejemplo 'hack' no coincide dentro de 'hackathon').
+    """
+
+    def __init__(self, terminos, palabras_completas=True):
+        self.palabras_completas = palabras_completas
+        self._siguiente = [{}]  # nodo -> {carácter: nodo}
+        self._falla = [0]
+        self._salidas = [()]  # nodo -> términos que terminan en este nodo (incluye los de su falla)
+        for termino in terminos:
+            self._agregar(termino.casefold())
+        self._construir_fallas()
+
+    def _agregar(self, termino):
+        nodo = 0
+        for caracter in termino:
+            if caracter not in self._siguiente[nodo]:
+                self._siguiente.append({})
+                self._falla.append(0)
+                self._salidas.append(())
+                self._siguiente[nodo][caracter] = len(self._siguiente) - 1
+            nodo = self._siguiente[nodo][caracter]
+        self._salidas[nodo] += (termino,)
+
+    def _construir_fallas(self):
+        # Recorrido por niveles: la falla de un nodo es el sufijo más largo que también es prefijo
+        cola = deque(self._siguiente[0].values())
+        while cola:
+            nodo = cola.popleft()
+            for caracter, hijo in self._siguiente[nodo].items():
+                falla = self._falla[nodo]
+                while falla and caracter not in self._siguiente[falla]:
+                    falla = self._falla[falla]
+                self._falla[hijo] = self._siguiente[falla].get(caracter, 0)
+                self._salidas[hijo] += self._salidas[self._falla[hijo]]
+                cola.append(hijo)
+
+    def buscar(self, texto):
+        """
+        Regresa la lista de (posición inicial, término) de cada coincidencia en el texto.
+        """
+        texto = texto.casefold()
+        coincidencias = []
+        nodo = 0
+        for fin, caracter in enumerate(texto):
+            while nodo and caracter not in self._siguiente[nodo]:
+                nodo = self._falla[nodo]
+            nodo = self._siguiente[nodo].get(caracter, 0)
+            for termino in self._salidas[nodo]:
+                inicio = fin - len(termino) + 1
+                if not self.palabras_completas or self._es_palabra(texto, inicio, fin, termino):
+                    coincidencias.append((inicio, termino))
+        return coincidencias
+
+    @staticmethod
+    def _es_palabra(texto, inicio, fin, termino):
+        # Solo se exige el límite de palabra en los extremos del término que son letras o números
+        antes = inicio > 0 and termino[0].isalnum() and texto[inicio - 1].isalnum()
+        despues = fin + 1 < len(texto) and termino[-1].isalnum() and texto[fin + 1].isalnum()
+        return not (antes or despues)
+
+
+class PrefiltroContenido:
+    """
+    Decide los casos obvios con listas de términos y cuenta cuántos textos resuelve sin el modelo.
+
+    Args:
+        sospechosos (iterable[str]): Términos que marcan el texto como sospechoso.
+        normales (iterable[str]): Términos que marcan el texto como normal si no hay sospechosos.
+    """
+
+    def __init__(self, sospechosos=TERMINOS_SOSPECHOSOS, normales=TERMINOS_NORMALES):
+        self._sospechosos = set(termino.casefold() for termino in sospechosos)
+        self._automata = AhoCorasick(list(self._sospechosos) + [termino.casefold() for termino in normales])
+        self._candado = threading.Lock()
+        self.total = 0
+        self.rechazados = 0
+        self.aceptados = 0
+
+    def clasificar(self, texto):
+        """
+        Regresa 1 si el texto contiene un término sospechoso, 0 si solo contiene términos
+        normales, o None si no hay coincidencias y debe decidirlo el modelo.
+        """
+        terminos = {termino for _, termino in self._automata.buscar(texto)}
+        if terminos & self._sospechosos:
+            decision = 1
+        elif terminos:
+            decision = 0
+        else:
+            decision = None
+        with self._candado:
+            self.total += 1
+            if decision == 1:
+                self.rechazados += 1
+            elif decision == 0:
+                self.aceptados += 1
+        return decision
+
+    def snapshot(self):
+        """Textos revisados, decididos por reglas y proporción que no tuvo que pasar por el modelo."""
+        with self._candado:
+            resueltos = self.rechazados + self.aceptados
+            return {
+                "total": self.total,
+                "rechazados": self.rechazados,
+                "aceptados": self.aceptados,
+                "al_modelo": self.total - resueltos,
+                "tasa_aciertos": resueltos / self.total if self.total else 0.0,
+            }
@@ -0,0 +1,265 @@
+# puntuar_lotes.py
+# Puntuación por lotes en varios núcleos para los modelos de registros (skealearningmodulo9) y
+# de fraude (vulnerabilidadpractica9).
+#
+# - El archivo de entrada se parte en fragmentos por rangos de bytes alineados a saltos de línea,
+#   así cada proceso lee solo su parte sin que otro tenga que recorrer el archivo antes.
+# - Cada proceso del pool carga el modelo una sola vez (initializer); los artefactos se abren con
+#   mmap, así los procesos comparten en memoria las páginas de los coeficientes.
+# - Cada fragmento se escribe en su propio archivo parte-NNNNN (primero a .tmp y luego se
+#   renombra), y al final las partes se concatenan en orden. Si la ejecución se interrumpe, al
+#   volver a correrla se reutilizan las partes terminadas. Las partes y el plan van en un
+#   directorio propio de la herramienta (<salida>.partes, o puntuar-<hash> dentro de --trabajo):
+#   solo se borran archivos parte-* y plan.json de ese directorio, nunca el directorio del usuario.
+#
+# Ejemplos:
+#   python puntuar_lotes.py logs /var/log/seguridad.log predicciones.tsv --procesos 8
+#   python puntuar_lotes.py fraude compras_grandes.csv riesgos.csv --modelo modelo_fraude.joblib
+import argparse
+import glob
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from modelo_artefacto import ruta_metadatos
+
+MODELOS = {
+    "logs": "modelo_logs.joblib",
+    "fraude": "modelo_fraude.joblib",
+}
+
+# Modelo cargado en cada proceso trabajador por _iniciar_trabajador
+_modelo = None
+
+
+def dividir_en_fragmentos(ruta, fragmentos, inicio=0):
+    """
+    Parte un archivo en rangos de bytes [inicio, fin) que empiezan y terminan en un salto de línea.
+
+    Args:
+        ruta (str): Archivo de entrada.
+        fragmentos (int): Número aproximado de fragmentos.
+        inicio (int): Byte donde empiezan los datos (por ejemplo después del encabezado de un CSV).
+
+    Returns:
+        list[tuple]: Rangos (inicio, fin); puede haber menos de `fragmentos` si el archivo es chico.
+    """
+    tamano = os.path.getsize(ruta)
+    paso = max(1, (tamano - inicio) // max(1, fragmentos))
+    rangos = []
+    with open(ruta, "rb") as archivo:
+        while inicio < tamano:
+            fin = inicio + paso
+            if fin < tamano:
+                # Avanzar hasta el final de la línea en la que cayó el corte
+                archivo.seek(fin)
+                archivo.readline()
+                fin = archivo.tell()
+            rangos.append((inicio, min(fin, tamano)))
+            inicio = fin
+    return rangos
+
+
+def leer_encabezado(ruta):
+    """Regresa (encabezado en bytes, byte donde empiezan los datos) de un CSV."""
+    with open(ruta, "rb") as archivo:
+        encabezado = archivo.readline()
+        return encabezado, archivo.tell()
+
+
+def _iniciar_trabajador(tipo, ruta_modelo):
+    global _modelo
+    if tipo == "logs":
+        from skealearningmodulo9 import load_model
+
+        vectorizer, modelo, _ = load_model(ruta_modelo)
+        _modelo = (vectorizer, modelo)
+    else:
+        from vulnerabilidadpractica9 import cargar_modelo
+
+        _modelo = cargar_modelo(ruta_modelo)
+
+
+def _puntuar_logs(datos, salida):
+    from skealearningmodulo9 import TAM_LOTE, batched, extract_features, predict_labels
+
+    vectorizer, modelo = _modelo
+    lineas = [linea for linea in (l.strip() for l in datos.decode("utf-8", errors="replace").split("\n")) if linea]
+    for lote in batched(lineas, TAM_LOTE):
+        for linea, prediccion in zip(lote, predict_labels(modelo, extract_features(lote, vectorizer))):
+            salida.write("{}\t{}\n".format(prediccion, linea))
+    return len(lineas)
+
+
+def _puntuar_fraude(datos, salida, encabezado, encoding):
+    import pandas as pd
+    from vulnerabilidadpractica9 import alinear_columnas, predecir_riesgo
+
+    modelo, scaler, esquema = _modelo
+    columnas = encabezado.decode(encoding).strip().split(",")
+    crudos = pd.read_csv(io.BytesIO(datos), names=columnas, header=None, encoding=encoding)
+    if esquema is not None:
+        # El esquema produce siempre las columnas de entrenamiento: no hace falta alinearlas
+        riesgos = predecir_riesgo(modelo, scaler, crudos, esquema=esquema)
+    else:
+        riesgos = predecir_riesgo(modelo, scaler, alinear_columnas(crudos.drop(columns="fraude", errors="ignore"), scaler))
+    crudos["riesgo"] = riesgos
+    crudos.to_csv(salida, header=False, index=False, lineterminator="\n")
+    return len(crudos)
+
+
+def _puntuar_fragmento(tipo, ruta, indice, inicio, fin, ruta_parte, encabezado, encoding):
+    """Puntúa un fragmento y lo escribe en su archivo parte. Regresa (índice, filas)."""
+    with open(ruta, "rb") as archivo:
+        archivo.seek(inicio)
+        datos = archivo.read(fin - inicio)
+    temporal = ruta_parte + ".tmp"
+    with open(temporal, "w", encoding="utf-8", newline="") as salida:
+        if tipo == "logs":
+            filas = _puntuar_logs(datos, salida)
+        else:
+            filas = _puntuar_fraude(datos, salida, encabezado, encoding)
+    os.replace(temporal, ruta_parte)  # La parte solo existe completa
+    return indice, filas
+
+
+def _plan(args):
+    """
+    Entrada y modelo de la ejecución; si cambian, las partes anteriores no se reutilizan. No
+    incluye el número de procesos: una ejecución se puede reanudar con otro --procesos.
+    """
+    estado = os.stat(args.entrada)
+    # El .json del artefacto cambia con cada guardado (un registro de versiones es un directorio)
+    estado_modelo = os.stat(args.modelo if os.path.isdir(args.modelo) else ruta_metadatos(args.modelo))
+    return {
+        "tipo": args.tipo,
+        "entrada": os.path.abspath(args.entrada),
+        "tamano": estado.st_size,
+        "modificado": estado.st_mtime,
+        "modelo": os.path.abspath(args.modelo),
+        "modelo_modificado": estado_modelo.st_mtime,
+    }
+
+
+def directorio_trabajo(args):
+    """
+    Directorio de partes de esta ejecución. Con --trabajo se crea un subdirectorio propio cuyo
+    nombre depende del tipo, la entrada y la salida, así dos ejecuciones no se mezclan y la
+    limpieza nunca toca otros archivos del directorio indicado.
+    """
+    if not args.trabajo:
+        return args.salida + ".partes"
+    clave = "\n".join((args.tipo, os.path.abspath(args.entrada), os.path.abspath(args.salida)))
+    return os.path.join(args.trabajo, "puntuar-" + hashlib.sha1(clave.encode("utf-8")).hexdigest()[:12])
+
+
+def _limpiar_partes(directorio):
+    """Borra solo los archivos que escribe esta herramienta (partes, temporales y el plan)."""
+    for ruta in glob.glob(os.path.join(directorio, "parte-*")):
+        os.remove(ruta)
+    ruta_plan = os.path.join(directorio, "plan.json")
+    if os.path.exists(ruta_plan):
+        os.remove(ruta_plan)
+
+
+def puntuar(args):
+    if args.tipo == "fraude":
+        encabezado, inicio = leer_encabezado(args.entrada)
+    else:
+        encabezado, inicio = b"", 0
+
+    directorio = directorio_trabajo(args)
+    os.makedirs(directorio, exist_ok=True)
+    ruta_plan = os.path.join(directorio, "plan.json")
+    plan = _plan(args)
+    anterior = None
+    if os.path.exists(ruta_plan) and not args.reiniciar:
+        with open(ruta_plan, "r", encoding="utf-8") as archivo:
+            anterior = json.load(archivo)
+    rangos_anteriores = anterior.pop("rangos", None) if anterior else None
+    if (anterior == plan and rangos_anteriores
+            and (args.fragmentos is None or args.fragmentos == len(rangos_anteriores))):
+        # Misma entrada y modelo: se reutilizan los rangos guardados (y sus partes terminadas)
+        # aunque ahora haya otro número de procesos
+        rangos = [tuple(rango) for rango in rangos_anteriores]
+    else:
+        # Entrada, modelo o número de fragmentos distintos: se empieza de cero
+        rangos = dividir_en_fragmentos(args.entrada, args.fragmentos or args.procesos * 4, inicio)
+        _limpiar_partes(directorio)
+        with open(ruta_plan, "w", encoding="utf-8") as archivo:
+            json.dump(dict(plan, rangos=[list(rango) for rango in rangos]), archivo)
+
+    partes = [os.path.join(directorio, "parte-{:05d}".format(i)) for i in range(len(rangos))]
+    pendientes = [i for i, parte in enumerate(partes) if not os.path.exists(parte)]
+    hechas = len(rangos) - len(pendientes)
+    if hechas:
+        print("Reanudando: {} de {} fragmentos ya puntuados".format(hechas, len(rangos)))
+
+    inicio_tiempo = time.perf_counter()
+    filas = 0
+    with ProcessPoolExecutor(args.procesos, initializer=_iniciar_trabajador, initargs=(args.tipo, args.modelo)) as pool:
+        futuros = [
+            pool.submit(_puntuar_fragmento, args.tipo, args.entrada, i, rangos[i][0], rangos[i][1], partes[i],
+                        encabezado, args.encoding)
+            for i in pendientes
+        ]
+        for futuro in as_completed(futuros):
+            _, filas_fragmento = futuro.result()
+            hechas += 1
+            filas += filas_fragmento
+            transcurrido = time.perf_counter() - inicio_tiempo
+            sys.stderr.write("\rFragmentos {}/{}  {} filas  {:.0f} filas/s".format(
+                hechas, len(rangos), filas, filas / transcurrido if transcurrido else 0))
+            sys.stderr.flush()
+    sys.stderr.write("\n")
+
+    # Concatenar en el orden de la entrada
+    temporal = args.salida + ".tmp"
+    with open(temporal, "wb") as salida:
+        if args.tipo == "fraude":
+            salida.write(encabezado.decode(args.encoding).rstrip("\r\n").encode("utf-8") + b",riesgo\n")
+        for parte in partes:
+            with open(parte, "rb") as archivo:
+                shutil.copyfileobj(archivo, salida)
+    os.replace(temporal, args.salida)
+    if not args.conservar:
+        _limpiar_partes(directorio)
+        try:
+            os.rmdir(directorio)  # Solo si quedó vacío
+        except OSError:
+            pass
+    return filas, time.perf_counter() - inicio_tiempo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Puntuación por lotes en varios procesos")
+    parser.add_argument("tipo", choices=sorted(MODELOS), help="modelo a usar")
+    parser.add_argument("entrada", help="archivo de registros (logs) o CSV de compras (fraude)")
+    parser.add_argument("salida", help="archivo de resultados")
+    parser.add_argument("--modelo", help="artefacto del modelo (por defecto el del tipo)")
+    parser.add_argument("--procesos", type=int, default=os.cpu_count(), help="procesos trabajadores")
+    parser.add_argument("--fragmentos", type=int,
+                        help="fragmentos en que se parte la entrada (por defecto 4 por proceso; al reanudar "
+                             "se usan los de la ejecución anterior)")
+    parser.add_argument("--encoding", default="utf-8", help="codificación del CSV de entrada")
+    parser.add_argument("--trabajo", help="directorio donde se crea el de partes intermedias "
+                                               "(por defecto se usa <salida>.partes)")
+    parser.add_argument("--reiniciar", action="store_true", help="descarta las partes de una ejecución anterior")
+    parser.add_argument("--conservar", action="store_true", help="no borra las partes al terminar")
+    args = parser.parse_args()
+    args.modelo = args.modelo or MODELOS[args.tipo]
+    if args.encoding.lower().replace("_", "-") == "utf-8":
+        args.encoding = "utf-8-sig"  # Ignora el BOM que agregan algunas hojas de cálculo
+
+    filas, segundos = puntuar(args)
+    print("{} filas puntuadas en {:.1f}s ({:.0f} filas/s) -> {}".format(
+        filas, segundos, filas / segundos if segundos else 0, args.salida))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+# seguimiento_logs.py
+# Detección de intrusiones en tiempo real: sigue uno o varios archivos de registros como
+# `tail -F` y clasifica las líneas nuevas con el modelo de skealearningmodulo9.
+#
+# - Rotación: si el archivo se renombra y se crea otro con el mismo nombre (cambia el inodo), se
+#   terminan de leer las líneas del archivo anterior y se continúa con el nuevo; si se trunca
+#   (copytruncate), se vuelve al inicio.
+# - Micro-lotes: las líneas se clasifican juntas cuando se juntan `tam_lote` o cuando la más
+#   antigua lleva `plazo` segundos esperando, así una alerta tarda a lo más plazo + intervalo +
+#   el tiempo de clasificar un lote.
+# - Métricas: líneas por segundo y retraso (desde que se leyó la línea hasta que se clasificó).
+#
+# Ejemplo:
+#   python seguimiento_logs.py /var/log/seguridad.log logs.txt --lote 500 --plazo 0.5
+import argparse
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from skealearningmodulo9 import RUTA_MODELO, extract_features, load_model, predict_labels
+
+# Bytes por lectura: con --desde-inicio o después de una ráfaga no se carga todo lo pendiente
+TAM_LECTURA = 1 << 20
+
+
+class SeguidorArchivo:
+    """
+    Lee las líneas nuevas de un archivo, siguiéndolo aunque se rote o se trunque.
+
+    Args:
+        ruta (str): Archivo a seguir (puede no existir todavía).
+        desde_inicio (bool): Si es True lee el contenido existente; si no, empieza al final.
+        tam_lectura (int): Bytes leídos por llamada a read().
+    """
+
+    def __init__(self, ruta, desde_inicio=False, tam_lectura=TAM_LECTURA):
+        self.ruta = ruta
+        self.tam_lectura = tam_lectura
+        self.archivo = None
+        self.inodo = None
+        self.resto = b""
+        self._abrir(al_final=not desde_inicio)
+
+    def _abrir(self, al_final=False):
+        try:
+            self.archivo = open(self.ruta, "rb")
+        except FileNotFoundError:
+            self.archivo = self.inodo = None
+            return
+        self.inodo = os.fstat(self.archivo.fileno()).st_ino
+        if al_final:
+            self.archivo.seek(0, os.SEEK_END)
+
+    def _leer_disponible(self):
+        # Por bloques de tam_lectura: la memoria depende del bloque y no de cuánto se atrasó
+        while True:
+            datos = self.archivo.read(self.tam_lectura)
+            if not datos:
+                return
+            lineas = (self.resto + datos).split(b"\n")
+            self.resto = lineas.pop()  # Línea incompleta: se espera al resto
+            for linea in lineas:
+                linea = linea.decode("utf-8", errors="replace").strip()
+                if linea:
+                    yield linea
+
+    def leer(self):
+        """
+        Genera las líneas completas escritas desde la última lectura (sin líneas vacías), a
+        medida que se leen los bloques.
+        """
+        if self.archivo is None:
+            # El archivo aún no existe (o se rotó y todavía no se crea el nuevo)
+            self._abrir()
+            if self.archivo is None:
+                return
+        yield from self._leer_disponible()
+        try:
+            estado = os.stat(self.ruta)
+        except FileNotFoundError:
+            estado = None
+        if estado is None or estado.st_ino != self.inodo:
+            # Rotado: lo que quedaba del archivo anterior ya se leyó; se abre el nuevo desde el inicio
+            resto, self.resto = self.resto.decode("utf-8", errors="replace").strip(), b""
+            if resto:
+                yield resto
+            self.archivo.close()
+            self._abrir()
+            if self.archivo is not None:
+                yield from self._leer_disponible()
+        elif estado.st_size < self.archivo.tell():
+            # Truncado en su lugar: se vuelve a leer desde el principio
+            self.archivo.seek(0)
+            self.resto = b""
+            yield from self._leer_disponible()
+
+    def cerrar(self):
+        if self.archivo is not None:
+            self.archivo.close()
+            self.archivo = None
+
+
+class MetricasSeguimiento:
+    """
+    Cuenta líneas, lotes y alertas, y mide el retraso de clasificación.
+
+    Args:
+        ventana (float): Segundos usados para calcular las líneas por segundo.
+    """
+
+    def __init__(self, ventana=10.0, reloj=time.monotonic):
+        self.ventana = ventana
+        self.reloj = reloj
+        self.lineas = 0
+        self.lotes = 0
+        self.alertas = 0
+        self.retraso_ultimo = 0.0
+        self.retraso_maximo = 0.0
+        self._recientes = deque()  # (momento, líneas clasificadas)
+
+    def registrar_lote(self, cantidad, alertas, retraso):
+        ahora = self.reloj()
+        self.lineas += cantidad
+        self.lotes += 1
+        self.alertas += alertas
+        self.retraso_ultimo = retraso
+        self.retraso_maximo = max(self.retraso_maximo, retraso)
+        self._recientes.append((ahora, cantidad))
+
+    def lineas_por_segundo(self):
+        limite = self.reloj() - self.ventana
+        while self._recientes and self._recientes[0][0] < limite:
+            self._recientes.popleft()
+        return sum(cantidad for _, cantidad in self._recientes) / self.ventana
+
+    def snapshot(self):
+        return {
+            "lineas": self.lineas,
+            "lotes": self.lotes,
+            "alertas": self.alertas,
+            "lineas_por_segundo": round(self.lineas_por_segundo(), 2),
+            "retraso_ultimo_segundos": round(self.retraso_ultimo, 4),
+            "retraso_maximo_segundos": round(self.retraso_maximo, 4),
+        }
+
+
+def imprimir_alerta(ruta, linea):
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Intrusión en {ruta}: {linea}", flush=True)
+
+
+def seguir(rutas, model, vectorizer, tam_lote=500, plazo=1.0, intervalo=0.2, desde_inicio=False,
+           alertar=imprimir_alerta, metricas=None, reportar=None, cada=10.0, detener=None):
+    """
+    Sigue los archivos y clasifica las líneas nuevas por micro-lotes hasta que se active `detener`.
+
+    Args:
+        rutas (list[str]): Archivos a seguir.
+        model: Modelo entrenado.
+        vectorizer: Vectorizador del modelo.
+        tam_lote (int): Líneas que disparan la clasificación de inmediato.
+        plazo (float): Segundos máximos que una línea espera a que se complete su lote.
+        intervalo (float): Segundos entre revisiones cuando no hay líneas nuevas.
+        desde_inicio (bool): Si es True también clasifica el contenido que ya tenían los archivos.
+        alertar (callable): Función f(ruta, línea) llamada por cada intrusión.
+        metricas (MetricasSeguimiento): Acumulador de métricas; se crea uno si no se indica.
+        reportar (callable): Función f(snapshot) llamada cada `cada` segundos.
+        detener (threading.Event): Evento para terminar el ciclo.
+
+    Returns:
+        MetricasSeguimiento: Métricas acumuladas.
+    """
+    metricas = metricas or MetricasSeguimiento()
+    detener = detener or threading.Event()
+    seguidores = [SeguidorArchivo(ruta, desde_inicio) for ruta in rutas]
+    pendientes = []  # (momento en que se leyó, ruta, línea)
+    proximo_reporte = time.monotonic() + cada
+
+    def clasificar(lote):
+        lineas = [linea for _, _, linea in lote]
+        predicciones = predict_labels(model, extract_features(lineas, vectorizer))
+        alertas = 0
+        for (_, ruta, linea), prediccion in zip(lote, predicciones):
+            if prediccion == 1:
+                alertas += 1
+                alertar(ruta, linea)
+        # El retraso del lote es el de su línea más antigua
+        metricas.registrar_lote(len(lote), alertas, time.monotonic() - lote[0][0])
+
+    try:
+        while not detener.is_set():
+            ahora = time.monotonic()
+            for seguidor in seguidores:
+                for linea in seguidor.leer():
+                    pendientes.append((ahora, seguidor.ruta, linea))
+                    # Cada lote completo se clasifica mientras se lee: un atraso grande nunca se
+                    # acumula completo en memoria
+                    if len(pendientes) >= tam_lote:
+                        clasificar(pendientes)
+                        pendientes = []
+
+            if pendientes and time.monotonic() - pendientes[0][0] >= plazo:
+                clasificar(pendientes)
+                pendientes.clear()
+
+            if reportar and time.monotonic() >= proximo_reporte:
+                reportar(metricas.snapshot())
+                proximo_reporte += cada
+
+            # Sin esperar más de lo que le falta al lote pendiente para cumplir su plazo
+            espera = intervalo
+            if pendientes:
+                espera = min(espera, max(0.0, plazo - (time.monotonic() - pendientes[0][0])))
+            detener.wait(espera)
+        if pendientes:
+            clasificar(pendientes)
+    finally:
+        for seguidor in seguidores:
+            seguidor.cerrar()
+    return metricas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Detección de intrusiones siguiendo archivos de registros")
+    parser.add_argument("logs", nargs="+", help="archivos a seguir")
+    parser.add_argument("--modelo", default=RUTA_MODELO, help="artefacto entrenado con skealearningmodulo9.py")
+    parser.add_argument("--lote", type=int, default=500, help="líneas por micro-lote")
+    parser.add_argument("--plazo", type=float, default=1.0, help="segundos máximos de espera por línea")
+    parser.add_argument("--intervalo", type=float, default=0.2, help="segundos entre revisiones de los archivos")
+    parser.add_argument("--desde-inicio", action="store_true", help="clasifica también el contenido existente")
+    parser.add_argument("--reporte", type=float, default=10.0, help="segundos entre reportes de métricas")
+    parser.add_argument("--metricas", help="archivo JSON donde se escriben las métricas en cada reporte")
+    args = parser.parse_args()
+
+    vectorizer, model, metadatos = load_model(args.modelo)
+    print(f"Modelo {metadatos['version']} cargado; siguiendo {', '.join(args.logs)}", flush=True)
+
+    def reportar(snapshot):
+        print("Métricas: {lineas_por_segundo} líneas/s, retraso {retraso_ultimo_segundos}s "
+              "(máx. {retraso_maximo_segundos}s), {alertas} alertas".format(**snapshot), flush=True)
+        if args.metricas:
+            with open(args.metricas, "w", encoding="utf-8") as archivo:
+                json.dump(snapshot, archivo, indent=2)
+
+    try:
+        seguir(args.logs, model, vectorizer, args.lote, args.plazo, args.intervalo, args.desde_inicio,
+               reportar=reportar, cada=args.reporte)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,236 @@
+# servicio_fraude.py
+# Servicio HTTP para evaluar el riesgo de fraude de una compra en línea (por ejemplo al pagar).
+#
+# El modelo, el scaler y el esquema se cargan una vez al iniciar y se quedan en memoria. Las
+# solicitudes que llegan al mismo tiempo se juntan en micro-lotes: un hilo trabajador toma la
+# primera solicitud de la cola, espera a lo más FRAUD_BATCH_WAIT_MS por otras y llama a
+# predict_proba una sola vez para todas (una llamada con 32 filas cuesta casi lo mismo que con 1).
+#
+# Variables de entorno:
+#   FRAUD_MODEL                 artefacto del modelo (modelo_fraude.joblib; se entrena con
+#                               compras.csv si no existe)
+#   FRAUD_MAX_BATCH             filas máximas por lote (32)
+#   FRAUD_BATCH_WAIT_MS         espera máxima para completar un lote (5 ms)
+#   FRAUD_LATENCY_BUDGET_MS     tiempo máximo de una solicitud; si se excede responde 503 (100 ms)
+#
+# Ejemplo:
+#   curl -X POST localhost:5001/score -H 'Content-Type: application/json' \
+#        -d '{"ubicación": "CDMX", "producto": "Ropa", "método_pago": "Tarjeta", "dispositivo": "PC"}'
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FuturoAgotado
+
+import pandas as pd
+from flask import Flask, Response, jsonify, request
+
+from esquema_fraude import COLUMNAS, EsquemaCategorico
+from modelo_artefacto import existe_artefacto
+from vulnerabilidadpractica9 import (RUTA_MODELO_FRAUDE, alinear_columnas, asignar_riesgo, cargar_datos,
+                                     cargar_modelo, entrenar_modelo, guardar_modelo, probabilidades_sin_fraude)
+
+# Límites de las cubetas del histograma de tamaño de lote
+CUBETAS_LOTE = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class LoteadorFraude:
+    """
+    Junta solicitudes concurrentes en micro-lotes y las evalúa en un hilo trabajador.
+
+    Args:
+        modelo, scaler, esquema: Resultado de cargar_modelo (esquema puede ser None).
+        tam_maximo (int): Filas máximas por lote.
+        espera_maxima (float): Segundos que se espera a que se complete un lote.
+    """
+
+    def __init__(self, modelo, scaler, esquema=None, tam_maximo=32, espera_maxima=0.005):
+        self.modelo = modelo
+        self.scaler = scaler
+        self.esquema = esquema
+        self.tam_maximo = tam_maximo
+        self.espera_maxima = espera_maxima
+        self.cola = queue.Queue()
+        self._candado = threading.Lock()
+        self.solicitudes = 0
+        self.filas = 0
+        self.lotes = 0
+        self.agotadas = 0
+        self.cola_maxima = 0
+        self.segundos_prediccion = 0.0
+        self.histograma_lote = [0] * (len(CUBETAS_LOTE) + 1)  # La última cubeta es +Inf
+        self._hilo = threading.Thread(target=self._trabajar, name="loteador-fraude", daemon=True)
+        self._hilo.start()
+
+    def enviar(self, compras):
+        """
+        Encola una lista de compras (diccionarios) y regresa un Future con la lista de
+        resultados {'riesgo', 'prob_fraude'} en el mismo orden.
+        """
+        futuro = Future()
+        self.cola.put((compras, futuro))
+        with self._candado:
+            self.solicitudes += 1
+            self.cola_maxima = max(self.cola_maxima, self.cola.qsize())
+        return futuro
+
+    def evaluar(self, compras, timeout):
+        """Envía las compras y espera el resultado; lanza TimeoutError si se excede timeout."""
+        futuro = self.enviar(compras)
+        try:
+            return futuro.result(timeout)
+        except FuturoAgotado:
+            futuro.cancel()  # Si aún no entra a un lote, el trabajador la descarta
+            with self._candado:
+                self.agotadas += 1
+            raise TimeoutError("La evaluación excedió el presupuesto de latencia")
+
+    def _trabajar(self):
+        while True:
+            lote = [self.cola.get()]
+            filas = len(lote[0][0])
+            limite = time.monotonic() + self.espera_maxima
+            while filas < self.tam_maximo:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    siguiente = self.cola.get(timeout=restante)
+                except queue.Empty:
+                    break
+                lote.append(siguiente)
+                filas += len(siguiente[0])
+            self._procesar(lote)
+
+    def _procesar(self, lote):
+        # Las solicitudes que ya vencieron (canceladas) no se evalúan
+        lote = [(compras, futuro) for compras, futuro in lote if futuro.set_running_or_notify_cancel()]
+        if not lote:
+            return
+        inicio = time.perf_counter()
+        try:
+            datos = pd.DataFrame([compra for compras, _ in lote for compra in compras], columns=list(COLUMNAS))
+            if self.esquema is None:
+                datos = alinear_columnas(datos, self.scaler)
+            prob_sin_fraude = probabilidades_sin_fraude(self.modelo, self.scaler, datos, self.esquema)
+            riesgos = asignar_riesgo(prob_sin_fraude)
+        except Exception as e:
+            for _, futuro in lote:
+                futuro.set_exception(e)
+            return
+        duracion = time.perf_counter() - inicio
+
+        posicion = 0
+        for compras, futuro in lote:
+            fin = posicion + len(compras)
+            futuro.set_result([
+                {'riesgo': riesgos[i], 'prob_fraude': round(1.0 - float(prob_sin_fraude[i]), 6)}
+                for i in range(posicion, fin)
+            ])
+            posicion = fin
+
+        with self._candado:
+            self.lotes += 1
+            self.filas += posicion
+            self.segundos_prediccion += duracion
+            cubeta = next((i for i, limite in enumerate(CUBETAS_LOTE) if posicion <= limite), len(CUBETAS_LOTE))
+            self.histograma_lote[cubeta] += 1
+
+    def snapshot(self):
+        with self._candado:
+            return {
+                'cola_actual': self.cola.qsize(),
+                'cola_maxima': self.cola_maxima,
+                'solicitudes': self.solicitudes,
+                'agotadas': self.agotadas,
+                'lotes': self.lotes,
+                'filas': self.filas,
+                'filas_por_lote': self.filas / self.lotes if self.lotes else 0.0,
+                'segundos_prediccion': round(self.segundos_prediccion, 6),
+                'histograma_lote': dict(zip([str(limite) for limite in CUBETAS_LOTE] + ['+Inf'], self.histograma_lote)),
+            }
+
+    def formato_prometheus(self):
+        datos = self.snapshot()
+        lineas = [
+            '# HELP fraude_cola_solicitudes Solicitudes esperando a entrar en un lote',
+            '# TYPE fraude_cola_solicitudes gauge',
+            'fraude_cola_solicitudes {}'.format(datos['cola_actual']),
+            '# HELP fraude_solicitudes_total Solicitudes recibidas',
+            '# TYPE fraude_solicitudes_total counter',
+            'fraude_solicitudes_total {}'.format(datos['solicitudes']),
+            '# HELP fraude_agotadas_total Solicitudes que excedieron el presupuesto de latencia',
+            '# TYPE fraude_agotadas_total counter',
+            'fraude_agotadas_total {}'.format(datos['agotadas']),
+            '# HELP fraude_lote_filas Filas por llamada a predict_proba',
+            '# TYPE fraude_lote_filas histogram',
+        ]
+        acumulado = 0
+        for limite, cuenta in datos['histograma_lote'].items():
+            acumulado += cuenta
+            lineas.append('fraude_lote_filas_bucket{{le="{}"}} {}'.format(limite, acumulado))
+        lineas.append('fraude_lote_filas_sum {}'.format(datos['filas']))
+        lineas.append('fraude_lote_filas_count {}'.format(datos['lotes']))
+        return '\n'.join(lineas) + '\n'
+
+
+def cargar_o_entrenar(ruta=RUTA_MODELO_FRAUDE, datos='compras.csv'):
+    """Carga el modelo guardado; si no existe lo entrena con el esquema categórico y lo guarda."""
+    if not existe_artefacto(ruta):
+        esquema = EsquemaCategorico()
+        modelo, scaler = entrenar_modelo(cargar_datos(datos, codificar=False), esquema)
+        guardar_modelo(modelo, scaler, ruta, esquema=esquema)
+    return cargar_modelo(ruta)
+
+
+app = Flask(__name__)
+app.config['FRAUD_MODEL'] = os.environ.get('FRAUD_MODEL', RUTA_MODELO_FRAUDE)
+app.config['FRAUD_MAX_BATCH'] = int(os.environ.get('FRAUD_MAX_BATCH', 32))
+app.config['FRAUD_BATCH_WAIT_MS'] = float(os.environ.get('FRAUD_BATCH_WAIT_MS', 5))
+app.config['FRAUD_LATENCY_BUDGET_MS'] = float(os.environ.get('FRAUD_LATENCY_BUDGET_MS', 100))
+
+loteador = LoteadorFraude(*cargar_o_entrenar(app.config['FRAUD_MODEL']), tam_maximo=app.config['FRAUD_MAX_BATCH'],
+                          espera_maxima=app.config['FRAUD_BATCH_WAIT_MS'] / 1000)
+
+
+def leer_compras_json():
+    """Lee una compra (objeto) o varias (lista) del cuerpo. Lanza ValueError si no son válidas."""
+    data = request.get_json(silent=True)
+    compras = data if isinstance(data, list) else [data]
+    if not compras or len(compras) > app.config['FRAUD_MAX_BATCH']:
+        raise ValueError('Se esperan entre 1 y {} compras'.format(app.config['FRAUD_MAX_BATCH']))
+    for compra in compras:
+        if not isinstance(compra, dict):
+            raise ValueError('Cada compra debe ser un objeto JSON')
+        faltantes = [columna for columna in COLUMNAS if columna not in compra]
+        if faltantes:
+            raise ValueError('Faltan campos: {}'.format(', '.join(faltantes)))
+    return [{columna: compra[columna] for columna in COLUMNAS} for compra in compras]
+
+
+@app.route('/score', methods=['POST'])
+def score():
+    try:
+        compras = leer_compras_json()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        resultados = loteador.evaluar(compras, app.config['FRAUD_LATENCY_BUDGET_MS'] / 1000)
+    except TimeoutError as e:
+        return jsonify({'error': str(e)}), 503
+    if isinstance(request.get_json(silent=True), list):
+        return jsonify({'resultados': resultados}), 200
+    return jsonify(resultados[0]), 200
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    # JSON por defecto; formato de texto de Prometheus con ?format=prometheus o Accept: text/plain
+    if request.args.get('format') == 'prometheus' or 'text/plain' in request.headers.get('Accept', ''):
+        return Response(loteador.formato_prometheus(), mimetype='text/plain; version=0.0.4')
+    return jsonify(loteador.snapshot())
+
+
+if __name__ == '__main__':
+    # threaded=True: cada solicitud en su hilo, así varias pueden esperar en el mismo lote
+    app.run(port=int(os.environ.get('PORT', 5001)), threaded=True)
@@ -1,5 +1,27 @@
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
+import argparse
+import glob
+import gzip
+import itertools
+import os
+import re
+
+from modelo_artefacto import RegistroModelos, cargar_artefacto, existe_artefacto, guardar_artefacto
+
+# scikit-learn se importa dentro de las funciones de entrenamiento: cuando el modelo ya está
+# guardado, la clasificación no paga el costo de importarlo ni de volver a entrenar.
+RUTA_MODELO = "modelo_logs.joblib"
+# El modo --stream necesita un vectorizador por hashing; su artefacto va en otro archivo para no
+# cargar por error el de TF-IDF (que guarda un vocabulario ajustado a los registros de entrenamiento)
+RUTA_MODELO_STREAM = "modelo_logs_hashing.joblib"
+
+# Lectura en streaming: bytes por lectura y registros por lote de clasificación
+TAM_BLOQUE = 1024 * 1024
+TAM_LOTE = 10000
+# Columnas del vectorizador por hashing (2**20 deja muy pocas colisiones entre palabras)
+N_CARACTERISTICAS = 2 ** 20
+# Registro de versiones del modelo incremental
+DIRECTORIO_REGISTRO = "modelos_logs"
+CLASES = [0, 1]
 
 def load_logs(filename):
     """
@@ -22,18 +44,129 @@ def load_logs(filename):
         print(f"Error al leer el archivo: {e}")
         return []
 
-def extract_features(logs):
+def rotated_files(filename):
+    """
+    Lista un archivo de registros junto con sus rotaciones, de la más antigua a la actual:
+    logs.txt.3.gz, logs.txt.2.gz, logs.txt.1, logs.txt
+
+    Args:
+        filename (str): Ruta del archivo de registros actual.
+
+    Returns:
+        list[str]: Rutas en orden cronológico.
+    """
+    patron = re.compile(re.escape(filename) + r"\.(\d+)(\.gz)?$")
+    rotados = []
+    for ruta in glob.glob(glob.escape(filename) + ".*"):
+        coincidencia = patron.match(ruta)
+        if coincidencia:
+            rotados.append((int(coincidencia.group(1)), ruta))
+    # Número mayor = rotación más antigua
+    rutas = [ruta for _, ruta in sorted(rotados, reverse=True)]
+    if os.path.exists(filename):
+        rutas.append(filename)
+    return rutas
+
+def open_log(path):
+    """
+    Abre un archivo de registros en modo binario; los .gz se descomprimen al vuelo.
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+def iter_logs(paths, chunk_size=TAM_BLOQUE, include_rotated=False):
+    """
+    Lee los registros de uno o varios archivos por bloques de tamaño fijo, sin cargarlos completos.
+
+    Las líneas que quedan cortadas entre dos bloques se unen antes de entregarse.
+    Las líneas vacías se omiten.
+
+    Args:
+        paths (str | list[str]): Archivo o lista de archivos (pueden estar comprimidos con gzip).
+        chunk_size (int): Bytes leídos por bloque.
+        include_rotated (bool): Si es True también lee las rotaciones de cada archivo (logs.txt.1, ...).
+
+    Yields:
+        str: Un registro sin salto de línea.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    if include_rotated:
+        paths = [ruta for path in paths for ruta in rotated_files(path)]
+    for path in paths:
+        with open_log(path) as file:
+            resto = b""
+            for bloque in iter(lambda: file.read(chunk_size), b""):
+                lineas = (resto + bloque).split(b"\n")
+                resto = lineas.pop()  # La última línea puede continuar en el siguiente bloque
+                for linea in lineas:
+                    log = linea.decode("utf-8", errors="replace").strip()
+                    if log:
+                        yield log
+            log = resto.decode("utf-8", errors="replace").strip()
+            if log:
+                yield log
+
+def batched(iterable, batch_size=TAM_LOTE):
+    """
+    Agrupa un iterable en listas de hasta batch_size elementos.
+
+    Yields:
+        list: Lote de elementos.
+    """
+    iterador = iter(iterable)
+    while True:
+        lote = list(itertools.islice(iterador, batch_size))
+        if not lote:
+            return
+        yield lote
+
+def hashing_vectorizer(n_features=N_CARACTERISTICAS):
+    """
+    Crea un vectorizador por hashing: no tiene vocabulario que ajustar (no guarda estado),
+    así que puede transformar cualquier lote sin haber visto el resto de los registros.
+
+    Args:
+        n_features (int): Número de columnas de la matriz.
+
+    Returns:
+        HashingVectorizer: Vectorizador listo para usarse.
+    """
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    return HashingVectorizer(n_features=n_features, alternate_sign=False, norm="l2")
+
+def fit_features(logs):
+    """
+    Ajusta un vectorizador TF-IDF con los registros y los convierte en vectores.
+
+    Args:
+        logs (list[str]): Lista de registros de texto.
+
+    Returns:
+        tuple: (TfidfVectorizer ajustado, matriz de características).
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    vectorizer = TfidfVectorizer()
+    return vectorizer, vectorizer.fit_transform(logs)
+
+def extract_features(logs, vectorizer=None):
     """
     Convierte los registros de texto en vectores numéricos usando TF-IDF.
 
     Args:
         logs (list[str]): Lista de registros de texto.
+        vectorizer: Vectorizador ya ajustado (por ejemplo el de un modelo guardado).
+            Si es None se ajusta uno nuevo con estos registros.
 
     Returns:
         scipy.sparse matrix: Matriz de características numéricas.
     """
-    vectorizer = TfidfVectorizer()
-    return vectorizer.fit_transform(logs)
+    if vectorizer is None:
+        return fit_features(logs)[1]
+    return vectorizer.transform(logs)
 
 def train_model(features, labels):
     """
@@ -46,10 +179,126 @@ def train_model(features, labels):
     Returns:
         LogisticRegression: Modelo entrenado.
     """
+    from sklearn.linear_model import LogisticRegression
+
     model = LogisticRegression()
     model.fit(features, labels)
     return model
 
+def incremental_model():
+    """
+    Crea un modelo lineal que se puede seguir entrenando por lotes con partial_fit
+    (descenso de gradiente estocástico con pérdida logística, como la regresión logística).
+
+    Returns:
+        SGDClassifier: Modelo sin entrenar.
+    """
+    from sklearn.linear_model import SGDClassifier
+
+    return SGDClassifier(loss="log_loss", alpha=1e-5, random_state=0)
+
+def update_model(logs, labels=None, registro=DIRECTORIO_REGISTRO, batch_size=TAM_LOTE, version=None):
+    """
+    Actualiza el modelo incremental con registros nuevos sin volver a entrenar desde cero.
+
+    Parte de la versión activa del registro (o de un modelo nuevo si está vacío), la ajusta lote por
+    lote con partial_fit y guarda el resultado como una versión nueva que queda activa; la versión
+    anterior se conserva para poder revertir.
+
+    Args:
+        logs (iterable[str]): Registros nuevos (puede ser un generador, por ejemplo iter_logs).
+        labels (iterable[int]): Etiquetas de los registros; si es None se usan las de label_logs.
+        registro (str | RegistroModelos): Registro de versiones.
+        batch_size (int): Registros por llamada a partial_fit.
+        version (str): Nombre de la versión nueva (por defecto la fecha y hora).
+
+    Returns:
+        dict: Metadatos de la versión guardada.
+    """
+    if not isinstance(registro, RegistroModelos):
+        registro = RegistroModelos(registro)
+    if registro.actual() is None:
+        vectorizer, model, acumuladas = hashing_vectorizer(), incremental_model(), 0
+    else:
+        # Sin mmap: partial_fit modifica los coeficientes cargados
+        vectorizer, model, metadatos = registro.cargar(mmap=False)
+        acumuladas = metadatos.get("muestras_acumuladas", 0)
+
+    etiquetas = iter(labels) if labels is not None else None
+    muestras = 0
+    for lote in batched(logs, batch_size):
+        lote_etiquetas = label_logs(lote) if etiquetas is None else list(itertools.islice(etiquetas, len(lote)))
+        model.partial_fit(vectorizer.transform(lote), lote_etiquetas, classes=CLASES)
+        muestras += len(lote)
+    if muestras == 0:
+        raise ValueError("No hay registros nuevos para actualizar el modelo")
+
+    return registro.guardar(vectorizer, model, version=version,
+                            extra={"muestras": muestras, "muestras_acumuladas": acumuladas + muestras})
+
+def label_logs(logs):
+    """
+    Etiqueta los registros: 1 si empieza con "Intrusion", 0 en otro caso.
+
+    Args:
+        logs (list[str]): Lista de registros de texto.
+
+    Returns:
+        list[int]: Etiquetas binarias.
+    """
+    return [1 if log.startswith("Intrusion") else 0 for log in logs]
+
+def train_and_save(logs, ruta_modelo=RUTA_MODELO, version=None, hashing=False):
+    """
+    Entrena el vectorizador y el modelo una sola vez y los guarda como artefacto.
+
+    Args:
+        logs (list[str]): Registros de entrenamiento.
+        ruta_modelo (str): Archivo .joblib de destino.
+        version (str): Versión del artefacto (por defecto la fecha y hora).
+        hashing (bool): Usa el vectorizador por hashing en lugar de TF-IDF, necesario para
+            clasificar en streaming sin ajustar un vocabulario.
+
+    Returns:
+        dict: Metadatos del artefacto (versión, hashes).
+    """
+    labels = label_logs(logs)
+    if hashing:
+        vectorizer = hashing_vectorizer()
+        features = vectorizer.transform(logs)
+    else:
+        vectorizer, features = fit_features(logs)
+    model = train_model(features, labels)
+    return guardar_artefacto(ruta_modelo, vectorizer, model, version=version, datos=(logs, labels))
+
+def load_model(ruta_modelo=RUTA_MODELO, verificar=False, vectorizador=None):
+    """
+    Carga el vectorizador y el modelo guardados sin volver a entrenar.
+
+    Args:
+        ruta_modelo (str): Archivo .joblib del artefacto, o directorio de un registro de
+            versiones (se carga la versión activa).
+        verificar (bool): Compara el SHA-256 completo del artefacto (por defecto solo el tamaño).
+        vectorizador (str): Tipo de vectorizador requerido, por ejemplo "HashingVectorizer".
+
+    Returns:
+        tuple: (vectorizer, modelo, metadatos).
+
+    Raises:
+        ValueError: Si el artefacto usa otro tipo de vectorizador.
+    """
+    if os.path.isdir(ruta_modelo):
+        vectorizer, model, metadatos = RegistroModelos(ruta_modelo).cargar(verificar=verificar)
+    else:
+        vectorizer, model, metadatos = cargar_artefacto(ruta_modelo, verificar=verificar)
+    # Se compara con los metadatos guardados al entrenar (el tipo del objeto cargado coincide)
+    # Los metadatos de formato anterior a 3 guardan el tipo en "vectorizer"
+    tipo = metadatos.get("preprocesador", metadatos.get("vectorizer"))
+    if vectorizador is not None and tipo != vectorizador:
+        raise ValueError("El modelo '{}' usa {} y se requiere {}; entrénelo con --entrenar o indique otro --modelo"
+                         .format(ruta_modelo, tipo, vectorizador))
+    return vectorizer, model, metadatos
+
 def predict_labels(model, features):
     """
     Usa el modelo entrenado para predecir etiquetas de nuevos datos.
@@ -63,26 +312,109 @@ def predict_labels(model, features):
     """
     return model.predict(features)
 
+def classify_stream(model, vectorizer, logs, batch_size=TAM_LOTE):
+    """
+    Clasifica un flujo de registros lote por lote: la memoria usada depende del tamaño del
+    lote y no del tamaño total de los archivos.
+
+    Args:
+        model: Modelo entrenado.
+        vectorizer: Vectorizador del modelo (sin estado, por ejemplo HashingVectorizer).
+        logs (iterable[str]): Registros, por ejemplo los que produce iter_logs.
+        batch_size (int): Registros por lote.
+
+    Yields:
+        tuple: (registro, predicción).
+    """
+    for lote in batched(logs, batch_size):
+        yield from zip(lote, predict_labels(model, extract_features(lote, vectorizer)))
+
 if __name__ == "__main__":
-    # Ruta del archivo con los registros
-    archivo_logs = "logs.txt"
+    # python skealearningmodulo9.py [logs.txt ...] [--entrenar] [--modelo modelo_logs.joblib]
+    # Archivos grandes: python skealearningmodulo9.py /var/log/seguridad.log --stream --rotados
+    parser = argparse.ArgumentParser(description="Clasificador de registros de intrusión")
+    parser.add_argument("logs", nargs="*", default=["logs.txt"], help="archivos con los registros")
+    parser.add_argument("--modelo", help="artefacto del modelo entrenado (por defecto {}, o {} con --stream)"
+                        .format(RUTA_MODELO, RUTA_MODELO_STREAM))
+    parser.add_argument("--entrenar", action="store_true", help="entrena y guarda el modelo aunque ya exista")
+    parser.add_argument("--stream", action="store_true",
+                        help="lee por bloques y clasifica por lotes (memoria acotada, acepta .gz)")
+    parser.add_argument("--rotados", action="store_true", help="incluye las rotaciones (logs.txt.1, .2.gz, ...)")
+    parser.add_argument("--lote", type=int, default=TAM_LOTE, help="registros por lote en modo --stream")
+    parser.add_argument("--muestra", type=int, default=100000,
+                        help="registros usados para entrenar en modo --stream")
+    parser.add_argument("--registro", help="directorio de versiones del modelo incremental (en lugar de --modelo)")
+    parser.add_argument("--actualizar", action="store_true",
+                        help="ajusta el modelo incremental del --registro con los registros dados")
+    parser.add_argument("--revertir", nargs="?", const="", metavar="VERSION",
+                        help="vuelve el --registro a la versión indicada o a la anterior")
+    parser.add_argument("--verificar", action="store_true",
+                        help="compara el SHA-256 completo del modelo antes de cargarlo")
+    args = parser.parse_args()
+    if args.modelo is None:
+        args.modelo = RUTA_MODELO_STREAM if args.stream else RUTA_MODELO
 
-    # Cargar los registros
-    logs = load_logs(archivo_logs)
-    
-    if logs:
-        # Crear etiquetas: 1 si empieza con "Intrusion", 0 en otro caso
-        labels = [1 if log.startswith("Intrusion") else 0 for log in logs]
+    if args.registro:
+        # Modelo incremental: las consultas usan la versión activa del registro
+        args.modelo = args.registro
+        args.stream = True
+        if args.revertir is not None:
+            try:
+                version = RegistroModelos(args.registro).revertir(args.revertir or None)
+            except (ValueError, FileNotFoundError) as e:
+                raise SystemExit(f"Error: {e}")
+            print(f"Versión activa: {version}")
+            raise SystemExit(0)
+        if args.actualizar:
+            metadatos = update_model(iter_logs(args.logs, include_rotated=args.rotados), registro=args.registro,
+                                     batch_size=args.lote)
+            print(f"Modelo actualizado con {metadatos['muestras']} registros: versión {metadatos['version']} "
+                  f"({metadatos['muestras_acumuladas']} acumulados, anterior {metadatos['anterior']})")
+            raise SystemExit(0)
+
+    if args.stream:
+        # Entrenar con una muestra del inicio de los archivos, con vectorizador por hashing
+        # (el modelo incremental se entrena con --actualizar)
+        if not args.registro and (args.entrenar or not existe_artefacto(args.modelo)):
+            muestra = list(itertools.islice(iter_logs(args.logs, include_rotated=args.rotados), args.muestra))
+            metadatos = train_and_save(muestra, args.modelo, hashing=True)
+            print(f"Modelo entrenado y guardado en {args.modelo} (versión {metadatos['version']})")
+
+        try:
+            vectorizer, model, metadatos = load_model(args.modelo, verificar=args.verificar,
+                                                      vectorizador="HashingVectorizer")
+        except ValueError as e:
+            raise SystemExit(f"Error: {e}")
+        total = intrusiones = 0
+        for log, prediction in classify_stream(model, vectorizer, iter_logs(args.logs, include_rotated=args.rotados),
+                                               args.lote):
+            total += 1
+            if prediction == 1:
+                intrusiones += 1
+                print(f"Intrusión: {log}")
+        print(f"{total} registros analizados, {intrusiones} intrusiones detectadas.")
+    else:
+        # Ruta del archivo con los registros
+        archivo_logs = args.logs[0]
+
+        # Cargar los registros
+        logs = load_logs(archivo_logs)
+
+        if logs:
+            # Entrenar solo si se pide o si todavía no hay un modelo guardado
+            if args.entrenar or not existe_artefacto(args.modelo):
+                metadatos = train_and_save(logs, args.modelo)
+                print(f"Modelo entrenado y guardado en {args.modelo} (versión {metadatos['version']})")
 
-        # Extraer características numéricas
-        features = extract_features(logs)
+            # Cargar el vectorizador y el modelo guardados
+            vectorizer, model, metadatos = load_model(args.modelo, verificar=args.verificar)
 
-        # Entrenar el modelo con las características y etiquetas
-        model = train_model(features, labels)
+            # Extraer características numéricas con el vectorizador del modelo
+            features = extract_features(logs, vectorizer)
 
-        # Predecir etiquetas para los mismos registros (solo como ejemplo)
-        predictions = predict_labels(model, features)
+            # Predecir etiquetas para los registros
+            predictions = predict_labels(model, features)
 
-        # Mostrar predicciones
-        for i, prediction in enumerate(predictions):
-            print(f"Registro: {logs[i]} → Predicción: {'Intrusión' if prediction == 1 else 'Normal'}")
\ No newline at end of file
+            # Mostrar predicciones
+            for i, prediction in enumerate(predictions):
+                print(f"Registro: {logs[i]} → Predicción: {'Intrusión' if prediction == 1 else 'Normal'}")
@@ -1,44 +1,54 @@
+import numpy as np
 import pandas as pd
 from sklearn.preprocessing import StandardScaler
 from sklearn.linear_model import LogisticRegression
 
-def cargar_datos(nombre_archivo):
+from cargador_compras import leer_compras
+from esquema_fraude import EsquemaCategorico
+from modelo_artefacto import guardar_artefacto, cargar_artefacto
+
+RUTA_MODELO_FRAUDE = "modelo_fraude.joblib"
+
+# Cortes sobre la probabilidad de no fraude y etiqueta de cada intervalo, de menor a mayor:
+# p <= 0.3 Muy alto, 0.3 < p <= 0.5 Alto, ..., p > 0.9 Muy bajo
+CORTES_RIESGO = (0.3, 0.5, 0.7, 0.9)
+ETIQUETAS_RIESGO = ("Muy alto", "Alto", "Medio", "Bajo", "Muy bajo")
+
+def cargar_datos(nombre_archivo, codificar=True, cache=None):
     """
     Carga los datos desde un archivo CSV y convierte variables categóricas en numéricas.
-    Prueba con encoding utf-8 y si falla usa latin1.
+    La codificación (utf-8 o latin1) se detecta con el primer bloque del archivo.
 
     Parámetros:
     nombre_archivo (str): Ruta del archivo CSV.
+    codificar (bool): Si es False deja las variables categóricas sin convertir (dtype category),
+        para codificarlas después con un EsquemaCategorico.
+    cache (str): Copia columnar opcional (.parquet, .feather o .pkl), ver cargador_compras.
 
     Retorna:
     pd.DataFrame: Datos preparados para el análisis.
     """
-    try:
-        datos = pd.read_csv(nombre_archivo, encoding='utf-8')
-    except UnicodeDecodeError:
-        print("Error con encoding utf-8, intentando con 'latin1'")
-        datos = pd.read_csv(nombre_archivo, encoding='latin1')
+    # Categóricas como category y 'fraude' ya convertido a 0/1 (int8)
+    datos = leer_compras(nombre_archivo, cache=cache)
 
     # Convertir variables categóricas a variables dummy (0/1)
-    datos = pd.get_dummies(datos)
-
-    # Revisar si la columna 'fraude' existe, y hacer limpieza básica
-    if 'fraude' in datos.columns:
-        if datos['fraude'].dtype == 'object':
-            datos['fraude'] = datos['fraude'].map({'no': 0, 'sí': 1, 'si': 1}).fillna(0).astype(int)
+    if codificar:
+        datos = pd.get_dummies(datos)
 
-        datos = datos.dropna(subset=['fraude'])
-    else:
+    # Revisar si la columna 'fraude' existe
+    if 'fraude' not in datos.columns:
         raise ValueError("La columna 'fraude' no existe en el archivo de datos.")
 
     return datos
 
-def entrenar_modelo(datos):
+def entrenar_modelo(datos, esquema=None):
     """
     Entrena un modelo de regresión logística usando los datos cargados.
 
     Parámetros:
     datos (pd.DataFrame): Datos con variables independientes y la variable objetivo 'fraude'.
+    esquema (EsquemaCategorico): Si se indica, datos son los datos crudos (cargar_datos con
+        codificar=False) y se codifican con el esquema; si aún no está ajustado se ajusta aquí.
 
     Retorna:
     model (LogisticRegression): Modelo entrenado.
@@ -47,8 +57,12 @@ def entrenar_modelo(datos):
     # y axis=0 para filas
     # Asegurarse de que 'fraude' esté en la última columna  
     # .drop() en pandas se usa para eliminar columnas     
-    X = datos.drop('fraude', axis=1)
     y = datos['fraude']
+    if esquema is not None:
+        # Matriz dispersa con las columnas del esquema
+        X = esquema.transformar(datos) if esquema.ajustado else esquema.ajustar_transformar(datos)
+    else:
+        X = datos.drop('fraude', axis=1)
 
     # Verificar que y sea una serie 1D y contenga solo valores binarios
     print("Valores únicos en y:", y.unique())
@@ -57,7 +71,8 @@ def entrenar_modelo(datos):
 
     # Normalizar variables independientes para mejor rendimiento del modelo
    # Crea un objeto de la clase StandardScaler de Scikit-learn, diseñado para escalar (transformar) los datos numéricos.
-    scaler = StandardScaler()
+    # Con una matriz dispersa no se resta la media (se perderían los ceros), solo se escala
+    scaler = StandardScaler(with_mean=esquema is None)
     #.fit_transform(X), Calcula la media ,desviación y moda estánda de cada columna de X y luego aplica la transformación para normalizar los datos.
     X_normalizado = scaler.fit_transform(X)
 
@@ -69,20 +84,108 @@ def entrenar_modelo(datos):
 
     return modelo, scaler
 
-def predecir_riesgo(modelo, scaler, datos):
+def guardar_modelo(modelo, scaler, ruta=RUTA_MODELO_FRAUDE, esquema=None):
     """
-    Usa el modelo entrenado para predecir riesgos en base a los datos.
+    Guarda el modelo y el scaler en un artefacto para usarlos sin volver a entrenar.
+
+    Parámetros:
+    modelo (LogisticRegression): Modelo entrenado.
+    scaler (StandardScaler): Scaler ajustado.
+    ruta (str): Archivo .joblib de destino.
+    esquema (EsquemaCategorico): Esquema usado al entrenar; se guarda en los metadatos (JSON).
+
+    Retorna:
+    dict: Metadatos del artefacto.
+    """
+    if esquema is not None:
+        extra = {"columnas": esquema.nombres_columnas(), "esquema": esquema.a_dict()}
+    else:
+        extra = {"columnas": list(scaler.feature_names_in_)}
+    # El scaler es el preprocesador del artefacto (en los metadatos: "preprocesador": "StandardScaler")
+    return guardar_artefacto(ruta, scaler, modelo, extra=extra)
+
+def cargar_modelo(ruta=RUTA_MODELO_FRAUDE):
+    """
+    Carga el modelo, el scaler y el esquema guardados con guardar_modelo.
+
+    Parámetros:
+    ruta (str): Archivo .joblib del artefacto.
+
+    Retorna:
+    tuple: (modelo, scaler, esquema); esquema es None si el modelo se entrenó con get_dummies.
+    """
+    scaler, modelo, metadatos = cargar_artefacto(ruta)
+    esquema = EsquemaCategorico.desde_dict(metadatos["esquema"]) if "esquema" in metadatos else None
+    return modelo, scaler, esquema
+
+def alinear_columnas(datos, scaler):
+    """
+    Convierte las variables categóricas de datos nuevos en las mismas columnas dummy, y en el
+    mismo orden, que se usaron al entrenar. Las columnas que no aparecen en estos datos se
+    llenan con 0 y las categorías que no se vieron al entrenar se descartan.
+
+    Parámetros:
+    datos (pd.DataFrame): Datos crudos (sin get_dummies).
+    scaler (StandardScaler): Scaler ajustado con un DataFrame.
+
+    Retorna:
+    pd.DataFrame: Datos con las columnas de entrenamiento.
+    """
+    return pd.get_dummies(datos).reindex(columns=scaler.feature_names_in_, fill_value=0)
+
+def asignar_riesgo(prob_sin_fraude, cortes=CORTES_RIESGO, etiquetas=ETIQUETAS_RIESGO):
+    """
+    Convierte probabilidades de no fraude en etiquetas de riesgo sin recorrerlas una por una.
+
+    np.searchsorted busca el intervalo de todas las probabilidades a la vez; con side='left'
+    una probabilidad igual a un corte queda en el intervalo inferior (p > corte para subir).
+
+    Parámetros:
+    prob_sin_fraude (array): Probabilidades de la clase 0 (sin fraude).
+    cortes (tuple): Cortes en orden ascendente.
+    etiquetas (tuple): Una etiqueta por intervalo (len(cortes) + 1), de menor a mayor probabilidad.
+
+    Retorna:
+    pd.Categorical: Etiqueta de riesgo de cada probabilidad.
+    """
+    if len(etiquetas) != len(cortes) + 1:
+        raise ValueError("Se necesitan {} etiquetas para {} cortes".format(len(cortes) + 1, len(cortes)))
+    if np.any(np.diff(cortes) <= 0):
+        raise ValueError("Los cortes deben estar en orden ascendente")
+    codigos = np.searchsorted(np.asarray(cortes, dtype=float), np.asarray(prob_sin_fraude, dtype=float), side="left")
+    return pd.Categorical.from_codes(codigos.astype(np.int8), categories=list(etiquetas))
+
+def contar_riesgos(riesgos):
+    """
+    Cuenta cuántos registros hay en cada nivel de riesgo, incluidos los niveles vacíos.
+
+    Parámetros:
+    riesgos (pd.Categorical): Resultado de asignar_riesgo o predecir_riesgo.
+
+    Retorna:
+    dict: Etiqueta -> número de registros.
+    """
+    conteos = np.bincount(riesgos.codes, minlength=len(riesgos.categories))
+    return dict(zip(riesgos.categories, conteos.tolist()))
+
+def probabilidades_sin_fraude(modelo, scaler, datos, esquema=None):
+    """
+    Calcula la probabilidad de no fraude (clase 0) de cada registro.
 
     Parámetros:
     modelo (LogisticRegression): Modelo entrenado.
     scaler (StandardScaler): Objeto para normalizar datos.
     datos (pd.DataFrame): Datos con variables independientes (sin 'fraude').
+    esquema (EsquemaCategorico): Si se indica, datos son crudos y se codifican con el esquema
+        (las categorías nuevas quedan en ceros y las columnas siempre coinciden).
 
     Retorna:
-    list: Lista con etiquetas de riesgo (Muy alto, Alto, Medio, Bajo, Muy bajo).
+    np.ndarray: Probabilidad de no fraude por registro.
     """
     # Eliminar variable objetivo si está en los datos (solo usar variables independientes)
-    if 'fraude' in datos.columns:
+    if esquema is not None:
+        datos_sin_objetivo = esquema.transformar(datos)
+    elif 'fraude' in datos.columns:
         datos_sin_objetivo = datos.drop('fraude', axis=1)
     else:
         datos_sin_objetivo = datos.copy()
@@ -91,40 +194,45 @@ def predecir_riesgo(modelo, scaler, datos):
     datos_normalizados = scaler.transform(datos_sin_objetivo)
 
     # Predecir probabilidades de clase negativa (sin fraude)
-    probabilidades = modelo.predict_proba(datos_normalizados)
+    return modelo.predict_proba(datos_normalizados)[:, 0]
 
-    # Convertir probabilidades a etiquetas de riesgo
-    etiquetas_riesgo = []
-    for prob in probabilidades:
-        prob_sin_fraude = prob[0]  # Probabilidad de no fraude (clase 0)
-
-        if prob_sin_fraude > 0.9:
-            riesgo = "Muy bajo"
-        elif prob_sin_fraude > 0.7:
-            riesgo = "Bajo"
-        elif prob_sin_fraude > 0.5:
-            riesgo = "Medio"
-        elif prob_sin_fraude > 0.3:
-            riesgo = "Alto"
-        else:
-            riesgo = "Muy alto"
+def predecir_riesgo(modelo, scaler, datos, cortes=CORTES_RIESGO, esquema=None):
+    """
+    Usa el modelo entrenado para predecir riesgos en base a los datos.
 
-        etiquetas_riesgo.append(riesgo)
+    Parámetros:
+    modelo (LogisticRegression): Modelo entrenado.
+    scaler (StandardScaler): Objeto para normalizar datos.
+    datos (pd.DataFrame): Datos con variables independientes (sin 'fraude').
+    cortes (tuple): Cortes sobre la probabilidad de no fraude (ver asignar_riesgo).
+    esquema (EsquemaCategorico): Esquema de codificación (ver probabilidades_sin_fraude).
 
-    return etiquetas_riesgo
+    Retorna:
+    pd.Categorical: Etiquetas de riesgo (Muy alto, Alto, Medio, Bajo, Muy bajo).
+    """
+    # Convertir probabilidades de no fraude (clase 0) a etiquetas de riesgo
+    return asignar_riesgo(probabilidades_sin_fraude(modelo, scaler, datos, esquema), cortes)
 
 if __name__ == "__main__":
-    # Cargar los datos del archivo CSV
-    datos = cargar_datos("compras.csv")
+    # Cargar los datos del archivo CSV (las variables categóricas las codifica el esquema)
+    datos = cargar_datos("compras.csv", codificar=False)
+
+    # Entrenar el modelo y obtener el scaler; el esquema registra las categorías de entrenamiento
+    esquema = EsquemaCategorico()
+    modelo_entrenado, scaler_entrenado = entrenar_modelo(datos, esquema)
 
-    # Entrenar el modelo y obtener el scaler
-    modelo_entrenado, scaler_entrenado = entrenar_modelo(datos)
+    # Guardar el modelo (con su esquema) para puntuar archivos grandes con puntuar_lotes.py
+    guardar_modelo(modelo_entrenado, scaler_entrenado, esquema=esquema)
 
     # Predecir los riesgos en los mismos datos (o en datos nuevos si tienes)
-    riesgos = predecir_riesgo(modelo_entrenado, scaler_entrenado, datos)
+    riesgos = predecir_riesgo(modelo_entrenado, scaler_entrenado, datos, esquema=esquema)
 
     # Mostrar las etiquetas de riesgo para cada registro. 
-    #riesgos es una lista que contiene los valores de riesgo (por ejemplo, "Muy bajo", "Alto", etc.
+    #riesgos es un arreglo categórico que contiene los valores de riesgo (por ejemplo, "Muy bajo", "Alto", etc.
     # enumerate(riesgos) es una función de Python que recorre la lista riesgos
     for i, riesgo in enumerate(riesgos):
-        print(f"Registro {i + 1}: Riesgo = {riesgo}")
\ No newline at end of file
+        print(f"Registro {i + 1}: Riesgo = {riesgo}")
+
+    # Registros por nivel de riesgo
+    for riesgo, cantidad in contar_riesgos(riesgos).items():
+        print(f"{riesgo}: {cantidad}")
\ No newline at end of file